@@ -0,0 +1,187 @@
+"""
+BENCHMARK: FLATTENING COMMENT TREES, RECURSIVE get_comment ( BEFORE ) VS THE ITERATIVE flatten_comments,
+ALONE AND UP TO THE DataFrame WRITTEN BY append_csv, AND DECODING THE RESPONSE BODY WITH json VS orjson ( WHEN INSTALLED )
+Usage: python bench/bench_flatten.py [--comments 50000] [--depth 3000] [--repeat 3]
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# RUN FROM ANYWHERE, utils.extract READS ./config.yaml FROM THE REPO ROOT
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+from utils.extract import extract_comment_data, flatten_comments, logger, COMMENT_FIELDS
+from utils.schema import frame
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+WORDS = ("my son was diagnosed with dyslexia last year and the school still does not "
+         "offer any support reading writing spelling tools like Grammarly really help").split()
+
+
+def recursive_get_comment(comments_data, post_id, depth=0, more=None):
+    """get_comment BEFORE THE ITERATIVE FLATTENER ( ONE DICT PER COMMENT, ONE LIST PER LEVEL )."""
+    nest_cmm = []
+    if not isinstance(comments_data, list):
+        return nest_cmm
+    indent = "    " * depth
+    for item in comments_data:
+        if isinstance(item, dict) and 'kind' in item:
+            kind = item['kind']
+            data = item['data']
+            if kind == 't1':
+                extract_cmm_data = extract_comment_data(data, post_id)
+                nest_cmm.append(extract_cmm_data)
+                logger.info(f"{indent}[L{depth}] -- {extract_cmm_data['reddit_id']} -- {extract_cmm_data['text'][:30]}...")
+                replies_raw = data.get('replies', '')
+                if isinstance(replies_raw, dict) and 'data' in replies_raw:
+                    nested_children = replies_raw['data'].get('children', [])
+                    nest_cmm.extend(recursive_get_comment(nested_children, post_id, depth + 1, more))
+            elif kind == 'more' and more is not None:
+                if data.get('children'):
+                    more['children'].extend(data['children'])
+                elif data.get('parent_id', '').startswith('t1_'):
+                    more['continue'].append((data['parent_id'][3:], data.get('depth', depth)))
+    return nest_cmm
+
+
+def comment(rnd, i, parent, depth):
+    return { 'id': f"c{i:x}", 'parent_id': parent, 'author': f"user{rnd.randrange(2000)}",
+             'created_utc': 1700000000.0 + i, 'body': " ".join(rnd.choices(WORDS, k=rnd.randint(3, 40))),
+             'score': rnd.randrange(50), 'depth': depth, 'replies': '' }
+
+def listing(children):
+    return {'kind': 'Listing', 'data': {'children': children}}
+
+def deep_tree(depth, seed=0):
+    """One chain of depth comments, each the only reply of the previous one ( a long back-and-forth )."""
+    rnd = random.Random(seed)
+    root = node = None
+    for i in range(depth):
+        data = comment(rnd, i, f"t1_c{i - 1:x}" if i else "t3_post", i)
+        item = {'kind': 't1', 'data': data}
+        if node is None:
+            root = item
+        else:
+            node['data']['replies'] = listing([item])
+        node = item
+    node['data']['replies'] = listing([{'kind': 'more', 'data': {'children': [], 'parent_id': f"t1_c{depth - 1:x}", 'depth': depth}}])
+    return [root]
+
+def wide_tree(comments, fanout=8, seed=0):
+    """About comments comments, every comment has up to fanout replies ( a busy thread ), plus 'more' stubs."""
+    rnd = random.Random(seed)
+    roots = []
+    level = [(None, roots)]
+    i = 0
+    while i < comments:
+        next_level = []
+        for parent, children in level:
+            for _ in range(fanout):
+                if i >= comments:
+                    break
+                depth = 0 if parent is None else parent['depth'] + 1
+                data  = comment(rnd, i, f"t1_{parent['id']}" if parent else "t3_post", depth)
+                replies = []
+                data['replies'] = listing(replies)
+                children.append({'kind': 't1', 'data': data})
+                next_level.append((data, replies))
+                i += 1
+            if parent is not None:
+                children.append({'kind': 'more', 'data': {'children': [f"m{i:x}"], 'parent_id': f"t1_{parent['id']}", 'depth': depth}})
+        level = next_level
+    return roots
+
+def measure(fn, repeat):
+    """Best wall time over repeat runs, then the tracemalloc peak of one more run."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, best, peak
+
+def compare(name, children, repeat):
+    # BEFORE: ONE DICT PER COMMENT, THEN THE DataFrame WRITTEN BY append_csv
+    def before():
+        more = {'children': [], 'continue': []}
+        return recursive_get_comment(children, "post", more=more), more
+
+    def before_frame():
+        return frame(recursive_get_comment(children, "post", more={'children': [], 'continue': []}), COMMENT_FIELDS)
+
+    # AFTER ( main.py ): COLUMN LISTS FROM THE WALK TO THE DataFrame
+    def after():
+        more = {'children': [], 'continue': []}
+        return flatten_comments(children, "post", more=more).table(columns=COMMENT_FIELDS), more
+
+    def after_frame():
+        return frame(flatten_comments(children, "post", more={'children': [], 'continue': []}).table(columns=COMMENT_FIELDS), COMMENT_FIELDS)
+
+    (table, more), t_after, m_after = measure(after, repeat)
+    _, t_after_frame, m_after_frame = measure(after_frame, repeat)
+    count = len(table['reddit_id'])
+    try:
+        (ref_rows, ref_more), t_before, m_before = measure(before, repeat)
+        _, t_before_frame, m_before_frame = measure(before_frame, repeat)
+        # SAME ROWS, SAME ORDER, SAME 'more' STUBS
+        rows = flatten_comments(children, "post", more={'children': [], 'continue': []}).rows()
+        assert rows == ref_rows and more == ref_more, f"{name}: flattened rows differ"
+        before_line       = f"{count / t_before:>10.0f} rows/s  peak {m_before / 1e6:7.1f} MB"
+        before_frame_line = f"{count / t_before_frame:>10.0f} rows/s  peak {m_before_frame / 1e6:7.1f} MB"
+    except RecursionError:
+        before_line = before_frame_line = "RecursionError"
+
+    print(f"{name}: {count} comments")
+    print(f"  recursive get_comment            : {before_line}")
+    print(f"  recursive get_comment + frame()  : {before_frame_line}")
+    print(f"  flatten_comments + table()       : {count / t_after:>10.0f} rows/s  peak {m_after / 1e6:7.1f} MB")
+    print(f"  flatten_comments + frame()       : {count / t_after_frame:>10.0f} rows/s  peak {m_after_frame / 1e6:7.1f} MB")
+
+def compare_decode(name, children, repeat):
+    print(f"{name}: response body")
+    body = json.dumps([listing([]), listing(children)]).encode()
+    decoders = [("json", json.loads)] + ([("orjson", orjson.loads)] if orjson is not None else [])
+    for decoder, loads in decoders:
+        _, seconds, peak = measure(lambda: loads(body), repeat)
+        print(f"  decode {decoder:<6} {len(body) / 1e6:6.1f} MB body : {len(body) / 1e6 / seconds:>8.1f} MB/s   peak {peak / 1e6:7.1f} MB")
+    if orjson is None:
+        print("  decode orjson : not installed")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--comments", type=int, default=50000)
+    parser.add_argument("--depth", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # PER COMMENT LOG LINES OFF, AS WHEN THE LOG LEVEL IS ABOVE INFO
+    logger.setLevel(logging.WARNING)
+
+    wide = wide_tree(args.comments)
+    deep = deep_tree(args.depth)
+    # THE FIXTURE TREES ARE NOT RESCANNED BY EVERY GC PASS OF THE MEASURED RUNS
+    gc.collect()
+    gc.freeze()
+
+    compare("wide tree ( fanout 8 )", wide, args.repeat)
+    compare_decode("wide tree", wide, args.repeat)
+    compare(f"deep tree ( depth {min(args.depth, 500)} )", deep_tree(min(args.depth, 500)), args.repeat)
+    compare(f"deep tree ( depth {args.depth} )", deep, args.repeat)
+
+if __name__ == "__main__":
+    main()
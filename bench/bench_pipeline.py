@@ -0,0 +1,237 @@
+"""
+END-TO-END BENCHMARK AGAINST THE LOCAL REDDIT STAND-IN ( bench/stub_server.py ), NO NETWORK, NO RATE LIMIT WAITS
+FOR EVERY CORPUS SIZE, IN A FRESH TEMP FOLDER:
+  api     fetch_post + fetct_comment OF ONE SUBREDDIT ( IN A CHILD PROCESS )
+  extract main.py OVER ALL SUBREDDITS
+  clean   clean_data.py OVER THE EXTRACTED FILES
+REPORTS requests/s, rows/s, PEAK RSS AND THE STAGE TIMES OF THE REPORT "metrics", SAVED AS JSON TO COMPARE RUNS
+Usage: python bench/bench_pipeline.py --sizes 20,100,400 [--subreddits 2] [--comments 30] [--depth 40] [--more]
+                                      [--latency 0.01] [--rate-429 0.05] [--engine async] [--baseline data/bench/old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+# RUN FROM ANYWHERE, THE SCRIPTS AND utils ARE LOADED FROM THE REPO ROOT
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stub_server import StubServer
+
+
+def bench_config(base_url, args):
+    """config.yaml of the repo, pointed at the stand-in, without request budget, cache or 'more' limits."""
+    with open(os.path.join(ROOT, "config.yaml")) as file:
+        config = yaml.safe_load(file)
+
+    reddit = config["reddit"]
+    for key, value in reddit.items():
+        if isinstance(value, str) and value.startswith("http"):
+            reddit[key] = re.sub(r"^https?://[^/]+", base_url, value)
+    reddit.update({ "requests_per_second": 100000, "max_requests_per_second": 100000,
+                    "backoff_base": 0.05, "engine": args.engine, "max_pages": 1000, "max_posts": None,
+                    "dedup_index": False })
+    config["cache"]["enabled"]       = False
+    config["incremental"]["enabled"] = False
+    config["metrics"]["enabled"]     = True
+    config["logging"]["queue"]       = True
+    return config
+
+def run_stage(command, cwd, log_name):
+    """
+    Runs a stage in a child process, RETURNS ( exit code, wall seconds, peak RSS MB )
+    THE RSS IS THE LARGEST OF THE STAGE PROCESS AND ITS OWN CHILD PROCESSES ( wait4 )
+    """
+    with open(os.path.join(cwd, log_name), "w") as log:
+        start = time.perf_counter()
+        proc  = subprocess.Popen(command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+        wall  = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, wall, round(usage.ru_maxrss / 1024, 1)
+
+def stage_times(summaries):
+    """Total seconds per span over the "metrics" sections of a report."""
+    totals = {}
+    for summary in summaries:
+        for name, span in summary.get("spans", {}).items():
+            totals[name] = round(totals.get(name, 0) + span["total_s"], 4)
+    return totals
+
+def counter(summaries, name):
+    return sum(summary.get("counters", {}).get(name, 0) for summary in summaries)
+
+def api_stage(subreddit, output_path):
+    """
+    CHILD PROCESS OF THE api STAGE ( cwd = THE BENCH FOLDER ): TIMES fetch_post AND fetct_comment, WRITES THEM TO output_path
+    """
+    sys.path.insert(0, ROOT)
+    from utils.extract import fetch_post, fetct_comment
+
+    request_log = []
+    start    = time.perf_counter()
+    posts    = fetch_post(1, subreddit, request_log)
+    t_posts  = time.perf_counter() - start
+    comments = fetct_comment(1, subreddit, posts, request_log)
+    wall     = time.perf_counter() - start
+    with open(output_path, "w") as file:
+        json.dump({ "posts": len(posts), "comments": len(comments), "requests": len(request_log),
+                    "fetch_post_s": round(t_posts, 4), "fetct_comment_s": round(wall - t_posts, 4),
+                    "wall_s": round(wall, 4),
+                    "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) }, file)
+
+def bench_size(server, posts, args):
+    """All stages for one corpus size, returns its result entry."""
+    server.settings["posts"] = posts
+    result = {"posts_per_subreddit": posts, "subreddits": args.subreddits}
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as cwd:
+        for folder in ("data/in", "data/out", "data/state", "data/report", "data/cleaned", "logs"):
+            os.makedirs(os.path.join(cwd, folder), exist_ok=True)
+        with open(os.path.join(cwd, "config.yaml"), "w") as file:
+            yaml.safe_dump(bench_config(server.base_url, args), file, sort_keys=False)
+        subreddits = [f"bench{i}" for i in range(args.subreddits)]
+        with open(os.path.join(cwd, "data/in/in.csv"), "w") as file:
+            file.write("ID,SUBREDDIT,SRC,DES\n")
+            for i, subreddit in enumerate(subreddits):
+                file.write(f"{i + 1},{subreddit},{server.base_url}/r/{subreddit}.json,bench\n")
+
+        # api: fetch_post / fetct_comment OF ONE SUBREDDIT
+        server.reset_stats()
+        out_path = os.path.join(cwd, "api.json")
+        code, wall, rss = run_stage([sys.executable, os.path.abspath(__file__), "--api-stage", subreddits[0],
+                                     "--api-output", out_path], cwd, "api.log")
+        if code == 0 and os.path.exists(out_path):
+            with open(out_path) as file:
+                api = json.load(file)
+            rows = api["posts"] + api["comments"]
+            result["api"] = dict(api, requests_per_s = round(api["requests"] / api["wall_s"], 1),
+                                 rows_per_s = round(rows / api["wall_s"], 1), status_429 = server.stats["status_429"])
+        else:
+            result["api"] = {"error": f"exit code {code}, see api.log"}
+
+        # extract: main.py
+        server.reset_stats()
+        code, wall, rss = run_stage([sys.executable, os.path.join(ROOT, "main.py")], cwd, "extract.log")
+        with open(os.path.join(cwd, "data/report/report.json")) as file:
+            summaries = [status.get("metrics", {}) for status in json.load(file)]
+        rows = counter(summaries, "rows.written")
+        result["extract"] = { "exit_code": code, "wall_s": round(wall, 3), "peak_rss_mb": rss,
+                              "requests": server.stats["requests"], "status_429": server.stats["status_429"],
+                              "mb_served": round(server.stats["bytes"] / 1e6, 2),
+                              "requests_per_s": round(server.stats["requests"] / wall, 1),
+                              "rows": rows, "rows_per_s": round(rows / wall, 1),
+                              "stages_s": stage_times(summaries) }
+
+        # clean: clean_data.py
+        if not args.skip_clean:
+            code, wall, rss = run_stage([sys.executable, os.path.join(ROOT, "clean_data.py")], cwd, "clean.log")
+            summaries = []
+            report_path = os.path.join(cwd, "data/report/data_cleaning_report.json")
+            if os.path.exists(report_path):
+                with open(report_path) as file:
+                    summaries = [json.load(file).get("metrics", {})]
+            rows = counter(summaries, "rows.1_load_data")
+            result["clean"] = { "exit_code": code, "wall_s": round(wall, 3), "peak_rss_mb": rss,
+                                "rows": rows, "rows_per_s": round(rows / wall, 1),
+                                "stages_s": stage_times(summaries) }
+
+        if args.keep_logs:
+            for name in ("api.log", "extract.log", "clean.log"):
+                if os.path.exists(os.path.join(cwd, name)):
+                    os.makedirs(args.keep_logs, exist_ok=True)
+                    os.replace(os.path.join(cwd, name), os.path.join(args.keep_logs, f"{posts}_{name}"))
+    return result
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+def compare(results, baseline):
+    """Prints rows/s of every stage against a previous results file ( same sizes only )."""
+    previous = {entry["posts_per_subreddit"]: entry for entry in baseline.get("results", [])}
+    print(f"vs baseline {baseline.get('git_revision')} ( {baseline.get('created')} )")
+    for entry in results:
+        old = previous.get(entry["posts_per_subreddit"])
+        if old is None:
+            continue
+        for stage in ("api", "extract", "clean"):
+            new_rate = entry.get(stage, {}).get("rows_per_s")
+            old_rate = old.get(stage, {}).get("rows_per_s")
+            if new_rate and old_rate:
+                print(f"  {entry['posts_per_subreddit']:>6} posts  {stage:<8} {old_rate:>10.1f} -> {new_rate:>10.1f} rows/s  x{new_rate / old_rate:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="20,100,400", help="posts per subreddit, one run per size")
+    parser.add_argument("--subreddits", type=int, default=2)
+    parser.add_argument("--comments", type=int, default=30)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=0)
+    parser.add_argument("--more", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--recorded", default=None, help="folder of recorded responses served before the synthetic ones")
+    parser.add_argument("--engine", default="serial", choices=["serial", "async"])
+    parser.add_argument("--skip-clean", action="store_true")
+    parser.add_argument("--output", default=None, help="results JSON ( default data/bench/pipeline_<time>.json )")
+    parser.add_argument("--baseline", default=None, help="earlier results JSON to compare with")
+    parser.add_argument("--keep-logs", default=None, help="folder to keep the stage logs in")
+    parser.add_argument("--api-stage", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--api-output", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # CHILD PROCESS OF THE api STAGE
+    if args.api_stage:
+        api_stage(args.api_stage, args.api_output)
+        return
+
+    server = StubServer( comments=args.comments, fanout=args.fanout, depth=args.depth, more=args.more,
+                         latency=args.latency, rate_429=args.rate_429, recorded=args.recorded )
+    server.start()
+    results = []
+    try:
+        for posts in [int(size) for size in args.sizes.split(",")]:
+            entry = bench_size(server, posts, args)
+            results.append(entry)
+            line = f"{posts:>6} posts x {args.subreddits}"
+            for stage in ("api", "extract", "clean"):
+                if "rows_per_s" in entry.get(stage, {}):
+                    line += f"  {stage}: {entry[stage]['rows_per_s']:>9.1f} rows/s"
+                    if "requests_per_s" in entry[stage]:
+                        line += f" {entry[stage]['requests_per_s']:>7.1f} req/s"
+                    line += f" {entry[stage]['peak_rss_mb']:>6.1f} MB"
+            print(line)
+    finally:
+        server.stop()
+
+    output = { "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+               "git_revision": git_revision(),
+               "python": platform.python_version(),
+               "platform": platform.platform(),
+               "cpu_count": os.cpu_count(),
+               "settings": { key: value for key, value in vars(args).items() if not key.startswith("api_") },
+               "results": results }
+
+    output_path = args.output or os.path.join(ROOT, "data", "bench", f"pipeline_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as file:
+        json.dump(output, file, indent=4)
+    print(f"results written to {output_path}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(results, json.load(file))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+MEMORY REPORT: EXTRACTED ROWS AS A PLAIN DataFrame ( OBJECT / float64, datetime STRING ) VS THE SHARED SCHEMA
+Usage: python bench/bench_schema.py --rows 500000 [--output memory_report.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+# RUN FROM ANYWHERE, IMPORT utils FROM THE REPO ROOT
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.schema import OUTPUT_COLUMNS, frame, memory_report
+
+WORDS = ("my son was diagnosed with dyslexia last year and the school still does not "
+         "offer any support reading writing spelling tools like Grammarly really help").split()
+
+def synthetic_rows(rows, seed=0):
+    """Rows shaped like get_post / extract_comment_data output: one post then its comments."""
+    rnd = random.Random(seed)
+    data = []
+    post_id = None
+    for i in range(rows):
+        created = 1700000000.0 + i
+        text    = " ".join(rnd.choices(WORDS, k=rnd.randint(3, 60)))
+        author  = f"user{rnd.randrange(2000)}"
+        if i % 20 == 0:
+            post_id = f"p{i:x}"
+            data.append({ 'csv_id': 61205, 'kind': 't3', 'kind_desc': 'post', 'reddit_id': post_id,
+                          'title': "title of the post", 'author': author, 'timestamp_utc': created,
+                          'datetime': datetime.fromtimestamp(created).strftime('%Y-%m-%d %H:%M:%S'),
+                          'text': text, 'score': rnd.randrange(500), 'num_comments': rnd.randrange(100) })
+        else:
+            data.append({ 'kind_desc': 'comment', 'reddit_id': f"c{i:x}", 'post_id': post_id,
+                          'parent_id': f"t3_{post_id}", 'author': author, 'timestamp_utc': created,
+                          'datetime': datetime.fromtimestamp(created).strftime('%Y-%m-%d %H:%M:%S'),
+                          'text': text, 'score': rnd.randrange(50), 'depth': rnd.randrange(6) })
+    return data
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    rows   = synthetic_rows(args.rows)
+    before = pd.DataFrame(rows, columns=OUTPUT_COLUMNS[:7] + ['datetime'] + OUTPUT_COLUMNS[7:])
+    after  = frame(rows)
+    report = memory_report(before, after)
+
+    print(f"rows: {report['rows']}  before: {report['before_mb']} MB  after: {report['after_mb']} MB  saved: {report['saved_pct']}%")
+    for column, info in report["columns"].items():
+        print(f"  {column:<14} {info['dtype_before']:>8} -> {str(info['dtype_after']):<9} {info['before_mb']:>9.2f} MB -> {info['after_mb']:>8.2f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+BENCHMARK: STARTUP TIME OF cli.py ( NEW PROCESS UNTIL THE STAGE COULD START WORKING ) AGAINST A BUDGET
+EVERY COMMAND RUNS --repeat TIMES IN A FRESH PYTHON, THE MEDIAN IS COMPARED WITH ITS BUDGET
+EXIT CODE 1 WHEN A COMMAND IS OVER BUDGET, --importtime LISTS ITS SLOWEST IMPORTS
+Usage: python bench/bench_startup.py [--repeat 5] [--importtime] [--budget-scale 1.5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# RUN FROM ANYWHERE, THE COMMANDS RUN IN THE REPO ROOT ( ./config.yaml )
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ( NAME, ARGUMENTS OF python, BUDGET ms )
+# --help LOADS NOTHING BUT argparse, A STAGE LOADS config.yaml AND ITS OWN MODULES ONLY
+COMMANDS = [ ("cli.py --help",         ["cli.py", "--help"],             150),
+             ("cli.py extract --check", ["cli.py", "extract", "--check"], 1500),
+             ("cli.py refresh --check", ["cli.py", "refresh", "--check"], 1500),
+             ("cli.py clean --check",   ["cli.py", "clean", "--check"],   1500) ]
+
+# spaCy IS OPTIONAL ( requirements-optional.txt ), ner IS ONLY MEASURED WHEN ITS --check PASSES ( spaCy AND THE MODEL INSTALLED )
+NER_COMMAND = ("cli.py ner --check", ["cli.py", "ner", "--check"], 4000)
+
+
+def run_ms(arguments):
+    """Wall time ( ms ) of one python process, None when it fails."""
+    start = time.perf_counter()
+    proc  = subprocess.run([sys.executable] + arguments, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if proc.returncode != 0:
+        return None
+    return (time.perf_counter() - start) * 1000
+
+def slowest_imports(arguments, top=10):
+    """[ ( cumulative ms, module ), ... ] OF python -X importtime, SLOWEST FIRST"""
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + arguments, cwd=ROOT,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):     # TOP LEVEL IMPORTS ONLY
+            imports.append((int(cumulative) / 1000, name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true", help="list the slowest imports of every command")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiplies every budget ( slow machines )")
+    args = parser.parse_args()
+
+    commands = list(COMMANDS)
+    if run_ms(NER_COMMAND[1]) is not None:
+        commands.append(NER_COMMAND)
+
+    # THE STAGE MODULES IMPORTED DIRECTLY, FOR COMPARISON
+    legacy = [("import clean_data", ["-c", "import clean_data"]), ("import main", ["-c", "import main"])]
+
+    over = 0
+    for name, arguments, budget in commands:
+        budget *= args.budget_scale
+        runs = [run_ms(arguments) for _ in range(args.repeat)]
+        if None in runs:
+            print(f"{name:<26} FAILED")
+            over += 1
+            continue
+        median = statistics.median(runs)
+        status = "ok" if median <= budget else "OVER BUDGET"
+        over  += median > budget
+        print(f"{name:<26} {median:>8.0f} ms   budget {budget:>6.0f} ms   {status}")
+        if args.importtime or median > budget:
+            for cumulative, module in slowest_imports(arguments):
+                print(f"    {cumulative:>8.1f} ms  {module}")
+
+    for name, arguments in legacy:
+        runs = [run_ms(arguments) for _ in range(args.repeat)]
+        if None not in runs:
+            print(f"{name:<26} {statistics.median(runs):>8.0f} ms   ( reference )")
+
+    sys.exit(1 if over else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+BENCHMARK: LOADING THE CLEANED CORPUS FROM CSV VS THE PARQUET DATASET
+CHECKS THE DATASET PUBLISHED FROM THE CSV ( CHUNKED / SHARD CLEANING ) EQUALS THE ONE WRITTEN FROM THE FRAME ( WHOLE-FILE CLEANING )
+Usage: python bench/bench_storage.py --rows 500000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# RUN FROM ANYWHERE, IMPORT utils FROM THE REPO ROOT
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.storage import normalize, write_dataset, read_dataset, publish_csv
+
+WORDS = ("son diagnosed dyslexia year school support reading writing spelling tools "
+         "grammarly help tired better teachers parents kids adults audiobooks").split()
+
+def synthetic_corpus(rows, subreddits=8, seed=0):
+    """Cleaned-like rows: one post every 10 rows, the rest comments, a few texts empty ( only stop words ) or "NA"."""
+    rnd = random.Random(seed)
+    data = []
+    for i in range(rows):
+        post = i % 10 == 0
+        words = rnd.choices(WORDS, k=rnd.randint(3, 60))
+        text  = "" if i % 97 == 1 else "NA" if i % 89 == 1 else " ".join(words)
+        data.append({
+            "subreddit": f"sub{i % subreddits}",
+            "csv_id": i % subreddits + 1,
+            "kind": "t3" if post else "t1",
+            "kind_desc": "post" if post else "comment",
+            "reddit_id": f"id{i}",
+            "title": "title words here" if post else None,
+            "author": f"user{rnd.randrange(5000)}",
+            "timestamp_utc": 1700000000.0 + i,
+            "text": text,
+            "score": rnd.randrange(100),
+            "num_comments": rnd.randrange(50) if post else None,
+            "post_id": None if post else f"id{i - i % 10}",
+            "parent_id": None if post else f"t3_id{i - i % 10}",
+            "depth": None if post else rnd.randrange(4),
+            "word_count": len(words),
+        })
+    return pd.DataFrame(data)
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+def folder_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    args = parser.parse_args()
+
+    df = normalize(synthetic_corpus(args.rows))
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "cleaned_data.csv")
+        root     = os.path.join(tmp, "cleaned")
+        df.to_csv(csv_path, index=False)
+        write_dataset(df, root)
+
+        full_csv, t_csv  = timed(lambda: pd.read_csv(csv_path))
+        full_pq,  t_pq   = timed(lambda: read_dataset(root))
+        cols,     t_cols = timed(lambda: read_dataset(root, columns=["text", "word_count"]))
+        posts,    t_post = timed(lambda: read_dataset(root, columns=["reddit_id", "num_comments"], filters=[("kind", "==", "t3")]))
+
+        # SAME ROWS WHICHEVER WAY THEY ARE LOADED
+        assert len(full_csv) == len(full_pq) == len(cols) == args.rows
+        assert len(posts) == int((df["kind"] == "t3").sum())
+
+        # SAME DATASET THROUGH THE CSV AS FROM THE FRAME ( EMPTY / "NA" TEXT INCLUDED )
+        via_csv = os.path.join(tmp, "via_csv")
+        ok, _ = publish_csv(csv_path, via_csv, chunk_size=args.rows // 7 + 1)
+        by_id = lambda frame: frame.sort_values("reddit_id").reset_index(drop=True)
+        assert ok and by_id(read_dataset(via_csv)).equals(by_id(full_pq)), "parquet published from the csv differs"
+
+        print(f"rows: {args.rows}  csv: {os.path.getsize(csv_path) / 1e6:.1f} MB  parquet: {folder_size(root) / 1e6:.1f} MB")
+        print(f"csv, all columns            : {t_csv:.3f}s")
+        print(f"parquet, all columns        : {t_pq:.3f}s  x{t_csv / t_pq:.1f}")
+        print(f"parquet, text + word_count  : {t_cols:.3f}s  x{t_csv / t_cols:.1f}")
+        print(f"parquet, posts ( kind t3 )  : {t_post:.3f}s  x{t_csv / t_post:.1f}")
+
+if __name__ == "__main__":
+    main()
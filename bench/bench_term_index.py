@@ -0,0 +1,89 @@
+"""
+BENCHMARK: TOP-N TERMS AND WORD COUNT DISTRIBUTIONS, NOTEBOOK RESCAN OF THE CLEANED TEXT VS THE TERM INDEX
+Usage: python bench/bench_term_index.py --rows 500000 [--subreddits 5] [--top 30]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import pandas as pd
+
+# RUN FROM ANYWHERE, IMPORT utils FROM THE REPO ROOT
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.term_index import TermIndex
+from gensim.parsing.preprocessing import STOPWORDS # STOP WORD LIST
+
+WORDS = ("son diagnosed dyslexia year school support reading writing spelling tools grammarly help "
+         "teachers parents kids adults audiobooks tired better tutor phonics exam letters").split()
+
+def synthetic_cleaned(rows, subreddits, seed=0):
+    """Cleaned rows ( lower case, no punctuation, no stopwords ) of subreddits over two years."""
+    rnd = random.Random(seed)
+    texts = [" ".join(rnd.choices(WORDS, k=rnd.randint(1, 60))) for _ in range(rows)]
+    return pd.DataFrame({ "reddit_id": [f"r{i:x}" for i in range(rows)],
+                          "subreddit": [f"sub{rnd.randrange(subreddits)}" for _ in range(rows)],
+                          "kind": [rnd.choice(["t3", "t1", "t1", "t1"]) for _ in range(rows)],
+                          "timestamp_utc": [1672531200.0 + rnd.randrange(2 * 365 * 86400) for _ in range(rows)],
+                          "text": texts,
+                          "word_count": [len(text.split()) * 2 for text in texts] })
+
+def notebook_top_terms(df, n):
+    """The notebook cell: preprocess, join, split, filter stopwords, most_common."""
+    def preprocess(text):
+        text = str(text).lower()
+        return re.sub(r'[^\w\s]', '', text)
+    stopwords = set(STOPWORDS)
+    all_words = ' '.join(df['text'].apply(preprocess)).split()
+    return Counter(w for w in all_words if w not in stopwords).most_common(n)
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--subreddits", type=int, default=5)
+    parser.add_argument("--top", type=int, default=30)
+    args = parser.parse_args()
+
+    df = synthetic_cleaned(args.rows, args.subreddits)
+    with tempfile.TemporaryDirectory() as folder:
+        index = TermIndex(os.path.join(folder, "terms.sqlite"))
+        start = time.perf_counter()
+        for subreddit, rows in df.groupby("subreddit"):
+            index.add(subreddit, subreddit, rows)
+        index.save()
+        print(f"{args.rows} rows, index built in {time.perf_counter() - start:.2f} s ( once, during cleaning )")
+
+        one = df[(df["subreddit"] == "sub0") & (df["kind"] == "t1")]
+        cases = [ ("top terms, whole corpus",
+                   lambda: notebook_top_terms(df, args.top),
+                   lambda: index.top_terms(args.top)),
+                  ("top terms, sub0 comments",
+                   lambda: notebook_top_terms(one, args.top),
+                   lambda: index.top_terms(args.top, subreddit="sub0", kind="t1")),
+                  ("word counts, sub0 2024",
+                   lambda: df.loc[(df["subreddit"] == "sub0") & (pd.to_datetime(df["timestamp_utc"], unit="s").dt.year == 2024), "word_count"].describe(),
+                   lambda: index.word_counts(subreddit="sub0", start="2024-01", end="2024-12")["word_count"].describe()) ]
+
+        for name, rescan, indexed in cases:
+            expected, t_rescan = timed(rescan)
+            got, t_index       = timed(indexed)
+            if isinstance(expected, list):
+                # SAME COUNTS ( TIES MAY BE ORDERED DIFFERENTLY )
+                assert sorted(dict(expected).values()) == sorted(dict(got).values()), f"{name}: counts differ"
+            print(f"{name:<28} rescan {t_rescan * 1000:>9.1f} ms   index {t_index * 1000:>8.1f} ms   x{t_rescan / t_index:,.0f}")
+        index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+LOCAL REDDIT STAND-IN FOR THE BENCHMARKS: SERVES SYNTHETIC ( OR RECORDED ) JSON AT THE PATHS OF config.yaml
+  /r/{SUBREDDIT}.json, /r/{SUBREDDIT}/new.json   LISTING PAGES ( limit / after )
+  /comments/{POST_ID}.json                       POST + COMMENT TREE ( WIDE, DEEP CHAIN, 'more' STUBS )
+  /comments/{POST_ID}/_/{COMMENT_ID}.json        CONTINUE-THIS-THREAD PAGE
+  /api/morechildren.json                         COMMENTS HIDDEN BEHIND A 'more' STUB
+  /api/info.json                                 FRESH score / num_comments
+Usage: python bench/stub_server.py --port 8765 --posts 200 --comments 50 --depth 300 --more --latency 0.02 --rate-429 0.05
+       ( THEN POINT THE reddit URLS OF config.yaml AT http://127.0.0.1:8765 )
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# SYNTHETIC CONTENT SETTINGS, EDITABLE WHILE THE SERVER RUNS ( StubServer.settings )
+DEFAULTS = { "posts": 100,          # POSTS PER SUBREDDIT
+             "comments": 30,        # COMMENTS PER POST ( WIDE TREE )
+             "fanout": 4,           # REPLIES PER COMMENT IN THE WIDE TREE
+             "depth": 0,            # EXTRA CHAIN OF NESTED REPLIES UNDER THE FIRST COMMENT ( DEEP TREE )
+             "more": False,         # ADD A morechildren STUB AND A CONTINUE-THREAD STUB TO EVERY TREE
+             "more_children": 20,   # COMMENT IDS BEHIND THE morechildren STUB
+             "latency": 0.0,        # SECONDS ADDED TO EVERY RESPONSE
+             "rate_429": 0.0,       # FRACTION OF REQUESTS ANSWERED WITH 429
+             "retry_after": 0.05,   # Retry-After OF THE 429 RESPONSES
+             "recorded": None,      # FOLDER OF RECORDED RESPONSES ( {folder}/{url path} ), SERVED BEFORE SYNTHETIC ONES
+             "seed": 0 }
+
+WORDS = ("my son was diagnosed with dyslexia last year and the school still does not "
+         "offer any support reading writing spelling tools like Grammarly really help "
+         "teachers parents kids adults audiobooks tired better https://www.example.com").split()
+
+
+def text(rnd, low=3, high=40):
+    return " ".join(rnd.choices(WORDS, k=rnd.randint(low, high)))
+
+def listing(children, after=None):
+    return {"kind": "Listing", "data": {"after": after, "children": children}}
+
+def post_id(subreddit, i):
+    return f"{subreddit.lower()}p{i}"
+
+def post_thing(subreddit, i, settings):
+    rnd = random.Random(f"{settings['seed']}-{subreddit}-{i}")
+    return { "kind": "t3",
+             "data": { "id": post_id(subreddit, i), "title": text(rnd, 3, 12), "author": f"user{rnd.randrange(500)}",
+                       "created_utc": 1700000000.0 + i * 60, "selftext": text(rnd), "score": rnd.randrange(1000),
+                       "num_comments": settings["comments"] + settings["depth"], "stickied": False } }
+
+def comment_thing(settings, cid, parent, depth, replies=None):
+    """One t1 thing, its content depends on the seed and the comment id only ( same on every page it appears )."""
+    rnd  = random.Random(f"{settings['seed']}-{cid}")
+    data = { "id": cid, "parent_id": parent, "author": f"user{rnd.randrange(500)}",
+             "created_utc": 1700000000.0 + rnd.randrange(10 ** 6), "body": text(rnd),
+             "score": rnd.randrange(100), "depth": depth, "replies": listing(replies) if replies else "" }
+    return {"kind": "t1", "data": data}
+
+def more_thing(parent, depth, children):
+    return {"kind": "more", "data": {"count": len(children), "id": "_", "parent_id": parent, "depth": depth, "children": children}}
+
+# NESTED REPLIES PER PAGE, DEEPER ONES ARE BEHIND A CONTINUE-THREAD STUB ( AS ON reddit.com )
+PAGE_DEPTH = 8
+
+def chain(pid, settings, first, depth):
+    """
+    Deep chain nodes first.. as nested things, the first one at `depth`.
+    AT MOST PAGE_DEPTH NODES, THEN A CONTINUE-THREAD STUB WHEN THE CHAIN GOES ON
+    """
+    last = min(settings["depth"], first + PAGE_DEPTH)
+    tail = []
+    if last < settings["depth"]:
+        tail = [more_thing(f"t1_{pid}d{last - 1}", depth + last - first, [])]
+    for d in reversed(range(first, last)):
+        parent = f"t1_{pid}d{d - 1}" if d else f"t1_{pid}c0"
+        tail = [comment_thing(settings, f"{pid}d{d}", parent, depth + d - first, tail)]
+    return tail
+
+def comment_tree(pid, settings):
+    """Root comments of a post: a wide tree of `comments` comments, a deep chain of `depth` replies, optional 'more' stubs."""
+    roots = []
+
+    # WIDE TREE, BREADTH FIRST, fanout REPLIES PER COMMENT
+    level = [(f"t3_{pid}", roots, 0)]
+    k = 0
+    while k < settings["comments"] and level:
+        next_level = []
+        for parent, children, depth in level:
+            for _ in range(settings["fanout"]):
+                if k >= settings["comments"]:
+                    break
+                replies = []
+                item = comment_thing(settings, f"{pid}c{k}", parent, depth, replies)
+                item["data"]["replies"] = listing(replies)
+                children.append(item)
+                next_level.append((f"t1_{pid}c{k}", replies, depth + 1))
+                k += 1
+        level = next_level
+
+    # DEEP CHAIN UNDER THE FIRST ROOT COMMENT
+    if settings["depth"] and roots:
+        roots[0]["data"]["replies"]["data"]["children"].extend(chain(pid, settings, 0, 1))
+
+    # morechildren STUB AT THE ROOT, CONTINUE-THREAD STUB UNDER THE FIRST COMMENT
+    if settings["more"]:
+        roots.append(more_thing(f"t3_{pid}", 0, [f"{pid}m{i}" for i in range(settings["more_children"])]))
+        if not settings["depth"] and len(roots) > 1:
+            roots[0]["data"]["replies"]["data"]["children"].append(more_thing(f"t1_{pid}c0", 1, []))
+    return roots
+
+def thread_page(pid, cid, settings):
+    """Continue-thread page: the parent comment at depth 0 and its replies."""
+    match = re.fullmatch(re.escape(pid) + r"d(\d+)", cid)
+    if match and int(match.group(1)) + 1 < settings["depth"]:
+        d       = int(match.group(1))
+        replies = chain(pid, settings, d + 1, 1)
+    else:
+        replies = [comment_thing(settings, f"{cid}r", f"t1_{cid}", 1)]
+    return [listing([]), listing([comment_thing(settings, cid, "t1_parent", 0, replies)])]
+
+
+class StubServer:
+    """
+    Threaded local HTTP server answering like reddit.com from settings ( see DEFAULTS ).
+    stats COUNTS THE REQUESTS PER ENDPOINT, THE 429s AND THE BYTES SENT.
+    Usage: server = StubServer(posts=50, more=True); base_url = server.start(); ...; server.stop()
+    """
+
+    def __init__(self, port: int = 0, **settings):
+        self.settings = dict(DEFAULTS, **settings)
+        self.stats    = {"requests": 0, "status_429": 0, "bytes": 0, "endpoints": {}}
+        self._lock    = threading.Lock()
+        self._rnd     = random.Random(self.settings["seed"])
+        self.httpd    = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread  = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"requests": 0, "status_429": 0, "bytes": 0, "endpoints": {}}
+
+    def _count(self, endpoint, status, size):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"]    += size
+            self.stats["endpoints"][endpoint] = self.stats["endpoints"].get(endpoint, 0) + 1
+            if status == 429:
+                self.stats["status_429"] += 1
+
+    def _throttled(self):
+        with self._lock:
+            return self._rnd.random() < self.settings["rate_429"]
+
+    def respond(self, path, query):
+        """( endpoint, status, body ) OF A GET REQUEST."""
+        settings = self.settings
+
+        recorded = settings.get("recorded")
+        if recorded:
+            file_path = os.path.join(recorded, path.lstrip("/"))
+            if os.path.isfile(file_path):
+                with open(file_path, "rb") as file:
+                    return "recorded", 200, file.read()
+
+        match = re.fullmatch(r"/r/([^/]+?)(?:/new)?\.json", path)
+        if match:
+            subreddit = match.group(1)
+            limit = int(query.get("limit", ["25"])[0])
+            after = query.get("after", [None])[0]
+            start = int(after.rsplit("p", 1)[1]) + 1 if after else 0
+            end   = min(settings["posts"], start + limit)
+            children = [post_thing(subreddit, i, settings) for i in range(start, end)]
+            next_after = f"t3_{post_id(subreddit, end - 1)}" if end < settings["posts"] else None
+            return "listing", 200, listing(children, next_after)
+
+        match = re.fullmatch(r"/comments/([^/]+)/_/([^/]+)\.json", path)
+        if match:
+            pid, cid = match.groups()
+            return "thread", 200, thread_page(pid, cid, settings)
+
+        match = re.fullmatch(r"/comments/([^/.]+)\.json", path)
+        if match:
+            pid = match.group(1)
+            subreddit, i = pid.rsplit("p", 1)
+            return "comments", 200, [listing([post_thing(subreddit, int(i), settings)]), listing(comment_tree(pid, settings))]
+
+        if path == "/api/morechildren.json":
+            pid    = query.get("link_id", ["t3_"])[0][3:]
+            things = []
+            for cid in query.get("children", [""])[0].split(","):
+                if cid:
+                    things.append(comment_thing(settings, cid, f"t3_{pid}", 0))
+            return "morechildren", 200, {"json": {"errors": [], "data": {"things": things}}}
+
+        if path == "/api/info.json":
+            things = []
+            for fullname in query.get("id", [""])[0].split(","):
+                if fullname:
+                    rnd = random.Random(f"{settings['seed']}-info-{fullname}")
+                    data = {"id": fullname[3:], "name": fullname, "score": rnd.randrange(1000)}
+                    if fullname.startswith("t3_"):
+                        data["num_comments"] = settings["comments"] + settings["depth"]
+                    things.append({"kind": fullname[:2], "data": data})
+            return "info", 200, listing(things)
+
+        return "unknown", 404, {"error": 404}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if server.settings["latency"]:
+                    time.sleep(server.settings["latency"])
+                url = urlparse(self.path)
+                if server._throttled():
+                    server._count("throttled", 429, 0)
+                    self.send_response(429)
+                    self.send_header("Retry-After", str(server.settings["retry_after"]))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                endpoint, status, body = server.respond(url.path, parse_qs(url.query))
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+                server._count(endpoint, status, len(body))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local reddit.com stand-in for the benchmarks.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--posts", type=int, default=DEFAULTS["posts"])
+    parser.add_argument("--comments", type=int, default=DEFAULTS["comments"])
+    parser.add_argument("--fanout", type=int, default=DEFAULTS["fanout"])
+    parser.add_argument("--depth", type=int, default=DEFAULTS["depth"])
+    parser.add_argument("--more", action="store_true")
+    parser.add_argument("--latency", type=float, default=DEFAULTS["latency"])
+    parser.add_argument("--rate-429", type=float, default=DEFAULTS["rate_429"])
+    parser.add_argument("--recorded", default=None)
+    args = parser.parse_args()
+
+    server = StubServer( args.port, posts=args.posts, comments=args.comments, fanout=args.fanout, depth=args.depth,
+                         more=args.more, latency=args.latency, rate_429=args.rate_429, recorded=args.recorded )
+    print(f"serving on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
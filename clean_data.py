@@ -1,160 +1,259 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import re
-import json
+import argparse
 import os 
-from utils.file import read_csv, read_yaml, write_json
-from gensim.parsing.preprocessing import STOPWORDS # STOP WORD LIST
-
-# STOP WORDS
-stopwords = set(STOPWORDS)
-
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from utils.file import read_config, write_json, join_csv
+from utils.text import text_process_series, load_stopwords
+from utils.shard_cache import ShardCache
+from utils.schema import DTYPES, read_frame, iter_frames
+from utils.corpus import CorpusStore
+from utils.dedup import SeenIndex
+from utils.term_index import TermIndex, token_counts
+from utils.storage import list_partitions, iter_partition, publish_csv, write_dataset, clear
+from utils import metrics
 # LOGGER
 from utils.logger import get_logger
 logger = get_logger(__name__)
 
 # CONFIGURATION
-config         = read_yaml("./config.yaml")
+config         = read_config()
 http_config    = config[1]["http"]
 cleaning_config= config[1]["cleaning"]
+storage_config = config[1].get("storage", {})
 
-def text_process(text): 
-    text = str(text).lower()            # LOWERCASE TEXT
-    text = re.sub(r'https?://\S+|www\.\S+', '', text) # REMOVE LINKS
-    text = re.sub(r'[^\w\s]', '', text) # REMOVE PUNCTUATION
-    
-    # REMOVE STOPWORDS
-    words = text.split()
-    text = [w for w in words if w not in stopwords] # REMOVE STOPWORDS
-    return " ".join( text )
-
-
-# GET ALL CSV FILES IN OUTPUTFOLDER
-folder_path = './data/out/'
-file_names = [] 
-logger.info(f"-- scanning folder for csv files : {folder_path} --")
-for filename in os.listdir(folder_path):
-    if filename.endswith('.csv'):
-        file_path = os.path.join(folder_path, filename)
-        file_names.append(file_path)
-logger.info(f"-- finished scanning folder, found {len(file_names)} csv files --")
-
-# INITIALIZE REPORT DICTIONARY
-report = { "info": None,
-           "sumary": None,
-           "data": [],
-           "hist": [] }
-
-df_concatenated = []
-for i, file in enumerate(file_names):
-    # 1. INITIALIZE LOG
-    processing_log = []
-    
-    # ************** STEP 1 **************
-
-    # LOAD DATASET
-    df = pd.read_csv( file )
-    posts_total = len(df)
-    # LOG STEP 1: INITIAL LOAD
-    processing_log.append({
-        "step": "1_load_data",
-        "description": "Raw data loaded from CSV",
-        "rows_remaining": len(df),
-        "rows_removed": 0
-    })
-    
-    data_info   = {}
-    config_info = {}
-    
-    if i == 0:
-        logger.info("-- gathering dataset overview information --")
-        # DATASET OVERVIEW
-        attributes     = df.columns.tolist()
-        num_attributes = len(attributes)
-        num_posts      = len(df)
-        
-        config_info                    = cleaning_config
-        config_info["attribute_count"] = num_attributes
-        config_info["attributes"]      = attributes      # NOT INCLUDE TEMPERARY COLUMN "word_count"
-        
-        report["info"] = config_info
-        logger.info(f"-- dataset overview information gathered --")
+corpus_config  = config[1].get("corpus", {})
+
+# STOP WORDS ( gensim LIST, LOADED ON FIRST USE, SEE get_stopwords )
+stopwords = None
+
+def get_stopwords():
+    global stopwords
+    if stopwords is None:
+        stopwords = set(load_stopwords(cleaning_config.get("stopwords_cache", "data/state/stopwords.json")))
+    return stopwords
+
+# PARQUET STORAGE = INPUT IS THE EXTRACT DATASET ( ONE PARTITION PER SUBREDDIT ), OUTPUT THE CLEANED DATASET
+parquet = storage_config.get("format") == "parquet"
+
+# CORPUS SOURCE = INPUT UNITS ARE THE SUBREDDITS OF THE SQLITE CORPUS STORE, NAMED corpus://SUBREDDIT
+CORPUS_PREFIX = "corpus://"
+from_corpus   = cleaning_config.get("source") == "corpus"
+_corpus       = None
+
+def open_corpus():
+    """CORPUS STORE OF THIS PROCESS, OPENED ON FIRST USE"""
+    global _corpus
+    if _corpus is None:
+        _corpus = CorpusStore(corpus_config["path"])
+    return _corpus
+
+def text_process(texts): 
+    """LOWER CASE, REMOVE LINKS, PUNCTUATION AND STOPWORDS ( BATCHED, SEE utils/text.py )"""
+    return text_process_series( texts, 
+                                get_stopwords(), 
+                                workers           = cleaning_config.get("text_workers"),
+                                chunk_size        = cleaning_config.get("text_chunk_size", 20000),
+                                parallel_min_rows = cleaning_config.get("text_parallel_min_rows", 100000) )
+
+
+def list_input_files(folder_path):
+    """ALL CSV FILES IN THE EXTRACTION OUTPUT FOLDER"""
+    file_names = [] 
+    logger.info(f"-- scanning folder for csv files : {folder_path} --")
+    for filename in os.listdir(folder_path):
+        if filename.endswith('.csv'):
+            file_path = os.path.join(folder_path, filename)
+            file_names.append(file_path)
+    logger.info(f"-- finished scanning folder, found {len(file_names)} csv files --")
+    return file_names
+
+def source_subreddit(file):
+    """SUBREDDIT OF AN INPUT UNIT: data/out/out_NAME.csv, root/subreddit=NAME OR corpus://NAME"""
+    if file.startswith(CORPUS_PREFIX):
+        return file[len(CORPUS_PREFIX):]
+    name = os.path.basename(os.path.normpath(file))
+    if name.startswith("subreddit="):
+        return name.split("=", 1)[1]
+    name = name[:-len(".csv")] if name.endswith(".csv") else name
+    return name[len("out_"):] if name.startswith("out_") else name
+
+def new_stats():
+    """PER-FILE COUNTERS, ADDED UP CHUNK BY CHUNK"""
+    return { "post_total": 0,
+             "replies": 0,
+             "post_rmd_short": 0,
+             "post_rmd_author": 0,
+             "post_rmd_duplicate": 0,
+             "count_before": 0,
+             "count_after": 0 }
+
+def clean_chunk(df, stats):
+    
+    """
+    CLEANING STEPS 2 - 4 ON ONE CHUNK ( OR A WHOLE FILE ), COUNTS ARE ADDED TO stats
+    """
     
     # ************** STEP 2 **************
     
     # parent_id COLUMN IN CSV INDICATE STATUS OF EACH DATA ROW
     # parent_id = NULL     = POST
     # parent_id = NOT NULL = REPLY
-    replies   = int(df['parent_id'].notna().sum())     # REPLIES
-    posts     = int(posts_total - replies) # POSTS TITLE
-    reply_pct = round( float((replies / posts_total) * 100 ), 2 )  # REPLIES IN %
-    posts_pct = round(float(100 - reply_pct), 2)                 # POST IN %
-
+    stats["post_total"] += len(df)
+    stats["replies"]    += int(df['parent_id'].notna().sum())     # REPLIES
+    metrics.count("rows.1_load_data", len(df))
+    
     # ADD word_count COLUMN
     # REMOVE POST LENGTH LESS THAN 3 WORDS 
-    logger.info("**")
-    logger.info(f"cleaning dataset : removing short posts and specific authors")
-    
-    df['word_count'] = df['text'].fillna('').apply(lambda x: len(str(x).split()))
-    short_post = df['word_count'] < cleaning_config["word_length"]
-    short_post_count = int(short_post.sum())
-    short_post_pct   = round( float((short_post_count / posts_total) * 100 ), 2 )
-    # ERASE SHORT POSTS
-    df = df[~short_post]
-    
-    processing_log.append({
-        "step": "2_rmd_short_posts",
-        "description": f"Removed posts with fewer than {cleaning_config["word_length"]} words",
-        "rows_remaining": len(df),
-        "rows_removed": int(short_post_count)
-    })
+    with metrics.span("clean.2_rmd_short_posts"):
+        df['word_count'] = df['text'].fillna('').apply(lambda x: len(str(x).split())).astype(DTYPES['word_count'])
+        short_post = df['word_count'] < cleaning_config["word_length"]
+        stats["post_rmd_short"] += int(short_post.sum())
+        # ERASE SHORT POSTS
+        df = df[~short_post]
+    metrics.count("rows.2_rmd_short_posts", len(df))
     
     # ************** STEP 3 **************
     
     # ERASE POSTS FROM SPECIFIC AUTHORS
     # [deleted] = DATA DELETED BY USER
     # [removed] = DATA REMOVED BY MODERATOR
-    post_rm_author     = int(0)
-    post_rm_author_pct = round( float(0), 2 )
     if cleaning_config["author_filter_trigger"]:
-        post_rm_author     = int(df['author'].isin(cleaning_config["author_filter"]).sum())
-        post_rm_author_pct = round( float((post_rm_author / num_posts) * 100 ), 2 )
-        df = df[~df['author'].isin(cleaning_config["author_filter"])] 
+        with metrics.span("clean.3_rmd_author"):
+            rm_author = df['author'].isin(cleaning_config["author_filter"])
+            stats["post_rmd_author"] += int(rm_author.sum())
+            df = df[~rm_author] 
+    metrics.count("rows.3_rmd_author", len(df))
     
-    logger.info(f"removed {short_post_count} short posts with less than {cleaning_config['word_length']} words")
+    # ************** STEP 4 **************
     
-    processing_log.append({
-        "step": "3_rmd_author",
-        "description": f"Removed posts from specific authors ( reddit specific )",
-        "rows_remaining": len(df),
-        "rows_removed": int(post_rm_author)
-    })
+    # LOWER TEXT, REMOVE PUNCTUATION, REMOVE STOP WORDS
+    with metrics.span("clean.4_text_process"):
+        # WORDS BEFORE = word_count OF STEP 2, TOKENS AFTER = SPACES OF THE JOINED WORDS ( NO SECOND SPLIT )
+        stats["count_before"] += int(df['word_count'].sum())
+        df["text"]             = text_process( df["text"] )
+        stats["count_after"]  += int(token_counts(df["text"]).sum())
     
+    return df
+
+def iter_chunks(file, chunk_size=None):
+    """
+    WHOLE FILE WHEN chunk_size IS NOT SET, OTHERWISE FIXED-SIZE CHUNKS
+    ROWS ARE READ WITH THE SHARED DTYPES ( utils/schema.py ) SO EVERY MODE WRITES ITS VALUES BACK THE SAME WAY
+    A FOLDER IS A SUBREDDIT PARTITION OF THE PARQUET DATASET, corpus://SUBREDDIT A SUBREDDIT OF THE CORPUS STORE
+    """
+    if file.startswith(CORPUS_PREFIX):
+        yield from open_corpus().iter_rows( subreddit  = file[len(CORPUS_PREFIX):],
+                                            start      = cleaning_config.get("created_after_utc"),
+                                            end        = cleaning_config.get("created_before_utc"),
+                                            chunk_size = chunk_size )
+        return
+    if os.path.isdir(file):
+        yield from iter_partition( file, chunk_size )
+        return
+    if not chunk_size:
+        yield read_frame( file )
+        return
+    yield from iter_frames( file, chunk_size )
+
+def clean_file(file, emit, chunk_size=None):
     
-    # ************** STEP 4 **************
+    """
+    LOAD AND CLEAN ONE FILE, emit(df) RECEIVES EVERY CLEANED CHUNK
+    RETURNS THE FILE'S COUNTS AND ITS COLUMNS
+    """
     
-    # LOWER TEXT, REMOVE PUNCTUATION, REMOVE STOP WORDS
-    textprocess_count_before = int(df['text'].str.split().str.len().sum())
-    df["text"]        = df["text"].apply( text_process )
-    textprocess_count_after  = int(df['text'].str.split().str.len().sum())
-    
-    print ( textprocess_count_before, " - ", textprocess_count_after )
-    
-    processing_log.append({
-        "step": "4_text_process",
-        "description": f"Lower case text, Removed links, punctuation, stopwords",
-        "rows_remaining": len(df),
-        "rows_removed": 0,
-        "text_process": { 
-            "count_before" : textprocess_count_before, 
-            "count_after"  : textprocess_count_after
-        }
-    })
+    logger.info("**")
+    logger.info(f"cleaning dataset : removing short posts and specific authors")
+    
+    stats   = new_stats()
+    columns = None
+    for n, chunk in enumerate(metrics.timed_iter("clean.1_load_data", iter_chunks(file, chunk_size))):
+        if columns is None:
+            columns = chunk.columns.tolist()
+        cleaned = clean_chunk(chunk, stats)
+        with metrics.span("clean.emit"):
+            emit( cleaned )
+        if chunk_size:
+            logger.info(f"cleaned chunk {n + 1} : {stats['post_total']} rows read from {file}")
+    
+    logger.info(f"removed {stats['post_rmd_short']} short posts with less than {cleaning_config['word_length']} words")
+    logger.debug(f"word count of {file} : {stats['count_before']} before - {stats['count_after']} after cleaning")
+    
+    return stats, columns
 
-    df_concatenated.append(df)
+def file_history(stats):
+    
+    """
+    PROCESSING LOG OF ONE FILE, BUILT FROM ITS COUNTS
+    """
+    
+    rows_loaded   = stats["post_total"]
+    rows_short    = rows_loaded - stats["post_rmd_short"]
+    rows_author   = rows_short - stats["post_rmd_author"]
+    
+    return [
+        # LOG STEP 1: INITIAL LOAD
+        {
+            "step": "1_load_data",
+            "description": "Raw data loaded from CSV",
+            "rows_remaining": rows_loaded,
+            "rows_removed": 0
+        },
+        {
+            "step": "2_rmd_short_posts",
+            "description": f"Removed posts with fewer than {cleaning_config['word_length']} words",
+            "rows_remaining": rows_short,
+            "rows_removed": stats["post_rmd_short"]
+        },
+        {
+            "step": "3_rmd_author",
+            "description": f"Removed posts from specific authors ( reddit specific )",
+            "rows_remaining": rows_author,
+            "rows_removed": stats["post_rmd_author"]
+        },
+        {
+            "step": "4_text_process",
+            "description": f"Lower case text, Removed links, punctuation, stopwords",
+            "rows_remaining": rows_author,
+            "rows_removed": 0,
+            "text_process": { 
+                "count_before" : stats["count_before"], 
+                "count_after"  : stats["count_after"]
+            }
+        },
+        {
+            "step": "5_rmd_duplicates",
+            "description": "Removed rows whose reddit_id was already kept from an earlier file or row",
+            "rows_remaining": rows_author - stats["post_rmd_duplicate"],
+            "rows_removed": stats["post_rmd_duplicate"]
+        }
+    ]
 
-    # REPORT DATA
+def file_data_info(stats, num_posts):
+    
+    """
+    REPORT DATA OF ONE FILE
+    num_posts = ROW COUNT OF THE FIRST FILE ( BASE OF THE AUTHOR FILTER PERCENTAGE )
+    """
+    
+    posts_total = stats["post_total"]
+    replies     = stats["replies"]
+    posts       = int(posts_total - replies) # POSTS TITLE
+    reply_pct   = round( float((replies / posts_total) * 100 ), 2 )  # REPLIES IN %
+    posts_pct   = round(float(100 - reply_pct), 2)                 # POST IN %
+    
+    short_post_count   = stats["post_rmd_short"]
+    short_post_pct     = round( float((short_post_count / posts_total) * 100 ), 2 )
+    post_rm_author     = stats["post_rmd_author"]
+    post_rm_author_pct = round( float(0), 2 )
+    if cleaning_config["author_filter_trigger"]:
+        post_rm_author_pct = round( float((post_rm_author / num_posts) * 100 ), 2 )
+    post_rm_duplicate     = stats["post_rmd_duplicate"]
+    post_rm_duplicate_pct = round( float((post_rm_duplicate / posts_total) * 100 ), 2 )
+    
+    data_info = {}
     data_info["csv_id"]      = "out_DyslexicParents"
     data_info["subreddit"]   = "out_DyslexicParents"
     data_info["post_total"]  = posts_total
@@ -166,56 +265,337 @@ for i, file in enumerate(file_names):
     data_info["post_rmd_short_pct"]  = short_post_pct
     data_info["post_rmd_author"] = post_rm_author
     data_info["post_rmd_author_pct"] = post_rm_author_pct
+    data_info["post_rmd_duplicate"] = post_rm_duplicate
+    data_info["post_rmd_duplicate_pct"] = post_rm_duplicate_pct
+    return data_info
+
+def csv_appender(file_path):
+    """EMIT FUNCTION APPENDING CLEANED CHUNKS TO file_path, THE FIRST CHUNK FIXES THE COLUMN LAYOUT"""
+    out_columns = None
     
-    report["data"].append(data_info)
-    
-    # --- SAVE THE LOG ---
-    report["hist"].append ({ 
-            "file": file,
-            "history": processing_log
-                           })
-    
-    logger.info(f"finished cleaning dataset : {file}")
-    
-logger.info("**")
-
-
-# REPORT SUMMARY
-logger.info("generating cleaning report summary")
-post_total = [] 
-posts = []
-replies = []
-post_rmd_short = []
-post_rmd_author= []
-
-for i, report_data in enumerate(report["data"]):
-    
-   post_total.append(report_data["post_total"])
-   posts.append(report_data["posts"])
-   replies.append(report_data["replies"])
-   post_rmd_short.append(report_data["post_rmd_short"])
-   post_rmd_author.append(report_data["post_rmd_author"])
-
-report["sumary"] = {
-                    "post_total": sum(post_total),
-                    "posts": sum(posts),
-                    "posts_pct": round( (sum(posts) / sum(post_total)) * 100 , 2 ),
-                    "replies": sum(replies),
-                    "replies_pct": round( (sum(replies) / sum(post_total)) * 100 , 2 ),
-                    "post_rmd_short": sum(post_rmd_short),
-                    "post_rmd_short_pct": round( (sum(post_rmd_short) / sum(post_total)) * 100 , 2 ),   
-                    "post_rmd_author": sum(post_rmd_author),
-                    "post_rmd_author_pct": round( (sum(post_rmd_author) / sum(post_total)) * 100 , 2 )
-                   }   
-logger.info("finished generating cleaning report summary")
-
-
-# print ( "report : " , json.dumps(report, indent=4) )
-write_json ( cleaning_config["output_report"], report)
-
-# SAVE TO CSV
-logger.info("exporting cleaned and concatenated dataframe to csv")
-xdf = pd.concat(df_concatenated, ignore_index=True) 
-output_csv = f'{cleaning_config["output_path"]}'
-xdf.to_csv(output_csv, index=False) # EXPORT DF AFTER CLEANING
-logger.info(f"exported cleaned and concatenated dataframe to csv : {output_csv}")
+    def append(df):
+        nonlocal out_columns
+        if out_columns is None:
+            out_columns = df.columns.tolist()
+            df.to_csv(file_path, index=False)
+        else:
+            df.reindex(columns=out_columns).to_csv(file_path, mode='a', index=False, header=False)
+    
+    return append
+
+def _init_file_worker():
+    """Helper: a file worker cleans its text in-process, the pool already uses every core."""
+    cleaning_config["text_workers"] = 1
+    # FORKED WORKERS START WITH A COPY OF THE PARENT'S METRICS, ONLY THEIR OWN SPANS ARE SENT BACK
+    global _file_worker
+    _file_worker = True
+    metrics.run.snapshot(reset = True)
+
+_file_worker = False
+
+def _task_metrics():
+    """Helper: spans / counters recorded by a file worker since its last task, None in the parent process."""
+    return metrics.run.snapshot(reset = True) if _file_worker else None
+
+def clean_file_task(file, chunk_size=None, part_path=None):
+    
+    """
+    FILE WORKER: CLEAN ONE FILE IN A POOL PROCESS
+    part_path SET  = CLEANED CHUNKS ARE WRITTEN TO part_path, RETURNS ( stats, columns, None, METRICS )
+    part_path None = RETURNS ( stats, columns, CLEANED FRAMES, METRICS ) TO THE PARENT
+    METRICS = SNAPSHOT OF THE SPANS / COUNTERS RECORDED BY THE TASK IN A WORKER, MERGED BY THE PARENT ( None WHEN RUN IN THE PARENT )
+    """
+    
+    if part_path is None:
+        frames = []
+        stats, columns = clean_file(file, frames.append, chunk_size)
+        return stats, columns, frames, _task_metrics()
+    
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    stats, columns = clean_file(file, csv_appender(part_path), chunk_size)
+    return stats, columns, None, _task_metrics()
+
+def main(files=None):
+    
+    """
+    CLEAN EVERY INPUT FILE ( OR ONLY files ) INTO THE CLEANED OUTPUT AND WRITE THE CLEANING REPORT
+    files = INPUT FILES / PARTITIONS / corpus://SUBREDDIT TO CLEAN, THE OTHERS KEEP THEIR LAST SHARD ( OUTPUT AND REPORT STAY COMPLETE )
+    """
+    
+    # GET ALL CSV FILES IN OUTPUTFOLDER
+    if from_corpus:
+        file_names = [CORPUS_PREFIX + subreddit for subreddit in open_corpus().subreddits()]
+        logger.info(f"-- found {len(file_names)} subreddits in corpus {corpus_config['path']} --")
+    elif parquet:
+        file_names = list_partitions(storage_config["extract_path"])
+        logger.info(f"-- found {len(file_names)} subreddit partitions in {storage_config['extract_path']} --")
+    else:
+        file_names = list_input_files('./data/out/')
+    
+    # GIVEN FILES, NAMED AS THE FOLDER SCAN NAMES THEM ( SAME SHARD MANIFEST ENTRIES )
+    given = set()
+    if files:
+        folder = os.path.abspath('./data/out/')
+        given  = [os.path.join('./data/out/', os.path.basename(file)) if os.path.dirname(os.path.abspath(file)) == folder else file
+                  for file in files]
+        file_names = file_names + [file for file in given if file not in file_names]
+        given  = set(given)
+        logger.info(f"-- cleaning {len(given)} given files --")
+
+    # INITIALIZE REPORT DICTIONARY
+    report = { "info": None,
+               "sumary": None,
+               "data": [],
+               "hist": [] }
+    
+    # SHARD MODE      = EVERY FILE IS CLEANED INTO ITS OWN SHARD, UNCHANGED FILES REUSE THEIR SHARD
+    # CHUNKED MODE    = EVERY CLEANED CHUNK IS APPENDED STRAIGHT TO THE OUTPUT FILE
+    # WHOLE-FILE MODE = CLEANED FILES ARE CONCATENATED IN MEMORY AND WRITTEN AT THE END
+    chunk_size = cleaning_config.get("chunk_size")
+    output_csv = f'{cleaning_config["output_path"]}'
+    df_concatenated = []
+    
+    # EVERY SETTING THAT CHANGES THE CLEANED ROWS INVALIDATES THE SHARDS AND THE TERM INDEX
+    settings = { "word_length": cleaning_config["word_length"],
+                 "author_filter_trigger": cleaning_config["author_filter_trigger"],
+                 "author_filter": cleaning_config["author_filter"],
+                 "stopwords": sorted(get_stopwords()),
+                 "dtypes": DTYPES }
+    
+    # CORPUS SUBREDDITS HAVE NO FILE TO HASH, THEY ARE CLEANED ON EVERY RUN
+    shard_cache = None
+    if cleaning_config.get("shard_cache") and not from_corpus:
+        shard_cache = ShardCache( cleaning_config.get("shard_path", "data/cleaned/shards"), settings )
+    
+    # TERM INDEX: TERM COUNTS PER SUBREDDIT / kind / PERIOD AND TOKEN COUNTS PER ROW OF THE CLEANED OUTPUT
+    # FILES CLEANED IN THIS RUN ARE INDEXED AGAIN, REUSED SHARDS KEEP THEIR ENTRIES
+    term_index = None
+    if cleaning_config.get("term_index"):
+        term_index = TermIndex( cleaning_config.get("term_index_path", "data/index/terms.sqlite"),
+                                settings,
+                                cleaning_config.get("term_index_period", "month") )
+    
+    emit = csv_appender(output_csv) if chunk_size else df_concatenated.append
+    
+    # GIVEN FILES ONLY: THE OTHERS ARE NOT CLEANED, THEIR LAST SHARD ( EVEN OUTDATED ) GOES TO THE OUTPUT, FILES WITHOUT ONE ARE LEFT OUT
+    if given:
+        kept = [file for file in file_names if file in given or (shard_cache is not None and shard_cache.last(file) is not None)]
+        if len(kept) < len(file_names):
+            logger.warning(f"{len(file_names) - len(kept)} files not given and never cleaned are left out of the output")
+        file_names = kept
+    
+    # DUPLICATE ROWS ( SAME reddit_id ) ACROSS AND WITHIN FILES, THE FIRST ONE IN FILE ORDER IS KEPT
+    # APPLIED IN THIS PROCESS, IN FILE ORDER, SO EVERY MODE DROPS THE SAME ROWS
+    seen       = SeenIndex() if cleaning_config.get("dedupe") else None
+    duplicates = {file: 0 for file in file_names}
+    
+    def unique_rows(df, file):
+        if seen is not None:
+            keep = seen.first_seen(df["reddit_id"], file)
+            duplicates[file] += int((~keep).sum())
+            df = df[keep]
+        if term_index is not None:
+            with metrics.span("clean.6_term_index"):
+                term_index.add(file, source_subreddit(file), df)
+        return df
+    
+    def unique_part(i, part, names):
+        # MASK OF THE ROWS OF A SHARD / PART FILE TO KEEP ( None = ALL )
+        keep = None
+        if seen is not None:
+            ids  = pd.read_csv(part, usecols=["reddit_id"], dtype=str, na_filter=False)["reddit_id"]
+            keep = seen.first_seen(ids, names[i])
+            duplicates[names[i]] += int((~keep).sum())
+        # KEPT ROWS OF A FILE CLEANED IN THIS RUN, OR WHOSE DUPLICATES CHANGED, GO TO THE TERM INDEX
+        if term_index is not None and (names[i] in pending or not term_index.is_current(names[i], duplicates[names[i]])):
+            with metrics.span("clean.6_term_index"):
+                term_index.add_file(names[i], source_subreddit(names[i]), part, keep)
+        return keep
+    
+    # FILES TO CLEAN, UNCHANGED FILES REUSE THEIR SHARD AND COUNTS
+    results = {}
+    pending = []
+    for file in file_names:
+        entry = None
+        if shard_cache is not None and given and file not in given:
+            entry = shard_cache.last(file)
+            logger.info(f"not given, reusing last shard : {file}")
+        elif shard_cache is not None:
+            entry = shard_cache.lookup(file)
+            if entry is not None:
+                logger.info(f"unchanged since last run, reusing shard : {file}")
+        if entry is not None:
+            results[file] = (entry["stats"], entry["columns"])
+        else:
+            pending.append(file)
+    
+    # FILE WORKERS = ONE FILE PER PROCESS ( null = ONE PER CPU ), 1 = SERIAL
+    file_workers = cleaning_config.get("file_workers", 1)
+    file_workers = min(file_workers or os.cpu_count() or 1, len(pending))
+    
+    parts     = []      # CHUNKED MODE WITH FILE WORKERS: ONE PART FILE PER INPUT FILE
+    parts_dir = None
+    if file_workers > 1:
+        if shard_cache is None and chunk_size:
+            parts_dir = tempfile.mkdtemp(prefix="parts_", dir=os.path.dirname(output_csv) or ".")
+        
+        logger.info(f"-- cleaning {len(pending)} files with {file_workers} worker processes --")
+        with ProcessPoolExecutor(max_workers=file_workers, initializer=_init_file_worker) as pool:
+            futures = {}
+            for file in pending:
+                part_path = None
+                if shard_cache is not None:
+                    part_path = shard_cache.shard_path(file)
+                elif parts_dir is not None:
+                    part_path = os.path.join(parts_dir, os.path.basename(file))
+                    parts.append(part_path)
+                futures[file] = pool.submit(clean_file_task, file, chunk_size, part_path)
+            
+            # RESULTS ARE MERGED IN FILE ORDER, THE SAME ORDER AS A SERIAL RUN
+            for file in pending:
+                stats, columns, frames, task_metrics = futures[file].result()
+                if task_metrics is not None:
+                    metrics.run.merge(task_metrics)
+                results[file] = (stats, columns)
+                if shard_cache is not None:
+                    shard_cache.store(file, stats, columns)
+                elif frames is not None:
+                    df_concatenated.extend(unique_rows(df, file) for df in frames)
+    else:
+        for file in pending:
+            if shard_cache is None:
+                results[file] = clean_file(file, lambda df: emit(unique_rows(df, file)), chunk_size)
+            else:
+                stats, columns = clean_file_task(file, chunk_size, shard_cache.shard_path(file))[:2]
+                results[file] = (stats, columns)
+                shard_cache.store(file, stats, columns)
+    
+    # SAVE TO CSV ( DUPLICATE COUNTS ARE FINAL ONCE THE OUTPUT IS WRITTEN )
+    with metrics.span("clean.save"):
+        if shard_cache is not None:
+            logger.info("joining cleaned shards into csv")
+            if not files:
+                shard_cache.prune(file_names)
+            shard_cache.assemble(file_names, output_csv, lambda i, part: unique_part(i, part, file_names))
+            shard_cache.save()
+            logger.info(f"exported cleaned shards to csv : {output_csv}")
+        elif chunk_size:
+            if parts_dir is not None:
+                join_csv(parts, output_csv, lambda i, part: unique_part(i, part, pending))
+                shutil.rmtree(parts_dir, ignore_errors=True)
+            logger.info(f"cleaned chunks streamed to csv : {output_csv}")
+        elif parquet:
+            logger.info("exporting cleaned and concatenated dataframe to parquet")
+            xdf = pd.concat(df_concatenated, ignore_index=True)
+            clear(storage_config["cleaned_path"])
+            write_dataset(xdf, storage_config["cleaned_path"])
+            logger.info(f"exported cleaned and concatenated dataframe to parquet : {storage_config['cleaned_path']}")
+        else:
+            logger.info("exporting cleaned and concatenated dataframe to csv")
+            xdf = pd.concat(df_concatenated, ignore_index=True) 
+            xdf.to_csv(output_csv, index=False) # EXPORT DF AFTER CLEANING
+            logger.info(f"exported cleaned and concatenated dataframe to csv : {output_csv}")
+    
+    # TERM INDEX OF THE OUTPUT JUST WRITTEN
+    if term_index is not None:
+        for file in file_names:
+            term_index.set_duplicates(file, duplicates[file])
+        if not files:
+            term_index.prune(file_names)
+        ok, msg = term_index.save()
+        term_index.close()
+        if ok:
+            logger.info(msg)
+    
+    # PARQUET STORAGE: THE CSV WRITTEN BY THE SHARD / CHUNKED MODES IS CONVERTED, THEN DROPPED
+    if parquet and (shard_cache is not None or chunk_size):
+        with metrics.span("clean.publish"):
+            ok, result = publish_csv(output_csv, storage_config["cleaned_path"])
+        if ok:
+            os.remove(output_csv)
+            logger.info(f"published {result} cleaned rows to parquet : {storage_config['cleaned_path']}")
+    
+    num_posts = None
+    for i, file in enumerate(file_names):
+        stats, columns = results[file]
+        stats = dict(stats, post_rmd_duplicate=duplicates[file])
+        
+        if i == 0:
+            logger.info("-- gathering dataset overview information --")
+            # DATASET OVERVIEW
+            attributes     = columns
+            num_attributes = len(attributes)
+            num_posts      = stats["post_total"]
+            
+            config_info                    = cleaning_config
+            config_info["attribute_count"] = num_attributes
+            config_info["attributes"]      = attributes      # NOT INCLUDE TEMPERARY COLUMN "word_count"
+            
+            report["info"] = config_info
+            logger.info(f"-- dataset overview information gathered --")
+        
+        # REPORT DATA
+        report["data"].append( file_data_info(stats, num_posts) )
+        
+        # --- SAVE THE LOG ---
+        report["hist"].append ({ 
+                "file": file,
+                "history": file_history(stats)
+                               })
+        
+        logger.info(f"finished cleaning dataset : {file}")
+        
+    logger.info("**")
+
+
+    # REPORT SUMMARY
+    logger.info("generating cleaning report summary")
+    post_total = [] 
+    posts = []
+    replies = []
+    post_rmd_short = []
+    post_rmd_author= []
+    post_rmd_duplicate = []
+
+    for i, report_data in enumerate(report["data"]):
+    
+       post_total.append(report_data["post_total"])
+       posts.append(report_data["posts"])
+       replies.append(report_data["replies"])
+       post_rmd_short.append(report_data["post_rmd_short"])
+       post_rmd_author.append(report_data["post_rmd_author"])
+       post_rmd_duplicate.append(report_data["post_rmd_duplicate"])
+
+    report["sumary"] = {
+                        "post_total": sum(post_total),
+                        "posts": sum(posts),
+                        "posts_pct": round( (sum(posts) / sum(post_total)) * 100 , 2 ),
+                        "replies": sum(replies),
+                        "replies_pct": round( (sum(replies) / sum(post_total)) * 100 , 2 ),
+                        "post_rmd_short": sum(post_rmd_short),
+                        "post_rmd_short_pct": round( (sum(post_rmd_short) / sum(post_total)) * 100 , 2 ),   
+                        "post_rmd_author": sum(post_rmd_author),
+                        "post_rmd_author_pct": round( (sum(post_rmd_author) / sum(post_total)) * 100 , 2 ),
+                        "post_rmd_duplicate": sum(post_rmd_duplicate),
+                        "post_rmd_duplicate_pct": round( (sum(post_rmd_duplicate) / sum(post_total)) * 100 , 2 )
+                       }   
+    logger.info("finished generating cleaning report summary")
+    
+    # STAGE LATENCIES AND ROW COUNTS ( WORKER PROCESSES INCLUDED )
+    report["metrics"] = metrics.run.summary()
+
+
+    # print ( "report : " , json.dumps(report, indent=4) )
+    write_json ( cleaning_config["output_report"], report)
+    
+    # CHROME TRACE OF THE RUN ( metrics.trace )
+    metrics.write_trace("clean")
+
+
+# WORKER PROCESSES OF THE TEXT ENGINE RE-IMPORT THIS MODULE, RUN ONLY AS A SCRIPT
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the extracted posts and comments.")
+    parser.add_argument("--file", action="append", default=None,
+                        help="clean only this input file ( repeatable ), e.g. data/out/out_Dyslexia.csv")
+    main(parser.parse_args().file)
@@ -0,0 +1,91 @@
+"""
+ONE ENTRY POINT FOR THE WHOLE PIPELINE
+  python cli.py extract [--resume]     POSTS AND COMMENTS OF EVERY SUBREDDIT OF THE INPUT CSV ( main.py )
+  python cli.py refresh                score / num_comments OF THE EXISTING OUTPUTS ( main.py --refresh )
+  python cli.py clean [--file PATH]    CLEANED OUTPUT, REPORT, SHARDS AND TERM INDEX ( clean_data.py )
+  python cli.py ner                    ENTITY TABLES OF THE CLEANED ROWS ( ner.py )
+config.yaml IS READ AND CHECKED ONCE, BEFORE THE STAGE IS IMPORTED, EVERY MODULE REUSES IT ( utils/file.read_config )
+THE HEAVY MODULES ( pandas, requests, pyarrow, gensim, spaCy ) ARE ONLY IMPORTED BY THE SUBCOMMAND THAT USES THEM
+--check STOPS AFTER THE IMPORTS ( STARTUP TIME, SEE bench/bench_startup.py ), ner --check ALSO NEEDS spaCy AND ITS MODEL
+OPTIONAL PACKAGES ( spaCy FOR ner, orjson ): pip install -r requirements-optional.txt
+"""
+import argparse
+import sys
+
+# config.yaml SECTIONS EACH SUBCOMMAND READS
+SECTIONS = { "extract": ["http", "file_path", "reddit", "cache", "report"],
+             "refresh": ["http", "file_path", "reddit", "cache", "report"],
+             "clean":   ["cleaning"],
+             "ner":     ["cleaning", "ner"] }
+
+
+def load_config(command):
+    """Reads config.yaml once and checks the sections of command, returns ( bool, msg )."""
+    from utils.file import read_config, validate_config
+    ok, data = read_config()
+    if not ok:
+        return False, data
+    return validate_config(data, SECTIONS[command])
+
+def run_extract(args):
+    import main
+    if not args.check:
+        main.run(resume=args.resume)
+
+def run_refresh(args):
+    import main
+    if not args.check:
+        main.run(refresh=True)
+
+def run_clean(args):
+    import clean_data
+    clean_data.get_stopwords()
+    if not args.check:
+        clean_data.main(args.file)
+
+def run_ner(args):
+    import ner
+    ok, _ = ner.check()
+    if not ok:
+        return False
+    if not args.check:
+        ner.main()
+
+def parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Reddit extraction, cleaning and NER pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract = commands.add_parser("extract", help="extract posts and comments listed in the input CSV")
+    extract.add_argument("--resume", action="store_true", help="continue an interrupted run from the last saved post")
+    extract.set_defaults(run=run_extract)
+
+    refresh = commands.add_parser("refresh", help="update score / num_comments of existing outputs through /api/info")
+    refresh.set_defaults(run=run_refresh)
+
+    clean = commands.add_parser("clean", help="clean the extracted rows")
+    clean.add_argument("--file", action="append", default=None,
+                       help="clean only this input file ( repeatable ), e.g. data/out/out_Dyslexia.csv")
+    clean.set_defaults(run=run_clean)
+
+    ner = commands.add_parser("ner", help="named entities of the cleaned rows")
+    ner.set_defaults(run=run_ner)
+
+    for command in (extract, refresh, clean, ner):
+        command.add_argument("--check", action="store_true", help="load config.yaml and the stage modules, then stop")
+    return parser
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+
+    # THE ERROR IS LOGGED BY utils/file.py
+    ok, _ = load_config(args.command)
+    if not ok:
+        return 2
+
+    # THE ERROR IS LOGGED BY THE STAGE
+    if args.run(args) is False:
+        return 2
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,95 @@
-import pandas as pd
-import json
+import argparse
 import time
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from utils.file import read_csv, read_yaml, write_json
-from utils.extract import fetch_post, fetct_comment
+from utils.file import read_rows, read_config, write_json, append_csv, dedupe_csv
+from utils.extract import iter_post_pages, fetct_comment, stop_event, CommentColumns
+from utils.schema import OUTPUT_COLUMNS
+from utils.extract_async import fetch_comment_concurrent
+from utils.state import ExtractState
+from utils.refresh import refresh_csv
+from utils.journal import PostJournal, RunManifest
+from utils.storage import publish_csv
+from utils.corpus import CorpusStore
+from utils.dedup import SeenIndex
+from utils import metrics
 
 # LOGGER
 from utils.logger import get_logger
 logger = get_logger(__name__)
 
 # CONFIGURATION
-config         = read_yaml("./config.yaml")
+config         = read_config()
 http_config    = config[1]["http"]
 reddit_config  = config[1]["reddit"]
 file_config    = config[1]["file_path"]
 report_config  = config[1]["report"]
+incremental_config = config[1].get("incremental", {})
+storage_config = config[1].get("storage", {})
+corpus_config  = config[1].get("corpus", {})
 
-print ( file_config["input_csv"] )
+# EXTRACTION ENGINE
+# serial = ONE POST AT A TIME
+# async  = BOUNDED CONCURRENCY WITH A SHARED RATE LIMITER
+fetch_comments = fetch_comment_concurrent if reddit_config.get("engine") == "async" else fetct_comment
 
-# LOAD CSV INPUT
-input_csv = read_csv(file_config["input_csv"])
-# PARSE JSON STR TO A PYTHON LIST
-data = json.loads(input_csv[1])
+# CORPUS STORE ( None = DISABLED )
+# EVERY SAVED POST AND ITS COMMENTS ARE ALSO UPSERTED ON reddit_id
+corpus = None
 
-report = []
+# DEDUP INDEX ( None = DISABLED )
+# POST ID -> SUBREDDIT THAT SAVED IT, A POST OWNED BY ANOTHER SUBREDDIT IS NOT FETCHED AGAIN
+seen_index = None
 
-for csv_item in data:
+def open_stores():
+    """OPENS THE CORPUS STORE AND THE DEDUP INDEX WHEN ENABLED ( AT THE START OF A RUN, NOT AT IMPORT )"""
+    global corpus, seen_index
+    if corpus is None and corpus_config.get("enabled"):
+        corpus = CorpusStore(corpus_config["path"])
+    if seen_index is None and reddit_config.get("dedup_index"):
+        seen_index = SeenIndex(reddit_config["dedup_index_path"])
+
+def read_input():
+    """ROWS OF THE INPUT CSV ( ID, SUBREDDIT, ... ), ID AS A NUMBER, None WHEN IT CANNOT BE READ"""
+    ok, data = read_rows(file_config["input_csv"])
+    if not ok:
+        return None
+    for csv_item in data:
+        csv_item["ID"] = int(csv_item["ID"])
+    return data
+
+def output_path(csv_item):
+    return f'{file_config["output_csv"]}/out_{csv_item["SUBREDDIT"]}.csv'
+
+def publish_output(csv_item):
+    
+    """
+    PARQUET STORAGE: REPLACE THE SUBREDDIT'S PARTITION OF THE EXTRACT DATASET WITH ITS CSV OUTPUT
+    THE CSV STAYS THE WORKING FILE OF resume / incremental / refresh
+    """
+    
+    if storage_config.get("format") != "parquet":
+        return
+    ok, result = publish_csv(output_path(csv_item), storage_config["extract_path"], csv_item["SUBREDDIT"], csv_item["ID"])
+    if ok:
+        logger.info(f"published {result} rows of {csv_item['SUBREDDIT']} to {storage_config['extract_path']}")
+
+def extract_subreddit(csv_item, resume=False):
+    
+    """
+    FETCH POSTS AND COMMENTS OF ONE SUBREDDIT, RETURN ITS REPORT STATUS
+    resume = CONTINUE AFTER THE LAST POST SAVED BY AN INTERRUPTED RUN
+    THE SPANS AND COUNTERS OF THE SUBREDDIT ARE ADDED TO THE STATUS AS "metrics"
+    """
+    
+    with metrics.scope() as scoped, metrics.span("extract.subreddit", subreddit = csv_item["SUBREDDIT"]):
+        status = _extract_subreddit(csv_item, resume)
+    status["metrics"] = scoped.summary()
+    return status
+
+def _extract_subreddit(csv_item, resume=False):
+    """Helper: extraction of one subreddit ( see extract_subreddit )."""
     
     # START TIMER
     start_execute = time.time()
@@ -33,12 +97,85 @@ for csv_item in data:
     SUBREDDIT = csv_item["SUBREDDIT"]
     CSV_ID    = csv_item["ID"]
     
-    # FETCH POSTS AND COMMENTS
-    posts    = fetch_post(CSV_ID, SUBREDDIT)
-    comments = fetct_comment(CSV_ID, SUBREDDIT, posts)
+    # INCREMENTAL MODE  = MERGE INTO THE EXISTING OUTPUT, ONLY NEW OR GROWN THREADS ARE FETCHED
+    # OTHERWISE         = EACH RUN REPLACES THE PREVIOUS OUTPUT OF THE SUBREDDIT
+    #                     ( UNLESS AN INTERRUPTED RUN OF THIS SUBREDDIT IS RESUMED )
+    output_csv = output_path(csv_item)
+    state = ExtractState(incremental_config["state_path"], SUBREDDIT) if incremental_config.get("enabled") else None
+    resuming = resume and os.path.exists(PostJournal.path_for(file_config["journal_path"], SUBREDDIT))
+    if state is None and not resuming and os.path.exists(output_csv):
+        os.remove(output_csv)
+    
+    # JOURNAL OF THE POSTS ALREADY SAVED
+    journal = PostJournal(file_config["journal_path"], SUBREDDIT, output_csv, resuming)
+    posts_resumed = len(journal.done)
+    
+    # FETCH POSTS PAGE BY PAGE
+    # EACH POST IS APPENDED TO CSV WITH ITS COMMENTS AS SOON AS ITS TREE IS FINISHED
+    request_log   = []
+    counts        = {"num_posts": 0, "num_comments": 0}
+    posts_skipped = 0
+    posts_duplicate = 0
+    failed_ids    = set()
     
-    # MERGE POSTS AND COMMENTS
-    merged_data = posts + comments
+    def save_post(post, comments):
+        # comments = None: THE COMMENT TREE COULD NOT BE FETCHED ( ERROR, 429 / 5xx AFTER THE RETRIES, OFFLINE MISS )
+        # NOTHING IS WRITTEN, JOURNALED OR MARKED, SO THE NEXT INCREMENTAL OR --resume RUN FETCHES THE POST AGAIN
+        if comments is None:
+            failed_ids.add(post["reddit_id"])
+            return
+        
+        # POST ROW ( FRESH SCORE / num_comments ) AND ITS NEW COMMENTS, AS COLUMN LISTS
+        rows = comments.table([post])
+        with metrics.span("csv.append"):
+            append_csv(output_csv, rows, OUTPUT_COLUMNS)
+        metrics.count("rows.written", 1 + len(comments))
+        if corpus is not None:
+            with metrics.span("corpus.upsert"):
+                corpus.upsert(SUBREDDIT, CSV_ID, rows)
+        journal.commit(post["reddit_id"])
+        counts["num_posts"]    += 1
+        counts["num_comments"] += len(comments)
+    
+    for posts in iter_post_pages(CSV_ID, SUBREDDIT, request_log):
+        if stop_event.is_set():
+            break
+        
+        # SKIP POSTS SAVED BEFORE AN INTERRUPTION
+        posts = [post for post in posts if not journal.is_done(post["reddit_id"])]
+        
+        # SKIP POSTS ALREADY SAVED BY ANOTHER SUBREDDIT ( SAME URL IN TWO in.csv ROWS, EARLIER RUNS )
+        if seen_index is not None:
+            owned = [post for post in posts if seen_index.claim(post["reddit_id"], SUBREDDIT)]
+            posts_duplicate += len(posts) - len(owned)
+            posts = owned
+        
+        # SKIP THREADS WHOSE COMMENT COUNT DID NOT CHANGE
+        fetch_posts = state.changed(posts) if state is not None else posts
+        posts_skipped += len(posts) - len(fetch_posts)
+        
+        fetch_ids = {post["reddit_id"] for post in fetch_posts}
+        for post in posts:
+            if post["reddit_id"] not in fetch_ids:
+                save_post(post, CommentColumns())
+        
+        fetch_comments(CSV_ID, SUBREDDIT, fetch_posts, request_log, on_post_done = save_post)
+        
+        if state is not None:
+            state.mark([post for post in fetch_posts if post["reddit_id"] not in failed_ids])
+            state.save()
+    
+    # Ctrl-C: THE JOURNAL IS KEPT FOR --resume, THE OUTPUT IS LEFT AS IT IS
+    interrupted = stop_event.is_set()
+    journal.close(remove = not interrupted)
+    if seen_index is not None:
+        seen_index.save()
+    num_posts    = counts["num_posts"]
+    num_comments = counts["num_comments"]
+    
+    # MERGE: KEEP ONE ROW PER reddit_id ( THE MOST RECENT )
+    if state is not None and not interrupted and os.path.exists(output_csv):
+        dedupe_csv(output_csv, "reddit_id")
     
     # END TIMER
     # CALCULATE EXECUTION TIME
@@ -48,37 +185,178 @@ for csv_item in data:
     # REPORT STATUS
     status = { 
               "subreddit" : SUBREDDIT, 
-              "num_posts": len(posts), 
-              "num_comments": len(comments),
-              "total_records": len(merged_data),
+              "num_posts": num_posts, 
+              "num_comments": num_comments,
+              "total_records": num_posts + num_comments,
+              "posts_skipped": posts_skipped,
+              "posts_resumed": posts_resumed,
+              "posts_duplicate": posts_duplicate,
+              "posts_failed": len(failed_ids),
               "csv_id": CSV_ID,
               "status": None,
               "status_desc": None,
-              "execute_time": execute_time
+              "execute_time": execute_time,
+              "wait_time": round(sum(r["wait_time"] for r in request_log), 2),
+              "retries": sum(r["retries"] for r in request_log),
+              "requests": request_log
             }
     
+    if interrupted:
+        status["status"] = False
+        status["status_desc"] = "Interrupted, --resume continues from the last saved post."
+        return status
+    
     # IN CASE OF PORVIDED SUBREDDIT HAS NO POSTS OR COMMENTS
-    # AVOID CREATING EMPTY DATAFRAMES
-    # SAVE REPORT
-    # SKIP TO NEXT ITEM
-    if len(merged_data) == 0:
+    # NOTHING WAS WRITTEN, NO EMPTY CSV IS CREATED
+    if num_posts + num_comments + posts_resumed == 0:
         status["status"] = False
         status["status_desc"] = "No posts or comments found."
-        report.append(status)
-        continue
-   
-    # CREATE DATAFRAME
-    df = pd.DataFrame( merged_data )
-
-    # SAVE TO CSV
-    output_csv = f'{file_config["output_csv"]}/out_{csv_item["SUBREDDIT"]}.csv'
-    df.to_csv(output_csv, index=False)
+        if posts_duplicate:
+            status["status_desc"] = "All posts already saved by another subreddit."
+        if failed_ids:
+            status["status_desc"] = "No comment tree could be fetched, nothing was saved."
+        return status
+    
+    publish_output(csv_item)
     
     # UPDATE REPORT STATUS    
     status["status"] = True
     status["status_desc"] = "Data successfully extracted and saved."
-    report.append(status)
+    if failed_ids:
+        status["status_desc"] = f"Data extracted and saved, {len(failed_ids)} posts left out: their comment trees could not be fetched."
+        logger.warning(f"CSV ID {CSV_ID} - SUBREDDIT {SUBREDDIT} - {status['status_desc']}")
+    return status
+
+def refresh_subreddit(csv_item):
     
-# SAVE REPORT AS JSON
-report_config_file = report_config["output_file"]
-write_json(report_config_file, report)
\ No newline at end of file
+    """
+    UPDATE score / num_comments OF AN EXISTING OUTPUT THROUGH /api/info, RETURN ITS REPORT STATUS
+    """
+    
+    start_execute = time.time()
+    output_csv    = output_path(csv_item)
+    
+    request_log = []
+    status = {
+              "subreddit": csv_item["SUBREDDIT"],
+              "csv_id": csv_item["ID"],
+              "mode": "refresh",
+              "status": None,
+              "status_desc": None
+            }
+    
+    if not os.path.exists(output_csv):
+        status["status"] = False
+        status["status_desc"] = "No extracted output to refresh."
+    else:
+        with metrics.scope() as scoped, metrics.span("refresh.subreddit", subreddit = csv_item["SUBREDDIT"]):
+            ok, result = refresh_csv(output_csv, request_log)
+        status["metrics"] = scoped.summary()
+        status["status"] = ok
+        if ok:
+            status.update(result)
+            status["status_desc"] = "Scores and comment counts refreshed."
+            publish_output(csv_item)
+            if corpus is not None:
+                corpus.load_csv(output_csv, csv_item["SUBREDDIT"], csv_item["ID"])
+        else:
+            status["status_desc"] = result
+    
+    status["execute_time"] = round(time.time() - start_execute, 2)
+    status["requests"]     = request_log
+    return status
+
+def run(refresh=False, resume=False):
+    
+    """
+    EXTRACT EVERY SUBREDDIT OF THE INPUT CSV ( OR ONLY REFRESH THEIR OUTPUTS ), THE REPORT IS WRITTEN AS IT GOES
+    refresh = ONLY UPDATE score / num_comments OF EXISTING OUTPUTS THROUGH /api/info
+    resume  = CONTINUE AN INTERRUPTED RUN FROM THE LAST SAVED POST
+    """
+    
+    print ( file_config["input_csv"] )
+    
+    # LOAD CSV INPUT ( ONE DICT PER ROW )
+    data = read_input()
+    if data is None:
+        return
+    open_stores()
+    stop_event.clear()
+    
+    report_config_file = report_config["output_file"]
+    report = []
+    
+    if refresh:
+        for csv_item in data:
+            report.append(refresh_subreddit(csv_item))
+            write_json(report_config_file, report)
+        metrics.write_trace("refresh")
+        return
+    
+    # RUN MANIFEST
+    # FINISHED SUBREDDITS ARE NOT FETCHED AGAIN WHEN RESUMING
+    manifest = RunManifest(os.path.join(file_config["journal_path"], "run_manifest.json"), resume)
+    
+    # STATUS PER INPUT ROW, KEPT IN INPUT ORDER
+    statuses = [manifest.finished(csv_item["SUBREDDIT"]) if resume else None for csv_item in data]
+    
+    # SUBREDDIT SCHEDULER
+    # WORKER THREADS RUN SEVERAL SUBREDDITS AT ONCE, PARSING AND CSV WRITES OF ONE
+    # OVERLAP THE NETWORK WAITS OF ANOTHER. ALL WORKERS SHARE THE RATE LIMITER IN
+    # utils.extract, SO THE COMBINED REQUEST RATE STAYS WITHIN THE BUDGET.
+    def run_item(csv_item, submitted_at):
+        queue_wait_time = round(time.time() - submitted_at, 2)
+        status = extract_subreddit(csv_item, resume)
+        status["queue_wait_time"] = queue_wait_time   # execute_time = WORK TIME
+        return status
+    
+    executor = ThreadPoolExecutor(max_workers = reddit_config.get("subreddit_workers", 1))
+    futures  = {}
+    try:
+        futures = { executor.submit(run_item, csv_item, time.time()): i 
+                    for i, csv_item in enumerate(data) if statuses[i] is None }
+        
+        for future in as_completed(futures):
+            i = futures[future]
+            statuses[i] = future.result()
+            manifest.finish(data[i]["SUBREDDIT"], statuses[i])
+            
+            # SAVE REPORT AS JSON AFTER EVERY SUBREDDIT
+            report = [status for status in statuses if status is not None]
+            write_json(report_config_file, report)
+    except KeyboardInterrupt:
+        # QUEUED SUBREDDITS ARE DROPPED, RUNNING ONES STOP AFTER THEIR CURRENT REQUEST ( stop_event )
+        # --resume PICKS UP WHATEVER DID NOT FINISH
+        stop_event.set()
+        executor.shutdown(wait = False, cancel_futures = True)
+        
+        # REPORT OF WHAT IS DONE SO FAR, EVERY UNFINISHED SUBREDDIT MARKED AS INTERRUPTED ( NOT IN THE MANIFEST )
+        started = {i for future, i in futures.items() if not future.cancelled()}
+        for i, csv_item in enumerate(data):
+            if statuses[i] is None:
+                statuses[i] = { "subreddit": csv_item["SUBREDDIT"],
+                                "csv_id": csv_item["ID"],
+                                "status": False,
+                                "status_desc": "Interrupted, --resume continues from the last saved post." if i in started
+                                               else "Interrupted before it started, --resume runs it." }
+        write_json(report_config_file, statuses)
+        raise
+    executor.shutdown()
+    
+    report = [status for status in statuses if status is not None]
+    write_json(report_config_file, report)
+    
+    # CHROME TRACE OF THE RUN ( metrics.trace )
+    metrics.write_trace("extract")
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract Reddit posts and comments listed in the input CSV.")
+    parser.add_argument("--refresh", action="store_true", 
+                        help="only update score / num_comments of existing outputs through /api/info")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted run from the last saved post")
+    args = parser.parse_args()
+    run(args.refresh, args.resume)
+
+if __name__ == "__main__":
+    main()
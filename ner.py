@@ -0,0 +1,190 @@
+import pandas as pd
+import os
+from utils.file import read_config, write_json
+from utils.schema import iter_frames
+from utils.storage import list_partitions, iter_partition, read_dataset
+from utils.corpus import CorpusStore
+from utils.ner import EntityCache, spacy, load_model, doc_entities, text_hash, normalize_entity
+from utils import metrics
+
+# LOGGER
+from utils.logger import get_logger
+logger = get_logger(__name__)
+
+# CONFIGURATION
+config         = read_config()
+cleaning_config= config[1]["cleaning"]
+storage_config = config[1].get("storage", {})
+corpus_config  = config[1].get("corpus", {})
+ner_config     = config[1]["ner"]
+
+# SAME INPUT AS clean_data.py: CORPUS STORE, PARQUET EXTRACT DATASET OR OUTPUT CSVs
+parquet     = storage_config.get("format") == "parquet"
+from_corpus = cleaning_config.get("source") == "corpus"
+
+# COLUMNS READ FROM THE EXTRACTED ROWS
+COLUMNS = ["reddit_id", "kind_desc", "title", "text", "post_id"]
+
+
+def list_units():
+    """( subreddit, source ) OF EVERY INPUT UNIT, IN THE ORDER clean_data.py CLEANS THEM"""
+    if from_corpus:
+        return [(subreddit, subreddit) for subreddit in CorpusStore(corpus_config["path"]).subreddits()]
+    if parquet:
+        return [(os.path.basename(path).split("=", 1)[1], path) for path in list_partitions(storage_config["extract_path"])]
+    folder = "./data/out/"
+    return [(name[len("out_"):-len(".csv")] if name.startswith("out_") else name[:-len(".csv")], os.path.join(folder, name))
+            for name in os.listdir(folder) if name.endswith(".csv")]
+
+def iter_unit(source, chunk_size):
+    """ORIGINAL ( NOT CLEANED ) ROWS OF ONE UNIT, chunk_size ROWS AT A TIME"""
+    if from_corpus:
+        yield from CorpusStore(corpus_config["path"]).iter_rows(subreddit=source, chunk_size=chunk_size)
+    elif parquet:
+        yield from iter_partition(source, chunk_size)
+    else:
+        yield from iter_frames(source, chunk_size, usecols=lambda column: column in COLUMNS)
+
+def cleaned_ids():
+    """reddit_id OF EVERY ROW KEPT BY clean_data.py, None WHEN THERE IS NO CLEANED OUTPUT"""
+    try:
+        if parquet:
+            ids = read_dataset(storage_config["cleaned_path"], columns=["reddit_id"])["reddit_id"]
+        else:
+            ids = pd.read_csv(cleaning_config["output_path"], usecols=["reddit_id"], dtype=str)["reddit_id"]
+    except (FileNotFoundError, OSError, ValueError) as e:
+        logger.error(f"No cleaned output to run NER over, run clean_data.py first - {e}")
+        return None
+    return set(ids.dropna())
+
+def ner_text(df):
+    """TEXT GIVEN TO THE MODEL: THE ORIGINAL TEXT, POSTS PREFIXED WITH THEIR TITLE ( ner.include_title ), CUT AT ner.max_chars"""
+    text = df["text"].astype(object).fillna("").astype(str)
+    if ner_config.get("include_title", True):
+        title = df["title"].astype(object).fillna("").astype(str)
+        text  = text.where(title == "", title + "\n" + text)
+    return text.str.slice(0, ner_config.get("max_chars", 100000)).tolist()
+
+def check():
+    """spaCy AND THE MODEL OF ner.model ARE INSTALLED ( requirements-optional.txt ), RETURNS ( bool, msg )"""
+    model = str(ner_config["model"])
+    if spacy is None:
+        msg = f"spaCy is not installed: pip install -r requirements-optional.txt && python -m spacy download {model}"
+        logger.error(msg)
+        return False, msg
+    if not spacy.util.is_package(model) and not os.path.isdir(model):
+        msg = f"spaCy model {model} is not installed: python -m spacy download {model}"
+        logger.error(msg)
+        return False, msg
+    return True, f"spaCy {spacy.__version__}, model {model}"
+
+def main():
+    ok, _ = check()
+    if not ok:
+        return
+
+    kept = cleaned_ids()
+    if kept is None:
+        return
+
+    nlp, model_key = load_model(ner_config["model"], ner_config.get("components", ["ner", "entity_ruler"]), ner_config.get("max_chars"))
+    logger.info(f"-- NER model {model_key} --")
+    cache = EntityCache(ner_config["cache_path"])
+
+    stats    = {"rows": 0, "rows_cached": 0, "rows_processed": 0}
+    mentions = []      # ( subreddit, post_id, reddit_id, entity, label )
+
+    def add_mentions(meta, entities):
+        subreddit, post_id, reddit_id = meta
+        for text, label, _, _ in entities:
+            mentions.append((subreddit, post_id, reddit_id, normalize_entity(text), label))
+
+    def pending_rows():
+        # ROWS KEPT BY THE CLEANING, EVERY reddit_id ONCE ( FIRST UNIT WINS, AS IN clean_data.py )
+        # CACHED ROWS ARE ADDED RIGHT AWAY, THE OTHERS ARE YIELDED TO nlp.pipe AS ( text, ( meta, hash ) )
+        seen = set()
+        for subreddit, source in list_units():
+            logger.info(f"reading rows of {subreddit}")
+            for chunk in metrics.timed_iter("ner.1_load_rows", iter_unit(source, ner_config.get("chunk_size", 20000))):
+                chunk = chunk[chunk["reddit_id"].isin(kept) & ~chunk["reddit_id"].isin(seen)]
+                chunk = chunk.drop_duplicates("reddit_id")
+                if chunk.empty:
+                    continue
+                ids = chunk["reddit_id"].tolist()
+                seen.update(ids)
+                # THREAD OF THE ROW: post_id OF A COMMENT, reddit_id OF A POST
+                posts  = chunk["post_id"].astype(object).where(chunk["post_id"].notna(), chunk["reddit_id"]).tolist()
+                texts  = ner_text(chunk)
+                hashes = [text_hash(text, model_key) for text in texts]
+                with metrics.span("ner.2_cache_lookup"):
+                    cached = cache.lookup(ids, hashes)
+                stats["rows"]        += len(ids)
+                stats["rows_cached"] += len(cached)
+                metrics.count("ner.rows", len(ids))
+                metrics.count("ner.cache_hits", len(cached))
+                for reddit_id, post_id, text, hashed in zip(ids, posts, texts, hashes):
+                    meta = (subreddit, post_id, reddit_id)
+                    if reddit_id in cached:
+                        add_mentions(meta, cached[reddit_id])
+                    else:
+                        yield text, (meta, hashed)
+
+    # NEW / CHANGED ROWS ONLY, IN BATCHES, SPREAD OVER ner.workers PROCESSES
+    workers = ner_config.get("workers") or os.cpu_count() or 1
+    logger.info(f"-- running NER with {workers} processes, {ner_config.get('batch_size', 256)} texts per batch --")
+    docs = nlp.pipe( pending_rows(),
+                     as_tuples  = True,
+                     batch_size = ner_config.get("batch_size", 256),
+                     n_process  = workers )
+
+    new_rows = []
+    for doc, (meta, hashed) in metrics.timed_iter("ner.3_pipe", docs):
+        entities = doc_entities(doc)
+        add_mentions(meta, entities)
+        new_rows.append((meta[2], hashed, entities))
+        if len(new_rows) >= 1000:
+            cache.store(new_rows)
+            stats["rows_processed"] += len(new_rows)
+            new_rows = []
+    cache.store(new_rows)
+    stats["rows_processed"] += len(new_rows)
+    metrics.count("ner.processed", stats["rows_processed"])
+    logger.info(f"NER done : {stats['rows']} rows, {stats['rows_cached']} from cache, {stats['rows_processed']} processed")
+
+    # ENTITY TABLES ( ner.labels, null = EVERY LABEL )
+    with metrics.span("ner.4_tables"):
+        df = pd.DataFrame(mentions, columns=["subreddit", "post_id", "reddit_id", "entity", "label"])
+        if ner_config.get("labels"):
+            df = df[df["label"].isin(ner_config["labels"])]
+        df = df[df["entity"] != ""]
+
+        by_post = (df.groupby(["subreddit", "post_id", "entity", "label"], observed=True)
+                     .agg(mentions=("reddit_id", "size"), rows=("reddit_id", "nunique"))
+                     .reset_index()
+                     .sort_values(["subreddit", "post_id", "mentions"], ascending=[True, True, False], kind="stable"))
+        by_subreddit = (df.groupby(["subreddit", "entity", "label"], observed=True)
+                          .agg(mentions=("reddit_id", "size"), posts=("post_id", "nunique"), rows=("reddit_id", "nunique"))
+                          .reset_index()
+                          .sort_values(["subreddit", "mentions"], ascending=[True, False], kind="stable"))
+
+        os.makedirs(ner_config["output_path"], exist_ok=True)
+        by_post.to_csv(os.path.join(ner_config["output_path"], "entities_by_post.csv"), index=False)
+        by_subreddit.to_csv(os.path.join(ner_config["output_path"], "entities_by_subreddit.csv"), index=False)
+    logger.info(f"exported {len(by_subreddit)} subreddit and {len(by_post)} post entity rows to {ner_config['output_path']}")
+
+    # REPORT
+    report = { "info": { "model": model_key,
+                         "labels": ner_config.get("labels"),
+                         "workers": workers,
+                         "batch_size": ner_config.get("batch_size", 256),
+                         "cache_entries": len(cache) },
+               "sumary": dict(stats, mentions=len(df), entities=int(df["entity"].nunique())),
+               "metrics": metrics.run.summary() }
+    cache.close()
+    write_json(ner_config["output_report"], report)
+    metrics.write_trace("ner")
+
+
+# nlp.pipe WORKER PROCESSES MAY RE-IMPORT THIS MODULE, RUN ONLY AS A SCRIPT
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+from requests.structures import CaseInsensitiveDict
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# LOGGER
+from utils.logger import get_logger
+logger = get_logger(__name__)
+
+
+class CachedResponse:
+    """
+    Minimal stand-in for requests.Response built from a cache entry.
+    Exposes what the extract helpers use: status_code, headers, content, json().
+    """
+
+    def __init__(self, status_code, headers, content, from_cache=True):
+        self.status_code = status_code
+        self.headers     = CaseInsensitiveDict(headers)
+        self.content     = content
+        self.from_cache  = from_cache
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ResponseCache:
+    """
+    On-disk cache of HTTP response bodies keyed by URL.
+    ENTRIES YOUNGER THAN ttl ARE SERVED WITHOUT A REQUEST,
+    OLDER ONES ARE REVALIDATED WITH ETag / Last-Modified,
+    THE LEAST RECENTLY USED ENTRIES ARE EVICTED PAST max_size_mb.
+    """
+
+    def __init__(self, path: str, ttl: float = 3600, max_size_mb: float = 500):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path     = path
+        self.ttl      = ttl
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self._lock    = threading.Lock()
+
+        # ONE CONNECTION SHARED BY ALL THREADS, SERIALISED BY _lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                key           TEXT PRIMARY KEY,
+                                url           TEXT,
+                                etag          TEXT,
+                                last_modified TEXT,
+                                content_type  TEXT,
+                                body          BLOB,
+                                size          INTEGER,
+                                fetched_at    REAL,
+                                last_access   REAL )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses (last_access)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def key(url):
+        """Helper: stable cache key for a URL."""
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def get(self, url):
+        """Returns the cache entry as a dict, or None. Marks the entry as recently used."""
+        with self._lock:
+            row = self._conn.execute("""SELECT etag, last_modified, content_type, body, fetched_at
+                                        FROM responses WHERE key = ?""", (self.key(url),)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), self.key(url)))
+            self._conn.commit()
+
+        etag, last_modified, content_type, body, fetched_at = row
+        return {"etag": etag, "last_modified": last_modified, "content_type": content_type,
+                "body": body, "fetched_at": fetched_at}
+
+    def is_fresh(self, entry):
+        """True when the entry is younger than the TTL."""
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def conditional_headers(self, entry):
+        """Validators to send with a revalidation request."""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def response(self, entry):
+        """Builds a response object from a cache entry."""
+        return CachedResponse(200, {"Content-Type": entry["content_type"] or "application/json"}, entry["body"])
+
+    def touch(self, url):
+        """Restarts the TTL of an entry after a 304 Not Modified."""
+        with self._lock:
+            now = time.time()
+            self._conn.execute("UPDATE responses SET fetched_at = ?, last_access = ? WHERE key = ?", (now, now, self.key(url)))
+            self._conn.commit()
+
+    def put(self, url, resp):
+        """Stores a 200 response, then evicts least recently used entries past the size cap."""
+        body = resp.content
+        now  = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (self.key(url),)).fetchone()
+            self._conn.execute("""INSERT OR REPLACE INTO responses
+                                  (key, url, etag, last_modified, content_type, body, size, fetched_at, last_access)
+                                  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                               (self.key(url), url,
+                                resp.headers.get("ETag"), resp.headers.get("Last-Modified"), resp.headers.get("Content-Type"),
+                                body, len(body), now, now))
+            self._size += len(body) - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Helper: drops least recently used entries until the cache fits max_size. Caller holds _lock."""
+        while self._size > self.max_size:
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access LIMIT 100").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._size -= size
+                if self._size <= self.max_size:
+                    break
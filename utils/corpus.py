@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from utils.schema import OUTPUT_COLUMNS, enforce, iter_frames
+
+# LOGGER
+from utils.logger import get_logger
+logger = get_logger(__name__)
+
+
+# STORED COLUMNS, ONE ROW PER reddit_id
+COLUMNS = ["subreddit"] + OUTPUT_COLUMNS
+
+# SQLITE TYPES OF THE STORED COLUMNS
+SQL_TYPES = { "csv_id": "INTEGER",
+              "timestamp_utc": "REAL",
+              "score": "INTEGER",
+              "num_comments": "INTEGER",
+              "depth": "INTEGER" }
+
+
+class CorpusStore:
+    """
+    Local SQLite store of every extracted post and comment.
+    ROWS ARE UPSERTED ON reddit_id, SO A THREAD REACHED TWICE ( SAME SUBREDDIT IN TWO in.csv ROWS,
+    INCREMENTAL RUNS, REFRESH ) IS STORED ONCE, WITH ITS LATEST VALUES.
+    Usage: store = CorpusStore(path); store.upsert(SUBREDDIT, CSV_ID, rows); store.read(subreddit=SUBREDDIT)
+    """
+
+    INDEXES = ["post_id", "parent_id", "csv_id", "timestamp_utc", "subreddit"]
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path  = path
+        self._lock = threading.Lock()
+
+        # ONE CONNECTION SHARED BY ALL THREADS, SERIALISED BY _lock
+        # WAL = READERS ( clean_data.py ) DO NOT BLOCK THE WRITER
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        columns = ",\n".join(f"{column} {SQL_TYPES.get(column, 'TEXT')}" for column in COLUMNS if column != "reddit_id")
+        self._conn.execute(f"""CREATE TABLE IF NOT EXISTS corpus (
+                                reddit_id  TEXT PRIMARY KEY,
+                                {columns},
+                                updated_at REAL )""")
+        for column in self.INDEXES:
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_corpus_{column} ON corpus ({column})")
+        self._conn.commit()
+
+        names   = ", ".join(COLUMNS + ["updated_at"])
+        updates = ", ".join(f"{column} = excluded.{column}" for column in COLUMNS + ["updated_at"] if column != "reddit_id")
+        self._upsert_sql = f"""INSERT INTO corpus ({names}) VALUES ({", ".join("?" * (len(COLUMNS) + 1))})
+                               ON CONFLICT (reddit_id) DO UPDATE SET {updates}"""
+
+    @staticmethod
+    def _value(value):
+        """Helper: NaN / pandas NA to NULL, numpy scalars to python values."""
+        if value is None or value is pd.NA or (isinstance(value, float) and value != value):
+            return None
+        return value.item() if hasattr(value, "item") else value
+
+    def upsert(self, subreddit, csv_id, rows):
+        """
+        Inserts or updates extracted rows in one transaction. Comment rows get kind 't1' and csv_id.
+        rows = LIST OF DICTS, OR DICT OF COLUMN LISTS ( CommentColumns.table, READ BY POSITION )
+        """
+        now = time.time()
+        if not isinstance(rows, dict):
+            rows = {column: [row.get(column) for row in rows] for column in OUTPUT_COLUMNS}
+        n = len(rows["reddit_id"])
+        
+        values = {column: rows[column] if column in rows else [None] * n for column in OUTPUT_COLUMNS}
+        values["subreddit"] = [subreddit] * n
+        values["csv_id"]    = [csv_id if self._value(value) is None else value for value in values["csv_id"]]
+        values["kind"]      = ["t1" if self._value(kind) is None and kind_desc == "comment" else kind
+                               for kind, kind_desc in zip(values["kind"], values["kind_desc"])]
+        params = [[self._value(value) for value in row] + [now] for row in zip(*(values[column] for column in COLUMNS))]
+
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(self._upsert_sql, params)
+        return len(params)
+
+    def load_csv(self, file_path, subreddit, csv_id, chunk_size=50000):
+        """Upserts the rows of an extracted CSV ( e.g. after a refresh ), chunk by chunk."""
+        try:
+            num_rows = 0
+            for chunk in iter_frames(file_path, chunk_size):
+                num_rows += self.upsert(subreddit, csv_id, chunk.to_dict("records"))
+            return True, num_rows
+        except Exception as e:
+            msg = f"Error loading {file_path} into corpus {self.path} - {e}"
+            logger.error(msg)
+            return False, str(e)
+
+    def _reader(self):
+        """Helper: separate read-only connection, WAL lets it read while the writer commits."""
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+
+    def subreddits(self):
+        conn = self._reader()
+        try:
+            return [row[0] for row in conn.execute("SELECT DISTINCT subreddit FROM corpus ORDER BY subreddit")]
+        finally:
+            conn.close()
+
+    def _select(self, where, params):
+        """Helper: SELECT of the stored columns, in insertion order ( a post then its comments )."""
+        sql = f"SELECT {', '.join(COLUMNS)} FROM corpus"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql + " ORDER BY rowid", params
+
+    def iter_rows(self, subreddit=None, start=None, end=None, chunk_size=None):
+
+        """
+        STORED ROWS WITH THE SHARED DTYPES, WHOLE OR chunk_size ROWS AT A TIME
+        subreddit    = ONE SUBREDDIT ( None = ALL )
+        start / end  = TIME WINDOW ON timestamp_utc, start INCLUDED, end EXCLUDED ( None = OPEN )
+        """
+
+        where, params = [], []
+        for column, op, value in (("subreddit", "=", subreddit), ("timestamp_utc", ">=", start), ("timestamp_utc", "<", end)):
+            if value is not None:
+                where.append(f"{column} {op} ?")
+                params.append(value)
+        sql, params = self._select(where, params)
+
+        conn = self._reader()
+        try:
+            if not chunk_size:
+                yield enforce(pd.read_sql_query(sql, conn, params=params))
+                return
+            for df in pd.read_sql_query(sql, conn, params=params, chunksize=chunk_size):
+                yield enforce(df)
+        finally:
+            conn.close()
+
+    def read(self, subreddit=None, start=None, end=None):
+        """All rows of a subreddit / time window as one DataFrame."""
+        df, = self.iter_rows(subreddit, start, end)
+        return df
+
+    def thread(self, post_id):
+        """One post and all its comments ( index lookups on reddit_id / post_id )."""
+        sql, params = self._select(["( reddit_id = ? OR post_id = ? )"], [post_id, post_id])
+        conn = self._reader()
+        try:
+            return enforce(pd.read_sql_query(sql, conn, params=params))
+        finally:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
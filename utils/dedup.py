@@ -0,0 +1,168 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# LOGGER
+from utils.logger import get_logger
+logger = get_logger(__name__)
+
+# FIXED KEY, THE SAME ID HASHES THE SAME WAY IN EVERY RUN
+HASH_KEY = "redditdedupindex"
+
+
+def id_hashes(ids):
+    """Helper: 64 bit hashes of reddit ids ( vectorised, stable across runs )."""
+    return pd.util.hash_array(np.asarray(ids, dtype=object), hash_key=HASH_KEY, categorize=False)
+
+def find_owners(keys, owners, hashes):
+    """Helper: owner of every hash in the sorted keys, -1 when it is not there."""
+    if not len(keys):
+        return np.full(len(hashes), -1, dtype=np.int64)
+    pos   = np.minimum(np.searchsorted(keys, hashes), len(keys) - 1)
+    found = keys[pos] == hashes
+    return np.where(found, owners[pos].astype(np.int64), -1)
+
+def merge_sorted(keys, owners, new_keys, new_owners):
+    """Helper: sorted keys / owners with new sorted keys ( not in keys yet ) inserted."""
+    pos = np.searchsorted(keys, new_keys)
+    return np.insert(keys, pos, new_keys), np.insert(owners, pos, new_owners)
+
+
+class SeenIndex:
+    """
+    Compact index of reddit ids already seen: 64 bit id hash -> owner ( the subreddit that saved it ).
+    IN MEMORY AS SORTED NUMPY ARRAYS ( 12 BYTES PER ID ), LOOKED UP WITH np.searchsorted:
+      keys / owners           = THE BULK OF THE INDEX
+      recent_keys / _owners   = IDS ADDED LATELY, MERGED INTO keys ONCE THEY PASS 1/8 OF IT
+      pending                 = IDS CLAIMED ONE BY ONE ( claim ), MERGED BEFORE A BULK LOOKUP AND ON save
+    path SET  = PERSISTED ACROSS RUNS ( .npz: keys uint64, owners uint32, names )
+    path None = IN MEMORY FOR ONE RUN
+    Usage: index = SeenIndex(path); if index.claim(post_id, SUBREDDIT): fetch ...; index.save()
+    """
+
+    # SMALLEST recent TIER MERGED INTO keys
+    RECENT_MIN = 65536
+
+    def __init__(self, path: str = None):
+        self.path    = path
+        self.names   = []       # OWNER NAMES, OWNER = POSITION IN THIS LIST
+        self.keys    = np.empty(0, dtype=np.uint64)
+        self.owners  = np.empty(0, dtype=np.uint32)
+        self.recent_keys   = self.keys
+        self.recent_owners = self.owners
+        self.pending = {}       # id hash -> owner
+        self._lock   = threading.Lock()
+
+        if path and os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    self.names = data["names"].tolist()
+                    keys       = data["keys"].astype(np.uint64)
+                    owners     = data["owners"].astype(np.uint32)
+                # FILES WRITTEN BEFORE THE ARRAYS WERE KEPT SORTED ARE SORTED ONCE HERE
+                order = np.argsort(keys, kind="stable")
+                self.keys, self.owners = keys[order], owners[order]
+                logger.info(f"dedup index : {len(self.keys)} ids loaded from {path}")
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Unreadable dedup index, starting fresh: {path} - {e}")
+
+    def __len__(self):
+        return len(self.keys) + len(self.recent_keys) + len(self.pending)
+
+    def _owner_id(self, owner):
+        """Helper: position of owner in names, added when new. Caller holds _lock."""
+        if owner not in self.names:
+            self.names.append(owner)
+        return self.names.index(owner)
+
+    def _lookup(self, hashes):
+        """Helper: owner id of every hash ( -1 = NEVER SEEN ), pending NOT INCLUDED. Caller holds _lock."""
+        owners = find_owners(self.keys, self.owners, hashes)
+        if len(self.recent_keys):
+            recent = find_owners(self.recent_keys, self.recent_owners, hashes)
+            owners = np.where(owners >= 0, owners, recent)
+        return owners
+
+    def _add(self, keys, owners):
+        """Helper: adds new sorted keys to the recent tier, merged into keys once it is big enough. Caller holds _lock."""
+        self.recent_keys, self.recent_owners = merge_sorted(self.recent_keys, self.recent_owners, keys, owners)
+        if len(self.recent_keys) > max(self.RECENT_MIN, len(self.keys) // 8):
+            self._compact()
+
+    def _compact(self):
+        """Helper: merges the recent tier into keys. Caller holds _lock."""
+        if len(self.recent_keys):
+            self.keys, self.owners = merge_sorted(self.keys, self.owners, self.recent_keys, self.recent_owners)
+            self.recent_keys   = np.empty(0, dtype=np.uint64)
+            self.recent_owners = np.empty(0, dtype=np.uint32)
+
+    def _flush(self):
+        """Helper: moves the pending claims to the sorted arrays. Caller holds _lock."""
+        if self.pending:
+            keys   = np.fromiter(self.pending.keys(), dtype=np.uint64, count=len(self.pending))
+            owners = np.fromiter(self.pending.values(), dtype=np.uint32, count=len(self.pending))
+            order  = np.argsort(keys)
+            self._add(keys[order], owners[order])
+            self.pending = {}
+
+    def owner(self, reddit_id):
+        """Owner of an id, None when it was never seen."""
+        key = id_hashes([reddit_id])[:1]
+        with self._lock:
+            owner = self.pending.get(int(key[0]))
+            if owner is None:
+                owner = int(self._lookup(key)[0])
+        return None if owner < 0 else self.names[owner]
+
+    def claim(self, reddit_id, owner):
+        """
+        True when reddit_id is new ( it now belongs to owner ) or already belongs to owner,
+        False when another owner saved it first.
+        """
+        key = id_hashes([reddit_id])[:1]
+        with self._lock:
+            owner_id = self._owner_id(owner)
+            found    = self.pending.get(int(key[0]))
+            if found is None:
+                found = int(self._lookup(key)[0])
+                if found < 0:
+                    found = self.pending[int(key[0])] = owner_id
+            return found == owner_id
+
+    def first_seen(self, ids, owner=""):
+        """
+        Boolean mask of the ids seen for the first time ( in this call or before ), all of them are marked as seen.
+        Repeated ids keep their first row only.
+        """
+        hashes = id_hashes(ids)
+        mask   = np.zeros(len(hashes), dtype=bool)
+        with self._lock:
+            owner_id = self._owner_id(owner)
+            self._flush()
+            # FIRST ROW OF EVERY DISTINCT HASH ( np.unique SORTS THEM, READY TO MERGE )
+            unique, first = np.unique(hashes, return_index=True)
+            new = self._lookup(unique) < 0
+            mask[first[new]] = True
+            self._add(unique[new], np.full(int(new.sum()), owner_id, dtype=np.uint32))
+        return mask
+
+    def save(self):
+        """Writes the index ( through a temp file ). No-op for an in-memory index."""
+        if not self.path:
+            return True, "in-memory index"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._lock:
+                self._flush()
+                self._compact()
+                names  = np.array(self.names, dtype=str)
+                tmp_path = f"{self.path}.tmp.npz"
+                np.savez(tmp_path, keys=self.keys, owners=self.owners, names=names)
+                os.replace(tmp_path, self.path)
+            return True, f"{len(self.keys)} ids written to {self.path}"
+        except Exception as e:
+            msg = f"Error writing dedup index: {self.path} - {e}"
+            logger.error(msg)
+            return False, str(e)
@@ -1,21 +1,184 @@
-from datetime import datetime
 from requests.exceptions import RequestException, JSONDecodeError
-from utils.file import read_csv, read_yaml
+from utils.file import read_config
+from utils.ratelimit import AdaptiveRateLimiter
+from utils.cache import ResponseCache, CachedResponse
+from utils.schema import OUTPUT_COLUMNS
+from utils import metrics
 import requests
+import threading
+import itertools
+import logging
 import time 
 import json
 
+# OPTIONAL FAST JSON DECODER ( requirements-optional.txt ), json IS USED WHEN IT IS MISSING
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # LOGGER
-from utils.logger import get_logger
+from utils.logger import get_logger, sampler, Progress
 logger = get_logger(__name__)
 
 # CONFIGURATION
-config         = read_yaml("./config.yaml")
+config         = read_config()
 http_config    = config[1]["http"]
 reddit_config  = config[1]["reddit"]
+cache_config   = config[1].get("cache", {})
+
+# SHARED RATE LIMITER
+# EVERY REQUEST ( SERIAL OR CONCURRENT ) DRAWS FROM THE SAME BUDGET
+limiter = AdaptiveRateLimiter( reddit_config.get("requests_per_second") or 1 / reddit_config["delay_between_requests"],
+                               max_rate      = reddit_config.get("max_requests_per_second"),
+                               low_watermark = reddit_config.get("ratelimit_low_watermark", 5) )
+
+# HTTP RESPONSE CACHE ( None = DISABLED )
+cache = ResponseCache( cache_config["path"],
+                       ttl         = cache_config.get("ttl", 3600),
+                       max_size_mb = cache_config.get("max_size_mb", 500) ) if cache_config.get("enabled") else None
+
+# PER COMMENT DEBUG LINES: ONE IN logging.comment_sample COMMENTS ( 0 = NONE )
+sample_comment = sampler(config[1].get("logging", {}).get("comment_sample", 100))
+
+# JSON DECODER OF THE RESPONSE BODIES
+# 'orjson' = FASTER DECODING OF LARGE COMMENT TREES WHEN orjson IS INSTALLED, 'json' = resp.json()
+use_orjson = http_config.get("json_decoder", "json") == "orjson" and orjson is not None
+
+# STOP FLAG, SET ON Ctrl-C ( main.py )
+# WORKERS STOP BETWEEN PAGES AND POSTS, A SENDER WAITING FOR THE RATE LIMITER GIVES UP AT ONCE
+stop_event = threading.Event()
+
+class Stopped(RequestException):
+    """Raised by http_get instead of sending a request once stop_event is set."""
+
+# ONE requests.Session PER THREAD
+# A Session IS NOT THREAD SAFE, EACH WORKER THREAD KEEPS ITS OWN CONNECTION POOL
+_local = threading.local()
+
+def thread_session():
+    """requests.Session of the calling thread, created on first use."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
 
+# HTTP STATUS CODES WORTH RETRYING
+# 429 = TOO MANY REQUESTS, 5xx = SERVER SIDE ERRORS
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+def http_get(URL, session=None, request_log=None, use_cache=True):
+    """
+    CACHED, RATE LIMITED GET WITH RETRY AND BACKOFF
+    APPENDS { url, status_code, wait_time, retries, cache } TO request_log WHEN GIVEN
+    use_cache=False ALWAYS ASKS THE SERVER AND STORES NOTHING ( EXCEPT IN OFFLINE MODE: NO REQUEST, A 504 )
+    session=None USES THE SESSION OF THE CALLING THREAD ( thread_session )
+    METRICS: http.request / ratelimit.wait SPANS, http.requests / http.retries / http.bytes / http.cache_* COUNTERS
+    """
+    
+    if session is None:
+        session = thread_session()
+    
+    max_retries  = reddit_config.get("max_retries", 3)
+    backoff_base = reddit_config.get("backoff_base", 2)
+    headers      = {'User-Agent': http_config['User-Agent']}
+    
+    wait_time = 0.0
+    resp      = None
+    attempt   = 0
+    cached    = None
+    status    = None   # hit | revalidated | miss | offline-miss
+    try:
+        # OFFLINE MODE: NEVER A REQUEST, WHATEVER use_cache SAYS
+        # 504 = NOT IN CACHE ( OR NOT SERVED FROM IT ) AND NOT ALLOWED TO ASK THE SERVER ( only-if-cached )
+        if cache_config.get("offline"):
+            cached = cache.get(URL) if cache is not None and use_cache else None
+            if cached is not None:
+                status = "hit"
+                resp   = cache.response(cached)
+            else:
+                status = "offline-miss"
+                resp   = CachedResponse(504, {}, b"")
+            return resp
+        
+        # CACHE LOOKUP
+        # FRESH ENTRY = NO REQUEST
+        # STALE ENTRY = CONDITIONAL REQUEST
+        if cache is not None and use_cache:
+            cached = cache.get(URL)
+            if cached is not None and cache.is_fresh(cached):
+                status = "hit"
+                resp   = cache.response(cached)
+                return resp
+            status = "miss"
+            if cached is not None:
+                headers.update(cache.conditional_headers(cached))
+        
+        while True:
+            waited     = limiter.acquire(stop_event)
+            wait_time += waited
+            metrics.observe("ratelimit.wait", waited, time.time() - waited)
+            if stop_event.is_set():
+                raise Stopped(f"stopped before requesting {URL}")
+            try:
+                metrics.count("http.requests")
+                with metrics.span("http.request"):
+                    resp = session.get( URL, 
+                                        headers = headers, 
+                                        timeout = http_config["timeout"] )
+            except RequestException:
+                # NETWORK ERROR, RETRY UNTIL THE LIMIT IS REACHED
+                if attempt >= max_retries:
+                    raise
+                limiter.retry_after({}, attempt, backoff_base)
+                attempt += 1
+                metrics.count("http.retries")
+                continue
+            
+            metrics.count("http.bytes", len(resp.content))
+            limiter.update(resp.headers)
+            if resp.status_code not in RETRY_STATUS or attempt >= max_retries:
+                if cache is not None and use_cache:
+                    # 304 = CACHED COPY STILL VALID
+                    if resp.status_code == 304 and cached is not None:
+                        cache.touch(URL)
+                        status = "revalidated"
+                        resp   = cache.response(cached)
+                    elif resp.status_code == 200:
+                        cache.put(URL, resp)
+                return resp
             
+            pause = limiter.retry_after(resp.headers, attempt, backoff_base)
+            logger.warning(f" - CODE {resp.status_code} - {URL} - retry {attempt + 1}/{max_retries} in {pause:.1f}s")
+            attempt += 1
+            metrics.count("http.retries")
+    finally:
+        if status is not None:
+            metrics.count("http.cache_" + status.replace("-", "_"))
+        if request_log is not None:
+            request_log.append({
+                "url": URL,
+                "status_code": resp.status_code if resp is not None else None,
+                "wait_time": round(wait_time, 2),
+                "retries": attempt,
+                "cache": status
+            })
+
+
+@metrics.timed("json.decode")
+def decode_json(resp):
+    """
+    RESPONSE BODY AS PYTHON OBJECTS ( SAME RESULT AS resp.json() )
+    DECODE ERRORS ARE RAISED AS requests' JSONDecodeError WHICHEVER DECODER IS USED
+    """
+    if not use_orjson:
+        return resp.json()
+    try:
+        return orjson.loads(resp.content)
+    except orjson.JSONDecodeError as e:
+        raise JSONDecodeError(e.msg, e.doc, e.pos)
+
 def extract_comment_data(data, post_id):
     """Helper: Extracts specific fields from a raw Reddit comment dictionary."""
     return {
@@ -25,105 +188,278 @@ def extract_comment_data(data, post_id):
         'parent_id': data.get('parent_id'),
         'author': data.get('author', '[deleted]'),
         'timestamp_utc': data.get('created_utc'),
-        'datetime': datetime.fromtimestamp(data['created_utc']).strftime('%Y-%m-%d %H:%M:%S') if data.get('created_utc') else 'N/A',
         'text': data.get('body', ''),
         'score': data.get('score', 0),
         'depth': data.get('depth', 0) 
     }
 
-def get_comment(comments_data, post_id, depth=0):
-    nest_cmm = []
-        
+# FIELDS OF A COMMENT ROW, IN extract_comment_data ORDER
+COMMENT_FIELDS = ['kind_desc', 'reddit_id', 'post_id', 'parent_id', 'author', 'timestamp_utc', 'text', 'score', 'depth']
+
+class CommentColumns:
+    """
+    Column buffers of flattened comments: one list per field instead of one dict per comment.
+    Usage: out = CommentColumns(); flatten_comments(children, post_id, out=out); append_csv(path, out.table([post]), OUTPUT_COLUMNS)
+    """
+
+    def __init__(self):
+        self.columns = {field: [] for field in COMMENT_FIELDS}
+
+    def __len__(self):
+        return len(self.columns['reddit_id'])
+
+    def append(self, data, post_id):
+        """Adds one raw comment ( same fields and defaults as extract_comment_data )."""
+        columns = self.columns
+        columns['kind_desc'].append('comment')
+        columns['reddit_id'].append(data.get('id'))
+        columns['post_id'].append(post_id)
+        columns['parent_id'].append(data.get('parent_id'))
+        columns['author'].append(data.get('author', '[deleted]'))
+        columns['timestamp_utc'].append(data.get('created_utc'))
+        columns['text'].append(data.get('body', ''))
+        columns['score'].append(data.get('score', 0))
+        columns['depth'].append(data.get('depth', 0))
+
+    def extend(self, other, skip_id=None, depth_shift=0):
+        """
+        Adds the comments of another buffer
+        skip_id     = reddit_id LEFT OUT ( e.g. THE PARENT OF A CONTINUE-THREAD PAGE )
+        depth_shift = ADDED TO EVERY depth
+        """
+        keep = None
+        if skip_id is not None:
+            keep = [reddit_id != skip_id for reddit_id in other.columns['reddit_id']]
+        for field, values in other.columns.items():
+            if keep is not None:
+                values = [value for value, kept in zip(values, keep) if kept]
+            if field == 'depth' and depth_shift:
+                values = [depth + depth_shift for depth in values]
+            self.columns[field].extend(values)
+
+    def table(self, head=(), columns=OUTPUT_COLUMNS):
+        """
+        Dict of column lists for frame() / append_csv / CorpusStore.upsert, no dict per comment:
+        THE ROWS OF head ( e.g. [post] ) FIRST, THEN THE COMMENTS, FIELDS A COMMENT DOES NOT HAVE ARE None
+        """
+        n = len(self)
+        return {column: [row.get(column) for row in head] + (self.columns[column] if column in self.columns else [None] * n)
+                for column in columns}
+
+    def rows(self):
+        """Comment rows as a list of dicts ( the shape of extract_comment_data )."""
+        return [{ 'kind_desc': kind_desc, 'reddit_id': reddit_id, 'post_id': post_id, 'parent_id': parent_id,
+                  'author': author, 'timestamp_utc': timestamp_utc, 'text': text, 'score': score, 'depth': depth }
+                for kind_desc, reddit_id, post_id, parent_id, author, timestamp_utc, text, score, depth
+                in zip(*(self.columns[field] for field in COMMENT_FIELDS))]
+
+@metrics.timed("comments.flatten")
+def flatten_comments(comments_data, post_id, depth=0, more=None, out=None):
+    """
+    FLATTEN COMMENTS AND NESTED REPLIES INTO COLUMN BUFFERS, RETURNS out
+    ITERATIVE ( EXPLICIT STACK ), SO THREADS OF ANY DEPTH STAY UNDER THE RECURSION LIMIT
+    ROWS COME OUT IN THE SAME ORDER AS A DEPTH FIRST WALK: EACH COMMENT, THEN ITS REPLIES
+    more = { 'children': [], 'continue': [] } COLLECTS THE 'more' STUBS WHEN GIVEN
+    """
+    
+    if out is None:
+        out = CommentColumns()
+    
     # SAFETY CHECK ( ENSURE COMMENTS DATA IS A LIST )
     if not isinstance(comments_data, list):
-        return nest_cmm
+        return out
     
-    # LOGGER BASE DEPTH
-    # Level 0 = "", Level 1 = "  ", Level 2 = "    "
-    indent = "    " * depth
+    # PER COMMENT LOG LINES ARE SAMPLED, AND ONLY FORMATTED WHEN THEY ARE WRITTEN
+    log_comments = logger.isEnabledFor(logging.DEBUG)
+    append = out.append
+    rows_before = len(out)
     
-    for item in comments_data:
-        # CHECK IF ITEM IS VALID
-        if isinstance(item, dict) and 'kind' in item:
+    # STACK OF ( REMAINING SIBLINGS, DEPTH ), THE TOP IS THE LEVEL BEING WALKED
+    stack = [(iter(comments_data), depth)]
+    while stack:
+        items, depth = stack[-1]
+        for item in items:
+            # CHECK IF ITEM IS VALID
+            if not (isinstance(item, dict) and 'kind' in item):
+                continue
             kind = item['kind']
             data = item['data']
-
+            
             # t1 IN REDDIT MEANS COMMENT
             if kind == 't1':
-                
-                # EXTRACT COMMENT DATA
-                extract_cmm_data = extract_comment_data(data, post_id)
-                nest_cmm.append(extract_cmm_data)
+                append(data, post_id)
                 
                 # LOG THE COMMENT INFO
-                logger.info(f"{indent}[L{depth}] -- {extract_cmm_data['reddit_id']} -- {extract_cmm_data['text'][:30]}...")
-                
-                # INITIALIZE LIST FOR NESTED CHILDREN
-                nested_children = []
+                # Level 0 = "", Level 1 = "  ", Level 2 = "    "
+                if log_comments and sample_comment():
+                    logger.debug("%s[L%d] -- %s -- %.30s...", "    " * depth, depth, data.get('id'), data.get('body', ''))
                 
-                # CHECK FOR NESTED REPLIES
+                # NESTED REPLIES ARE WALKED BEFORE THE NEXT SIBLING
                 replies_raw = data.get('replies', '')
                 if isinstance(replies_raw, dict) and 'data' in replies_raw:
-                    
-                    # GET NESTED CHILDREN COMMENTS
                     nested_children = replies_raw['data'].get('children', [])
-
-                    # RECURSIVELY PROCESS NESTED CHILD COMMENTS
-                    child_comments = get_comment(nested_children, post_id, depth + 1)
-                    
-                    # ADD CHILD COMMENTS TO THE MAIN LIST
-                    nest_cmm.extend(child_comments)
-                    
+                    if isinstance(nested_children, list):
+                        stack.append((iter(nested_children), depth + 1))
+                        break
+            
             # 'more' KIND HANDLES ADDITIONAL COMMENTS NOT LOADED INITIALLY ( THE LAZY LOADING )
-            elif kind == 'more':
-                pass
+            elif kind == 'more' and more is not None:
+                
+                # STUB WITH CHILD IDS  = LOADED THROUGH /api/morechildren
+                # STUB WITHOUT IDS     = "CONTINUE THIS THREAD" LINK, LOADED FROM THE PARENT COMMENT PAGE
+                if data.get('children'):
+                    more['children'].extend(data['children'])
+                elif data.get('parent_id', '').startswith('t1_'):
+                    more['continue'].append((data['parent_id'][3:], data.get('depth', depth)))
+        else:
+            # LEVEL FINISHED, BACK TO THE PARENT'S SIBLINGS
+            stack.pop()
+    
+    metrics.count("comments.flattened", len(out) - rows_before)
+    return out
 
-    return nest_cmm
+def get_comment(comments_data, post_id, depth=0, more=None):
+    """
+    FLATTEN COMMENTS AND NESTED REPLIES
+    more = { 'children': [], 'continue': [] } COLLECTS THE 'more' STUBS WHEN GIVEN
+    """
+    return flatten_comments(comments_data, post_id, depth, more).rows()
+
+def comment_url(post_id):
+    """Builds the comment tree URL for a post id."""
+    return reddit_config["comment_base_url"].format(POST_ID = post_id)
 
-def fetct_comment(CSV_ID, SUBREDDIT, posts):
+def parse_comment_tree(comments_data, post_id, more=None, out=None):
+    """
+    FLATTEN A COMMENT TREE RESPONSE INTO COMMENT ROWS
+    out = CommentColumns TO FILL ( THE COLUMNS ARE RETURNED INSTEAD OF ROWS )
+    """
     
+    # THE COMMENTS JSON RETURNS A LIST OF TWO ELEMENTS:
+    # [0] IS THE POST DATA, [1] IS THE COMMENTS LISTING
+    if (isinstance(comments_data, list) and len(comments_data) > 1 
+                                        and 'data' in comments_data[1] 
+                                        and 'children' in comments_data[1]['data']):
+        
+        # ROOT LEVEL CHILDREN COMMENTS
+        root_children = comments_data[1]['data']['children']
+        
+        # PROCESS COMMENTS AND NESTED REPLIES
+        columns = flatten_comments(root_children, post_id, more=more, out=out)
+        return columns if out is not None else columns.rows()
+    
+    return out if out is not None else []
+
+def morechildren_url(post_id, children):
+    """Builds the /api/morechildren URL for a batch of comment ids."""
+    return reddit_config["morechildren_url"].format(POST_ID = post_id, CHILDREN = ",".join(children))
+
+def thread_url(post_id, comment_id):
+    """Builds the URL of a "continue this thread" page."""
+    return reddit_config["thread_url"].format(POST_ID = post_id, COMMENT_ID = comment_id)
+
+def expand_more_comments(post_id, more, session=None, request_log=None, out=None):
     """
-    ITERATE THROUGH EACH POST ID AND FETCH COMMENTS
+    LOAD THE COMMENTS HIDDEN BEHIND 'more' STUBS
+    CHILD IDS ARE SENT TO /api/morechildren IN BATCHES OF UP TO 100,
+    CONTINUE-THREAD LINKS ARE LOADED ONE PAGE PER PARENT COMMENT.
+    NEW STUBS FOUND IN THE RESULTS ARE EXPANDED IN THE NEXT ROUND.
+    out = CommentColumns TO FILL ( THE COLUMNS ARE RETURNED INSTEAD OF ROWS )
+    """
+    
+    batch_size = min(reddit_config.get("morechildren_batch", 100), 100)
+    max_rounds = reddit_config.get("more_max_rounds", 10)
+    
+    expanded = CommentColumns() if out is None else out
+    for _ in range(max_rounds):
+        if not more['children'] and not more['continue']:
+            break
+        
+        children, more['children'] = more['children'], []
+        continues, more['continue'] = more['continue'], []
+        
+        # MORECHILDREN RETURNS A FLAT LIST OF THINGS,
+        # EACH ONE ALREADY CARRYING ITS OWN parent_id AND depth
+        for start in range(0, len(children), batch_size):
+            resp = http_get(morechildren_url(post_id, children[start:start + batch_size]), session, request_log)
+            if resp.status_code != 200:
+                logger.info(f" - Error Fetch more {post_id}: CODE {resp.status_code}")
+                continue
+            things = decode_json(resp).get('json', {}).get('data', {}).get('things', [])
+            flatten_comments(things, post_id, more=more, out=expanded)
+        
+        # CONTINUE-THREAD PAGES ARE ROOTED AT THE PARENT COMMENT ( depth 0 )
+        # SKIP THE PARENT ( ALREADY SAVED ) AND SHIFT THE REPLIES TO THEIR REAL DEPTH
+        for parent_id, child_depth in continues:
+            resp = http_get(thread_url(post_id, parent_id), session, request_log)
+            if resp.status_code != 200:
+                logger.info(f" - Error Fetch thread {post_id}/{parent_id}: CODE {resp.status_code}")
+                continue
+            thread_more = {'children': [], 'continue': []}
+            thread      = parse_comment_tree(decode_json(resp), post_id, thread_more, CommentColumns())
+            expanded.extend(thread, skip_id = parent_id, depth_shift = child_depth - 1)
+            more['children'].extend(thread_more['children'])
+            more['continue'].extend((cid, d + child_depth - 1) for cid, d in thread_more['continue'])
+    
+    if more['children'] or more['continue']:
+        logger.warning(f" - POST {post_id} - {len(more['children']) + len(more['continue'])} 'more' stubs left after {max_rounds} rounds")
+    
+    return expanded if out is not None else expanded.rows()
+
+@metrics.timed("comments.tree")
+def fetch_comment_tree(post_id, session=None, request_log=None):
+    """
+    FETCH ONE POST'S COMMENT TREE AND EXPAND ITS 'more' STUBS, AS CommentColumns
+    None WHEN THE TREE COULD NOT BE FETCHED ( NOT 200: 429 / 5xx AFTER THE RETRIES, OFFLINE MISS, ... )
+    """
+    
+    resp = http_get(comment_url(post_id), session, request_log)
+    if resp.status_code != 200:
+        logger.info(f" - Error Fetch cmm  {post_id}: CODE {resp.status_code}")
+        return None
+    
+    # PROCESS COMMENTS AND NESTED REPLIES
+    # THE TREE AND ITS EXPANSIONS FILL THE SAME COLUMN BUFFERS, RETURNED AS THEY ARE ( NO DICT PER COMMENT )
+    more     = {'children': [], 'continue': []}
+    comments = parse_comment_tree(decode_json(resp), post_id, more, CommentColumns())
+    
+    # LOAD REPLIES HIDDEN BEHIND 'more' STUBS
+    if reddit_config.get("expand_more", True):
+        expand_more_comments(post_id, more, session, request_log, out=comments)
+    
+    return comments
+
+def fetct_comment(CSV_ID, SUBREDDIT, posts, request_log=None, on_post_done=None):
+    
+    """
+    ITERATE THROUGH EACH POST ID AND FETCH COMMENTS, RETURNS THE COMMENTS OF ALL POSTS AS CommentColumns
+    on_post_done(post, comments) IS CALLED AS SOON AS A POST'S TREE IS FINISHED ( comments = ITS CommentColumns ),
+    comments = None WHEN THE TREE COULD NOT BE FETCHED ( THE POST MUST NOT BE MARKED AS DONE )
     """
 
     # GATHER COMMENTS AND NESTED COMMENTS
-    comments = []
+    comments = CommentColumns()
+    progress = Progress(logger, f"CSV ID {CSV_ID} - SUBREDDIT {SUBREDDIT}", total = len(posts))
     for i, post in enumerate(posts):
+        
+        # Ctrl-C: THE REMAINING POSTS ARE LEFT FOR --resume
+        if stop_event.is_set():
+            break
+
+        nested_comment = None
 
         # CURRENT POST ID
         current_post_id = post["reddit_id"]
         post_title = post.get("title", "Unknown Title")
         
-        logger.info(f"------------------------------------------")
-        logger.info(f"PROCESSING POST {i+1}/{len(posts)}: ID {current_post_id}")
-        logger.info(f"Title: {post_title[:60]}...")
-        logger.info(f"------------------------------------------")
+        logger.debug("PROCESSING POST %d/%d: ID %s - Title: %.60s...", i + 1, len(posts), current_post_id, post_title)
         
-        # MULTATE REDDIT COMMENT URL WITH CURRENT POST ID
-        URL = f"{reddit_config["comment_base_url"].format(POST_ID = current_post_id)}"
         try:
-            headers = {'User-Agent': http_config['User-Agent']}
-            resp = requests.get(
-                                    URL, 
-                                    headers = headers, 
-                                    timeout = http_config["timeout"] )
+            # COMMENT TREE WITH 'more' STUBS EXPANDED
+            nested_comment = fetch_comment_tree(current_post_id, request_log = request_log)
             
-            # THE COMMENTS JSON RETURNS A LIST OF TWO ELEMENTS:
-            # [0] IS THE POST DATA, [1] IS THE COMMENTS LISTING
-            comments_data = resp.json()
-            
-
-            if (isinstance(comments_data, list) and len(comments_data) > 1 
-                                                and 'data' in comments_data[1] 
-                                                and 'children' in comments_data[1]['data']):
-                
-                # ROOT LEVEL CHILDREN COMMENTS
-                root_children = comments_data[1]['data']['children']
-                
-                # RECURSIVELY PROCESS COMMENTS AND NESTED REPLIES
-                nested_comment = get_comment(root_children, post["reddit_id"])
-                
-                # ADD TO THE MAIN COMMENTS LIST
+            # ADD TO THE MAIN COMMENTS LIST
+            if nested_comment is not None:
                 comments.extend(nested_comment)
 
         except requests.exceptions.RequestException as e:
@@ -133,83 +469,180 @@ def fetct_comment(CSV_ID, SUBREDDIT, posts):
         except Exception as e:
             logger.info(f" - General error: {e}")
 
-        # DELAY BETWEEN REQUESTS
-        time.sleep(reddit_config["delay_between_requests"]) 
+        if on_post_done is not None:
+            on_post_done(post, nested_comment)
+        
+        # PROGRESS LINE EVERY logging.progress_interval SECONDS
+        progress.add(posts = 1, comments = len(nested_comment or []))
+
+    if posts:
+        progress.close()
 
     return comments
 
+@metrics.timed("posts.parse")
+def parse_listing(CSV_ID, SUBREDDIT, posts_data):
+    """Helper: Extracts non-stickied post rows from a decoded listing."""
+    
+    # CHECK IF SUBREDDIT POSTS EXIST
+    posts = []
+    if 'data' in posts_data and 'children' in posts_data['data']:
+        for post in posts_data['data']['children']:
+                
+            post_data = post['data']
+            kind      = post['kind']
+            
+            # SKIP STICKIED POSTS
+            if post_data.get('stickied'):
+                continue
+            
+            # COLLECT POST DATA
+            posts.append({
+                'csv_id' : CSV_ID,
+                'kind'   : kind,
+                'kind_desc' : 'post',
+                'reddit_id' : post_data['id'],
+                'title'  : post_data['title'],
+                'author' : post_data.get('author', '[deleted]'),
+                'timestamp_utc': post_data['created_utc'],
+                'text'   : post_data.get('selftext', ''),
+                'score'  : post_data.get('score', 0),
+                'num_comments': post_data.get('num_comments', 0),
+                # 'url'    : post_data.get('url', '')
+            })
+    else:
+        logger.warning(f" CSV ID {CSV_ID} - SUBREDDIT {SUBREDDIT} - No posts found in the subreddit response.")
+    
+    return posts
+
 def get_post(CSV_ID, SUBREDDIT, resp): 
     
     # CHECK RESPONSE CONTENT TYPE
+    posts = []
     resp_content_type = resp.headers.get('Content-Type', '').lower()
     if 'application/json' in resp_content_type:
         
         # JSON RESPONSE
-        posts_data = resp.json()
-        
-        # CHECK IF SUBREDDIT POSTS EXIST
-        posts = []
-        if 'data' in posts_data and 'children' in posts_data['data']:
-            for post in posts_data['data']['children']:
-                    
-                post_data = post['data']
-                kind      = post['kind']
-                
-                # SKIP STICKIED POSTS
-                if post_data.get('stickied'):
-                    continue
-                
-                # COLLECT POST DATA
-                posts.append({
-                    'csv_id' : CSV_ID,
-                    'kind'   : kind,
-                    'kind_desc' : 'post',
-                    'reddit_id' : post_data['id'],
-                    'title'  : post_data['title'],
-                    'author' : post_data.get('author', '[deleted]'),
-                    'timestamp_utc': post_data['created_utc'],
-                    'datetime': datetime.fromtimestamp(post_data['created_utc']).strftime('%Y-%m-%d %H:%M:%S'),
-                    'text'   : post_data.get('selftext', ''),
-                    'score'  : post_data.get('score', 0),
-                    'num_comments': post_data.get('num_comments', 0),
-                    # 'url'    : post_data.get('url', '')
-                })
-        else:
-            logger.warning(f" CSV ID {CSV_ID} - SUBREDDIT {SUBREDDIT} - No posts found in the subreddit response.")
+        posts = parse_listing(CSV_ID, SUBREDDIT, decode_json(resp))
     else:
-        logger.warning(" CSV ID {CSV_ID} - SUBREDDIT {SUBREDDIT} - unexpected JSON structure.")     
+        logger.warning(f" CSV ID {CSV_ID} - SUBREDDIT {SUBREDDIT} - unexpected JSON structure.")     
     
     return posts
+
+def post_page_url(SUBREDDIT, after=None):
+    """Builds the listing URL for one page, after = FULLNAME OF THE LAST POST OF THE PREVIOUS PAGE."""
+    URL = reddit_config["post_base_url"].format(SUBREDDIT = SUBREDDIT)
+    URL = f"{URL}?limit={reddit_config.get('page_limit', 100)}"
+    if after:
+        URL = f"{URL}&after={after}"
+    return URL
+
+def iter_post_pages( CSV_ID, SUBREDDIT, request_log=None ):
+    
+    """
+    WALK THE SUBREDDIT LISTING WITH THE after CURSOR, YIELD ONE LIST OF POSTS PER PAGE
+    STOPS AT max_pages, max_posts, THE LAST PAGE OR WHEN A PAGE IS OLDER THAN created_after_utc
+    max_pages / max_posts / created_after_utc = null ( OR 0 ) MEANS NO LIMIT
+    """
+    
+    max_pages     = reddit_config.get("max_pages")
+    max_posts     = reddit_config.get("max_posts")
+    created_after = reddit_config.get("created_after_utc")
+    
+    after       = None
+    total_posts = 0
+    for page in (range(max_pages) if max_pages else itertools.count()):
+        if stop_event.is_set():
+            return
+        URL = post_page_url(SUBREDDIT, after)
+        try:
+            # HTTP REQUEST ( 429 / 5xx ARE RETRIED INSIDE http_get )
+            resp = http_get(URL, request_log = request_log)
             
-def fetch_post( CSV_ID, SUBREDDIT ):
+            # HTTP RESPONSE CODE
+            # 200 = SUCCESS
+            # 429 = TOO MANY REQUESTS ( RETRIES EXHAUSTED )
+            resp_code = resp.status_code
+            if resp_code != 200:
+                logger.error(f"  ~~~~~ CSV ID {CSV_ID} - CODE {resp_code} - SUBREDDIT {SUBREDDIT} - PAGE {page + 1} - Found 0 posts non-stickied ~~~~~")
+                return
+            
+            if 'application/json' not in resp.headers.get('Content-Type', '').lower():
+                logger.warning(f" CSV ID {CSV_ID} - SUBREDDIT {SUBREDDIT} - unexpected JSON structure.")
+                return
+            
+            posts_data = decode_json(resp)
+            posts      = parse_listing(CSV_ID, SUBREDDIT, posts_data)
+            
+        except RequestException as e:
+            logger.error(f" \n ~~~~~ CSV ID {CSV_ID} - Fail Request - SUBREDDIT {SUBREDDIT} - {e}")
+            return
+        except JSONDecodeError:
+            logger.error(f" \n ~~~~~ CSV ID {CSV_ID} - Failed To Decode JSON - SUBREDDIT {SUBREDDIT}")
+            return
+        except Exception as e:
+            logger.error(f" \n ~~~~~ CSV ID {CSV_ID} - Unexpected Error - SUBREDDIT {SUBREDDIT} - {e}")
+            return
+        
+        # DATE CUTOFF
+        # LISTINGS ARE NOT ALWAYS CHRONOLOGICAL ( hot ), SO ONLY STOP WHEN A WHOLE PAGE IS TOO OLD
+        page_size = len(posts)
+        if created_after:
+            posts = [post for post in posts if post['timestamp_utc'] >= created_after]
+        
+        # POST LIMIT
+        if max_posts:
+            posts = posts[:max_posts - total_posts]
+        total_posts += len(posts)
+        
+        logger.info(f"  ~~~~~ CSV ID {CSV_ID} - CODE {resp_code} - SUBREDDIT {SUBREDDIT} - PAGE {page + 1} - Found {len(posts)} posts non-stickied ~~~~~")
+        if posts:
+            yield posts
+        
+        after = posts_data.get('data', {}).get('after')
+        if (not after 
+            or (max_posts and total_posts >= max_posts) 
+            or (created_after and page_size and not posts)):
+            return
+
+def fetch_post( CSV_ID, SUBREDDIT, request_log=None ):
     
-    # REDDIT POST URL 
-    URL = f"{reddit_config["post_base_url"].format(SUBREDDIT = SUBREDDIT)}"
+    """
+    COLLECT ALL PAGES OF POSTS INTO ONE LIST
+    """
     
     all_posts = []
-    try:
-        # HTTP REQUEST
-        headers = {'User-Agent': http_config['User-Agent']}
-        resp = requests.get(    URL,
-                                headers = headers, 
-                                timeout = http_config["timeout"] )
-        
-        # HTTP RESPONSE CODE
-        # 200 = SUCCESS
-        # 429 = TOO MANY REQUESTS
-        resp_code = resp.status_code
-        if resp_code == 200 or resp_code == 429:
-            posts  =  get_post(CSV_ID, SUBREDDIT, resp)
-            all_posts.extend(posts)
-            logger.info(f"  ~~~~~ CSV ID {CSV_ID} - CODE {resp_code} - SUBREDDIT {SUBREDDIT} - Found {len(posts)} posts non-stickied ~~~~~")
-        else:
-            logger.error(f"  ~~~~~ CSV ID {CSV_ID} - CODE {resp_code} - SUBREDDIT {SUBREDDIT} - Found 0 posts non-stickied ~~~~~")
-         
-    except RequestException as e:
-        logger.error(f" \n ~~~~~ CSV ID {CSV_ID} - Fail Request - SUBREDDIT {SUBREDDIT} - {e}")
-    except JSONDecodeError:
-        logger.error(f" \n ~~~~~ CSV ID {CSV_ID} - Failed To Decode JSON - SUBREDDIT {SUBREDDIT}")
-    except Exception as e:
-        logger.error(f" \n ~~~~~ CSV ID {CSV_ID} - Unexpected Error - SUBREDDIT {SUBREDDIT} - {e}")
-    
-    return  all_posts
\ No newline at end of file
+    for posts in iter_post_pages(CSV_ID, SUBREDDIT, request_log):
+        all_posts.extend(posts)
+    
+    return  all_posts
+
+
+def info_url(fullnames):
+    """Builds the /api/info URL for a batch of fullnames ( t3_xxx / t1_xxx )."""
+    return reddit_config["info_url"].format(IDS = ",".join(fullnames))
+
+def fetch_info(fullnames, request_log=None):
+    
+    """
+    LOOK UP CURRENT DATA OF POSTS AND COMMENTS BY FULLNAME, 100 PER REQUEST
+    YIELDS THE data DICT OF EVERY THING RETURNED
+    """
+    
+    batch_size = min(reddit_config.get("info_batch", 100), 100)
+    for start in range(0, len(fullnames), batch_size):
+        batch = fullnames[start:start + batch_size]
+        try:
+            # ALWAYS LIVE, A CACHED COPY WOULD DEFEAT THE REFRESH
+            resp = http_get(info_url(batch), request_log = request_log, use_cache = False)
+            if resp.status_code != 200:
+                logger.error(f"  ~~~~~ CODE {resp.status_code} - /api/info batch {start // batch_size + 1} failed ~~~~~")
+                continue
+            
+            for thing in decode_json(resp).get('data', {}).get('children', []):
+                yield thing['data']
+                
+        except RequestException as e:
+            logger.error(f" ~~~~~ Fail Request - /api/info - {e}")
+        except JSONDecodeError:
+            logger.error(" ~~~~~ Failed To Decode JSON - /api/info")
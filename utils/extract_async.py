@@ -0,0 +1,78 @@
+from requests.exceptions import RequestException, JSONDecodeError
+from utils.file import read_config
+from utils.extract import fetch_comment_tree, stop_event, CommentColumns
+import asyncio
+
+
+# LOGGER
+from utils.logger import get_logger, Progress
+logger = get_logger(__name__)
+
+# CONFIGURATION
+config         = read_config()
+reddit_config  = config[1]["reddit"]
+
+
+async def fetch_post_comments(semaphore, post, request_log=None, on_post_done=None, progress=None):
+    """
+    FETCH AND FLATTEN THE COMMENT TREE OF A SINGLE POST
+    None WHEN THE TREE COULD NOT BE FETCHED ( SEE fetct_comment )
+    """
+
+    current_post_id = post["reddit_id"]
+    nested_comment  = None
+
+    async with semaphore:
+        # Ctrl-C: POSTS NOT STARTED YET ARE LEFT FOR --resume
+        if stop_event.is_set():
+            return None
+        try:
+            # requests IS BLOCKING, RUN IT IN THE DEFAULT THREAD POOL
+            # THE SHARED LIMITER AND RETRIES LIVE INSIDE http_get, EACH POOL THREAD USES ITS OWN Session
+            nested_comment = await asyncio.to_thread(fetch_comment_tree, current_post_id, None, request_log)
+            logger.debug("  ~~~~~ POST %s - Found %d comments ~~~~~", current_post_id, len(nested_comment or []))
+
+        except RequestException as e:
+            logger.info(f" - Error Fetch cmm  {current_post_id}: {e}")
+        except JSONDecodeError:
+            logger.info(f" - Error decoding JSON for post {current_post_id}.")
+        except Exception as e:
+            logger.info(f" - General error: {e}")
+
+    # RUNS ON THE EVENT LOOP THREAD, CALLBACKS NEVER OVERLAP
+    if on_post_done is not None:
+        on_post_done(post, nested_comment)
+    if progress is not None:
+        progress.add(posts = 1, comments = len(nested_comment or []))
+
+    return nested_comment
+
+async def fetct_comment_async(CSV_ID, SUBREDDIT, posts, request_log=None, on_post_done=None):
+
+    """
+    FETCH COMMENTS OF ALL POSTS CONCURRENTLY
+    """
+
+    max_concurrency = reddit_config.get("max_concurrency", 4)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    logger.info(f"  ~~~~~ CSV ID {CSV_ID} - SUBREDDIT {SUBREDDIT} - fetching {len(posts)} comment trees, {max_concurrency} in flight ~~~~~")
+
+    # PROGRESS LINE EVERY logging.progress_interval SECONDS
+    progress = Progress(logger, f"CSV ID {CSV_ID} - SUBREDDIT {SUBREDDIT}", total = len(posts))
+    tasks   = [fetch_post_comments(semaphore, post, request_log, on_post_done, progress) for post in posts]
+    results = await asyncio.gather(*tasks)
+    if posts:
+        progress.close()
+
+    # KEEP THE SAME ROW ORDER AS THE SERIAL ENGINE
+    comments = CommentColumns()
+    for nested_comment in results:
+        if nested_comment is not None:
+            comments.extend(nested_comment)
+
+    return comments
+
+def fetch_comment_concurrent(CSV_ID, SUBREDDIT, posts, request_log=None, on_post_done=None):
+    """Sync entry point for main.py, same signature and comments as fetct_comment."""
+    return asyncio.run(fetct_comment_async(CSV_ID, SUBREDDIT, posts, request_log, on_post_done))
@@ -1,27 +1,42 @@
 import pandas as pd
 import yaml
 import json 
+import csv
+import os
+import io
+import shutil
+
+from utils.schema import frame, read_frame
 
 # LOGGER
 from utils.logger import get_logger
 logger = get_logger(__name__)
 
-def read_csv(file_path):
-    print ( "file_path : " ,file_path)
-    
-    """Reads a CSV file and returns a DataFrame"""
+# SECTIONS AND KEYS EVERY STAGE NEEDS IN config.yaml ( CHECKED BY validate_config )
+CONFIG_SCHEMA = {
+    "http":      ["User-Agent", "timeout"],
+    "file_path": ["input_csv", "output_csv", "journal_path"],
+    "reddit":    ["post_base_url", "comment_base_url", "morechildren_url", "thread_url", "info_url",
+                  "delay_between_requests", "dedup_index_path"],
+    "cache":     ["path"],
+    "report":    ["output_file"],
+    "cleaning":  ["output_report", "output_path", "word_length", "author_filter_trigger", "author_filter"],
+    "ner":       ["model", "cache_path", "output_path", "output_report"],
+}
+
+# config.yaml OF THIS PROCESS ( SEE read_config )
+_config = None
+
+def read_rows(file_path):
+    """Reads a CSV file and returns its rows as a list of dicts ( values as text )"""
     try:
-        data = pd.read_csv(file_path)
-        return True, data.to_json(orient='records')
+        with open(file_path, 'r', newline='', encoding='utf-8') as file:
+            return True, list(csv.DictReader(file))
     except FileNotFoundError as e:
         msg= f"File not found: {file_path} - {e}"
         logger.error(msg)
         return False, str(e)
-    except pd.errors.EmptyDataError:
-        msg = f"No data: {file_path} is empty."
-        logger.warning(msg)
-        return False, msg
-    
+
 def read_yaml(file_path):
     """Reads a YAML file and returns the data"""
     
@@ -38,14 +53,107 @@ def read_yaml(file_path):
         logger.error(msg)
         return False, str(e)
     
+
+def read_config(file_path="./config.yaml"):
+    """
+    Reads config.yaml once per process, every module shares the same ( bool, data ) result
+    Usage: config = read_config(); reddit_config = config[1]["reddit"]
+    """
+    global _config
+    if _config is None:
+        _config = read_yaml(file_path)
+    return _config
+
+def validate_config(data, sections=CONFIG_SCHEMA):
+    """Checks that the given sections of the config ( and their keys, see CONFIG_SCHEMA ) are present"""
+    if not isinstance(data, dict):
+        msg = "config.yaml is empty or not a mapping"
+        logger.error(msg)
+        return False, msg
+    missing = []
+    for section in sections:
+        if not isinstance(data.get(section), dict):
+            missing.append(section)
+            continue
+        missing.extend(f"{section}.{key}" for key in CONFIG_SCHEMA.get(section, []) if key not in data[section])
+    if missing:
+        msg = f"Missing in config.yaml: {', '.join(missing)}"
+        logger.error(msg)
+        return False, msg
+    return True, "config.yaml is valid"
     
 def write_json(file_path, data):
-    """Writes data to a JSON file"""
+    """Writes data to a JSON file ( through a temp file, a crash never leaves a half written file )"""
     try:
-        with open(file_path, 'w') as file:
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, 'w') as file:
             json.dump(data, file, indent=4)
+        os.replace(tmp_path, file_path)
         return True, f"Data successfully written to {file_path}"
     except Exception as e:
         msg = f"Error writing to JSON file: {file_path} - {e}"
         logger.error(msg)
-        return False, str(e)
\ No newline at end of file
+        return False, str(e)
+    
+def append_csv(file_path, rows, columns):
+    """Appends rows (list of dicts, or dict of column lists) to a CSV file with the shared dtypes, writes the header only when the file is new or empty"""
+    try:
+        df = frame(rows, columns)
+        new_file = not os.path.exists(file_path) or os.path.getsize(file_path) == 0
+        df.to_csv(file_path, mode='a', index=False, header=new_file)
+        return True, f"{len(df)} rows appended to {file_path}"
+    except Exception as e:
+        msg = f"Error appending to CSV file: {file_path} - {e}"
+        logger.error(msg)
+        return False, str(e)
+    
+def dedupe_csv(file_path, key):
+    """Drops repeated rows by key column, the last ( most recent ) copy is kept. Rows are rewritten with the shared dtypes."""
+    try:
+        df = read_frame(file_path)
+        rows_before = len(df)
+        df = df.drop_duplicates(subset=key, keep='last')
+        df.to_csv(file_path, index=False)
+        return True, rows_before - len(df)
+    except Exception as e:
+        msg = f"Error removing duplicates from CSV file: {file_path} - {e}"
+        logger.error(msg)
+        return False, str(e)
+    
+def join_csv(parts, output_csv, row_filter=None):
+    """
+    Joins CSV files into output_csv in the given order.
+    PARTS WITH THE SAME HEADER ARE COPIED BYTE FOR BYTE, OTHERS ARE ALIGNED TO THE FIRST HEADER
+    row_filter(i, part) = BOOLEAN MASK OF THE ROWS OF parts[i] TO KEEP ( None = ALL ROWS )
+    """
+    try:
+        header = None
+        with open(output_csv, 'wb') as out:
+            for i, part in enumerate(parts):
+                keep = row_filter(i, part) if row_filter is not None else None
+                if keep is not None and keep.all():
+                    keep = None
+                
+                with open(part, 'rb') as file:
+                    first_line = file.readline()
+                    if header is None:
+                        header = first_line
+                        out.write(first_line)
+                    if first_line == header and keep is None:
+                        shutil.copyfileobj(file, out)
+                        continue
+
+                # DIFFERENT COLUMNS OR DROPPED ROWS, REWRITE THE VALUES AS READ IN THE OUTPUT LAYOUT
+                out_columns = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+                offset = 0
+                for chunk in pd.read_csv(part, dtype=str, na_filter=False, chunksize=50000):
+                    if keep is not None:
+                        chunk_keep = keep[offset:offset + len(chunk)]
+                        offset    += len(chunk)
+                        chunk      = chunk[chunk_keep]
+                    out.write(chunk.reindex(columns=out_columns).to_csv(index=False, header=False).encode('utf-8'))
+        return True, f"{len(parts)} files joined into {output_csv}"
+    except Exception as e:
+        msg = f"Error joining CSV files into: {output_csv} - {e}"
+        logger.error(msg)
+        return False, str(e)
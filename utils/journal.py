@@ -0,0 +1,112 @@
+import json
+import os
+import time
+
+from utils.file import write_json
+
+# LOGGER
+from utils.logger import get_logger
+logger = get_logger(__name__)
+
+
+class PostJournal:
+    """
+    Append-only log of the posts of one subreddit already saved to its output CSV.
+    EACH LINE = reddit_id <TAB> SIZE OF THE OUTPUT CSV AFTER THE POST'S ROWS WERE WRITTEN
+    ON RESUME THE CSV IS CUT BACK TO THE LAST LOGGED SIZE, SO A POST INTERRUPTED
+    HALFWAY THROUGH ITS WRITE LEAVES NO PARTIAL OR DUPLICATE ROWS.
+    """
+
+    START = "__start__"
+
+    def __init__(self, folder: str, subreddit: str, output_csv: str, resume: bool = False):
+        os.makedirs(folder, exist_ok=True)
+        self.path       = self.path_for(folder, subreddit)
+        self.output_csv = output_csv
+        self.done       = set()
+
+        if resume and os.path.exists(self.path):
+            self._recover()
+            self._file = open(self.path, 'a')
+        else:
+            self._file = open(self.path, 'w')
+            self._append(self.START)
+
+    @staticmethod
+    def path_for(folder, subreddit):
+        return os.path.join(folder, f"journal_{subreddit}.log")
+
+    def _csv_size(self):
+        return os.path.getsize(self.output_csv) if os.path.exists(self.output_csv) else 0
+
+    def _recover(self):
+        """Helper: reloads finished posts and cuts the output CSV back to the last committed size."""
+        size  = 0
+        lines = []
+        with open(self.path, 'r') as file:
+            for line in file:
+                parts = line.rstrip("\n").split("\t")
+                if not line.endswith("\n") or len(parts) != 2:
+                    # TORN LAST LINE, THE POST WAS NOT COMMITTED
+                    break
+                post_id, size = parts[0], int(parts[1])
+                if post_id != self.START:
+                    self.done.add(post_id)
+                lines.append(line)
+        
+        # DROP THE TORN LINE SO NEW ENTRIES START ON A CLEAN LINE
+        with open(self.path, 'w') as file:
+            file.writelines(lines)
+
+        if self._csv_size() > size:
+            with open(self.output_csv, 'r+b') as file:
+                file.truncate(size)
+            logger.info(f"resume : cut {self.output_csv} back to {size} bytes")
+        logger.info(f"resume : {len(self.done)} posts already saved in {self.output_csv}")
+
+    def _append(self, post_id):
+        self._file.write(f"{post_id}\t{self._csv_size()}\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def is_done(self, post_id):
+        return post_id in self.done
+
+    def commit(self, post_id):
+        """Marks a post as saved, call after its rows were appended to the output CSV."""
+        self._append(post_id)
+        self.done.add(post_id)
+
+    def close(self, remove=True):
+        """Closes the journal, removes it once the subreddit is finished."""
+        self._file.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class RunManifest:
+    """
+    Record of the subreddits finished by the current run.
+    { "started_at": unix time, "subreddits": { SUBREDDIT: report status } }
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.data = {"started_at": time.time(), "subreddits": {}}
+
+        if resume and os.path.exists(path):
+            try:
+                with open(path, 'r') as file:
+                    self.data = json.load(file)
+            except json.JSONDecodeError as e:
+                logger.error(f"Unreadable run manifest, starting a new run: {path} - {e}")
+        write_json(self.path, self.data)
+
+    def finished(self, subreddit):
+        """Report status of a finished subreddit, None when it still has to run."""
+        return self.data["subreddits"].get(subreddit)
+
+    def finish(self, subreddit, status):
+        self.data["subreddits"][subreddit] = status
+        write_json(self.path, self.data)
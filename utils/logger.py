@@ -1,44 +1,177 @@
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+import atexit
+import itertools
 import os
+import queue
+import threading
+import time
 
-def get_logger(name: str = __name__, log_file: str = "app.log"):
+import yaml
+
+
+def _load_settings(path: str = "./config.yaml"):
     """
-    Returns a logger with consistent formatting and rotation.
-    Usage: logger = get_logger(__name__)
+    Helper: logging section of config.yaml ( empty when missing ).
+    READ HERE WITH yaml, utils.file ITSELF LOGS THROUGH get_logger
     """
+    try:
+        with open(path, "r") as file:
+            return (yaml.safe_load(file) or {}).get("logging") or {}
+    except (OSError, yaml.YAMLError):
+        return {}
 
-    # Create logs directory if it doesn't exist
-    os.makedirs("logs", exist_ok=True)
-    log_path = os.path.join("logs", log_file)
+# LOGGING CONFIGURATION
+settings = _load_settings()
 
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)        # Change level if needed
+# QUEUE MODE
+# MODULE LOGGERS ONLY PUT RECORDS ON A QUEUE, ONE LISTENER THREAD WRITES THEM TO THE CONSOLE AND THE LOG FILE
+_queue          = None
+_listener       = None
+_queue_handlers = []
+_queue_lock     = threading.Lock()
 
-    # Avoid adding handlers multiple times
-    if logger.hasHandlers():
-        return logger
+def _handlers(log_path):
+    """Helper: console ( INFO ) and rotating file ( DEBUG ) handlers with the shared format."""
 
-    # --- Handlers ---
     # Console handler
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
+    console_handler.setLevel(settings.get("console_level", "INFO"))
 
     # File handler (rotates logs when size exceeds 5 MB)
     file_handler = RotatingFileHandler(log_path, maxBytes=5_000_000, backupCount=3)
-    file_handler.setLevel(logging.DEBUG)
+    file_handler.setLevel(settings.get("file_level", "DEBUG"))
 
     # --- Formatters ---
     formatter = logging.Formatter(
         "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s",
         "%Y-%m-%d %H:%M:%S"
     )
-    
+
     console_handler.setFormatter(formatter)
     file_handler.setFormatter(formatter)
 
+    return [console_handler, file_handler]
+
+def _queue_handler(log_path):
+    """Helper: QueueHandler feeding the shared listener, started on first use and stopped ( flushed ) at exit."""
+    global _queue, _listener
+    with _queue_lock:
+        if _listener is None:
+            _queue    = queue.SimpleQueue()
+            _listener = QueueListener(_queue, *_handlers(log_path), respect_handler_level=True)
+            _listener.start()
+            atexit.register(stop_listener)
+        handler = QueueHandler(_queue)
+        _queue_handlers.append(handler)
+        return handler
+
+def stop_listener():
+    """Writes the records still queued and stops the listener thread."""
+    global _listener
+    with _queue_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+def _restart_in_child():
+    """
+    Helper: A FORKED PROCESS ( clean_data.py FILE WORKERS ) DOES NOT INHERIT THE LISTENER THREAD,
+    ITS QUEUE HANDLERS ARE MOVED TO A NEW QUEUE WITH ITS OWN LISTENER
+    """
+    global _queue, _listener, _queue_lock
+    _queue_lock = threading.Lock()
+    if _listener is None:
+        return
+    _queue    = queue.SimpleQueue()
+    _listener = QueueListener(_queue, *_listener.handlers, respect_handler_level=True)
+    for handler in _queue_handlers:
+        handler.queue = _queue
+    _listener.start()
+
+    # WORKER PROCESSES END WITHOUT atexit, multiprocessing FINALIZERS STILL RUN
+    from multiprocessing.util import Finalize
+    Finalize(None, stop_listener, exitpriority=0)
+
+os.register_at_fork(after_in_child=_restart_in_child)
+
+def get_logger(name: str = __name__, log_file: str = "app.log"):
+    """
+    Returns a logger with consistent formatting and rotation.
+    logging.queue = True  SENDS THE RECORDS THROUGH THE SHARED LISTENER ( NO FILE I/O IN THE CALLER )
+    Usage: logger = get_logger(__name__)
+    """
+
+    # Create logs directory if it doesn't exist
+    os.makedirs("logs", exist_ok=True)
+    log_path = os.path.join("logs", log_file)
+
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)        # Change level if needed
+
+    # Avoid adding handlers multiple times
+    if logger.hasHandlers():
+        return logger
+
     # Attach handlers
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    if settings.get("queue", False):
+        logger.addHandler(_queue_handler(log_path))
+    else:
+        for handler in _handlers(log_path):
+            logger.addHandler(handler)
 
     return logger
+
+def sampler(every):
+    """
+    Returns a function that is True once every `every` calls ( the 1st, the every+1th, ... ), always False when every <= 0.
+    Usage: sample = sampler(100); if sample(): logger.debug("... %s", value)
+    """
+    if not every or every <= 0:
+        return lambda: False
+    counter = itertools.count()
+    return lambda: next(counter) % every == 0
+
+class Progress:
+    """
+    Periodic progress line ( posts done, comments, comments/s ) in place of per-row output.
+    Usage: progress = Progress(logger, f"SUBREDDIT {SUBREDDIT}", total=len(posts)); progress.add(posts=1, comments=n); progress.close()
+    """
+
+    def __init__(self, logger, label, total=None, interval=None):
+        self.logger   = logger
+        self.label    = label
+        self.total    = total
+        self.interval = settings.get("progress_interval", 10) if interval is None else interval
+        self.posts    = 0
+        self.comments = 0
+        self.start    = self.last = time.perf_counter()
+        self.logged   = None     # ( posts, comments ) OF THE LAST LINE
+        self._lock    = threading.Lock()
+
+    def _line(self, now):
+        """Helper: progress line text."""
+        elapsed = max(now - self.start, 1e-9)
+        posts   = f"{self.posts}/{self.total}" if self.total is not None else f"{self.posts}"
+        return f"{self.label} - posts done {posts} - comments {self.comments} - {self.comments / elapsed:.1f} comments/s"
+
+    def add(self, posts=0, comments=0):
+        """Counts finished work, logs the progress line when interval seconds have passed since the last one."""
+        with self._lock:
+            self.posts    += posts
+            self.comments += comments
+            now = time.perf_counter()
+            if now - self.last < self.interval:
+                return
+            self.last   = now
+            self.logged = (self.posts, self.comments)
+            line = self._line(now)
+        self.logger.info(line)
+
+    def close(self):
+        """Final progress line ( skipped when the last one already has the final counts )."""
+        with self._lock:
+            if self.logged == (self.posts, self.comments):
+                return
+            line = self._line(time.perf_counter())
+        self.logger.info(line)
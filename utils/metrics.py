@@ -0,0 +1,226 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.file import read_config
+
+# LOGGER
+from utils.logger import get_logger
+logger = get_logger(__name__)
+
+# CONFIGURATION
+config         = read_config()
+metrics_config = config[1].get("metrics", {}) if config[0] else {}
+
+# UPPER BOUNDS ( ms ) OF THE LATENCY HISTOGRAM BUCKETS, SLOWER SPANS GO TO THE LAST ONE
+BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+BUCKET_NAMES = [f"<={bound}" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+
+
+class Metrics:
+    """
+    Spans ( timed stages ), counters and per-stage latency histograms of a run or of one scope of it.
+    trace = True ALSO KEEPS EVERY SPAN AS A CHROME TRACE EVENT ( UP TO max_events )
+    Usage: m = Metrics(); m.observe("http.request", 0.2); m.count("http.bytes", 5120); m.summary()
+    """
+
+    def __init__(self, trace: bool = False, max_events: int = 200000):
+        self.trace      = trace
+        self.max_events = max_events
+        self.spans      = {}     # name -> [ count, total_s, max_s, bucket counts ]
+        self.counters   = {}     # name -> value
+        self.events     = []     # CHROME TRACE "X" EVENTS
+        self.threads    = {}     # ( pid, tid ) -> THREAD NAME
+        self.dropped    = 0      # EVENTS PAST max_events
+        self._lock      = threading.Lock()
+
+    def observe(self, name, seconds, start=None, args=None):
+        """Adds one span of `seconds` to the histogram of name, start ( epoch seconds ) places it on the trace."""
+        ms     = seconds * 1000
+        bucket = len(BUCKETS_MS)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                bucket = i
+                break
+        with self._lock:
+            span = self.spans.get(name)
+            if span is None:
+                span = self.spans[name] = [0, 0.0, 0.0, [0] * len(BUCKET_NAMES)]
+            span[0] += 1
+            span[1] += seconds
+            span[2]  = max(span[2], seconds)
+            span[3][bucket] += 1
+            if self.trace and start is not None:
+                if len(self.events) >= self.max_events:
+                    self.dropped += 1
+                    return
+                thread = threading.current_thread()
+                event  = { "name": name, "cat": name.split(".")[0], "ph": "X",
+                           "ts": round(start * 1e6, 1), "dur": round(seconds * 1e6, 1),
+                           "pid": os.getpid(), "tid": thread.ident }
+                if args:
+                    event["args"] = args
+                self.events.append(event)
+                self.threads.setdefault((event["pid"], event["tid"]), thread.name)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self, reset=False):
+        """Raw copy of the recorded data ( picklable, see merge ), reset=True CLEARS IT."""
+        with self._lock:
+            data = { "spans": {name: [span[0], span[1], span[2], list(span[3])] for name, span in self.spans.items()},
+                     "counters": dict(self.counters),
+                     "events": list(self.events),
+                     "threads": [[pid, tid, name] for (pid, tid), name in self.threads.items()],
+                     "dropped": self.dropped }
+            if reset:
+                self.spans, self.counters, self.events, self.threads, self.dropped = {}, {}, [], {}, 0
+        return data
+
+    def merge(self, data):
+        """Adds a snapshot ( e.g. from a worker process )."""
+        with self._lock:
+            for name, (count, total, longest, buckets) in data["spans"].items():
+                span = self.spans.get(name)
+                if span is None:
+                    span = self.spans[name] = [0, 0.0, 0.0, [0] * len(BUCKET_NAMES)]
+                span[0] += count
+                span[1] += total
+                span[2]  = max(span[2], longest)
+                span[3]  = [a + b for a, b in zip(span[3], buckets)]
+            for name, value in data["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            if self.trace:
+                room = max(self.max_events - len(self.events), 0)
+                self.events.extend(data["events"][:room])
+                self.dropped += data["dropped"] + max(len(data["events"]) - room, 0)
+                for pid, tid, name in data["threads"]:
+                    self.threads.setdefault((pid, tid), name)
+
+    def summary(self):
+        """
+        REPORT SECTION: { spans: { name: { count, total_s, mean_ms, max_ms, histogram_ms } }, counters: { name: value } }
+        histogram_ms ONLY LISTS THE NON EMPTY BUCKETS
+        """
+        with self._lock:
+            spans = {}
+            for name, (count, total, longest, buckets) in sorted(self.spans.items()):
+                spans[name] = { "count": count,
+                                "total_s": round(total, 4),
+                                "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+                                "max_ms": round(longest * 1000, 3),
+                                "histogram_ms": {bucket: n for bucket, n in zip(BUCKET_NAMES, buckets) if n} }
+            return { "spans": spans, "counters": dict(sorted(self.counters.items())) }
+
+    def write_trace(self, path):
+        """Writes the recorded spans as a Chrome trace file ( chrome://tracing, Perfetto )."""
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with self._lock:
+                events = [ { "name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name} }
+                           for (pid, tid), name in self.threads.items() ] + self.events
+                trace  = { "traceEvents": events, "displayTimeUnit": "ms",
+                           "otherData": {"dropped_events": self.dropped} }
+            with open(path, "w") as file:
+                json.dump(trace, file)
+            return True, f"{len(self.events)} trace events written to {path}"
+        except Exception as e:
+            msg = f"Error writing trace file: {path} - {e}"
+            logger.error(msg)
+            return False, str(e)
+
+
+# RUN METRICS OF THIS PROCESS
+run = Metrics( trace      = bool(metrics_config.get("trace", False)),
+               max_events = metrics_config.get("max_trace_events", 200000) )
+enabled = metrics_config.get("enabled", True)
+
+# SCOPES OPENED BY scope() IN THE CURRENT CONTEXT ( THREAD / TASK ), THEY RECEIVE THE SAME SPANS AS run
+_scopes = contextvars.ContextVar("metrics_scopes", default=())
+
+def observe(name, seconds, start=None, **args):
+    """Records a span measured by the caller ( e.g. a rate limiter wait )."""
+    if not enabled:
+        return
+    run.observe(name, seconds, start, args or None)
+    for scoped in _scopes.get():
+        scoped.observe(name, seconds)
+
+def count(name, value=1):
+    if not enabled:
+        return
+    run.count(name, value)
+    for scoped in _scopes.get():
+        scoped.count(name, value)
+
+@contextmanager
+def span(name, **args):
+    """
+    TIMES THE WITH BLOCK AS ONE SPAN OF name
+    Usage: with span("csv.append", rows=len(rows)): append_csv(...)
+    """
+    if not enabled:
+        yield
+        return
+    start   = time.time()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, start, **args)
+
+def timed(name):
+    """Decorator: every call of the function is one span of name."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def timed_iter(name, iterable):
+    """Yields the items of iterable, the time spent producing each one is a span of name ( e.g. reading chunks )."""
+    iterator = iter(iterable)
+    while True:
+        with span(name):
+            item = next(iterator, StopIteration)
+        if item is StopIteration:
+            return
+        yield item
+
+@contextmanager
+def scope():
+    """
+    COLLECTS THE SPANS AND COUNTERS RECORDED INSIDE THE WITH BLOCK ( AND THE THREADS / TASKS IT STARTS
+    WITH asyncio.to_thread ) IN A SEPARATE Metrics, E.G. ONE SUBREDDIT OF A RUN
+    Usage: with scope() as scoped: ...; status["metrics"] = scoped.summary()
+    """
+    scoped = Metrics()
+    token  = _scopes.set(_scopes.get() + (scoped,))
+    try:
+        yield scoped
+    finally:
+        _scopes.reset(token)
+
+def trace_path(stage):
+    """Trace file of a stage ( extract / clean ), None when tracing is off."""
+    if not enabled or not run.trace:
+        return None
+    return metrics_config.get("trace_path", "data/report/trace_{STAGE}.json").format(STAGE = stage)
+
+def write_trace(stage):
+    """Writes the run's trace file of stage when tracing is on."""
+    path = trace_path(stage)
+    if path is None:
+        return True, "tracing disabled"
+    ok, msg = run.write_trace(path)
+    if ok:
+        logger.info(msg)
+    return ok, msg
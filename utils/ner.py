@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+# OPTIONAL NLP LIBRARY ( requirements-optional.txt, THEN python -m spacy download en_core_web_sm ), ner.py STOPS WHEN IT IS MISSING
+try:
+    import spacy
+except ImportError:
+    spacy = None
+
+# LOGGER
+from utils.logger import get_logger
+logger = get_logger(__name__)
+
+# SQLITE LIMIT OF ? PARAMETERS PER STATEMENT ( OLD BUILDS: 999 )
+LOOKUP_BATCH = 900
+
+# RUNS OF WHITESPACE INSIDE AN ENTITY ( "Grammarly\n\nPremium" ) ARE ONE SPACE IN THE TABLES
+SPACES_RE = re.compile(r"\s+")
+
+
+def text_hash(text, model_key):
+    """Helper: hash of the text given to the model, the model key makes a new model miss the cache."""
+    return hashlib.sha1(f"{model_key}\0{text}".encode("utf-8")).hexdigest()
+
+def normalize_entity(text):
+    return SPACES_RE.sub(" ", text).strip()
+
+def load_model(name, components, max_chars=None):
+
+    """
+    spaCy PIPELINE RUNNING ONLY components ( e.g. ner, entity_ruler ) AND THE tok2vec / transformer THEY LISTEN TO,
+    EVERY OTHER COMPONENT ( tagger, parser, lemmatizer, ... ) IS DISABLED
+    RETURNS ( nlp, model_key ), model_key = NAME, VERSION AND ACTIVE COMPONENTS ( PART OF THE CACHE KEY )
+    """
+
+    nlp  = spacy.load(name)
+    keep = [pipe for pipe in nlp.pipe_names if pipe in components]
+    for pipe, proc in nlp.pipeline:
+        if any(listener in keep for listener in getattr(proc, "listening_components", [])):
+            keep.append(pipe)
+    nlp.select_pipes(enable=[pipe for pipe in nlp.pipe_names if pipe in keep])
+    if max_chars:
+        nlp.max_length = max(nlp.max_length, max_chars)
+
+    meta      = nlp.meta
+    model_key = f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}:{','.join(nlp.pipe_names)}"
+    return nlp, model_key
+
+def doc_entities(doc):
+    """[ [ text, label, start_char, end_char ], ... ] OF A PROCESSED DOC"""
+    return [[ent.text, ent.label_, ent.start_char, ent.end_char] for ent in doc.ents]
+
+
+class EntityCache:
+    """
+    On-disk cache of the entities found in every row, keyed by reddit_id.
+    AN ENTRY IS REUSED WHILE ITS text_hash ( ROW TEXT + MODEL ) IS UNCHANGED,
+    EDITED ROWS AND ROWS OF A NEW MODEL ARE PROCESSED AGAIN AND REPLACE IT.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path  = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS entities (
+                                reddit_id  TEXT PRIMARY KEY,
+                                text_hash  TEXT,
+                                entities   TEXT,
+                                updated_at REAL )""")
+        self._conn.commit()
+
+    def lookup(self, ids, hashes):
+        """{ reddit_id: entities } OF THE ROWS WHOSE CACHED text_hash MATCHES"""
+        wanted = dict(zip(ids, hashes))
+        found  = {}
+        keys   = list(wanted)
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[start:start + LOOKUP_BATCH]
+            rows  = self._conn.execute(f"""SELECT reddit_id, text_hash, entities FROM entities
+                                           WHERE reddit_id IN ({','.join('?' * len(batch))})""", batch)
+            for reddit_id, cached_hash, entities in rows:
+                if wanted[reddit_id] == cached_hash:
+                    found[reddit_id] = json.loads(entities)
+        return found
+
+    def store(self, rows):
+        """rows = [ ( reddit_id, text_hash, entities ), ... ]"""
+        now = time.time()
+        self._conn.executemany("INSERT OR REPLACE INTO entities (reddit_id, text_hash, entities, updated_at) VALUES (?, ?, ?, ?)",
+                               [(reddit_id, hashed, json.dumps(entities), now) for reddit_id, hashed, entities in rows])
+        self._conn.commit()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
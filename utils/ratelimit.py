@@ -0,0 +1,99 @@
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every request sender, kept as a timeline of send slots.
+    ONE SLOT EVERY 1 / rate SECONDS, AFTER AN IDLE PERIOD UP TO capacity SLOTS ARE FREE AT ONCE.
+    Usage: bucket.acquire() BEFORE EACH REQUEST, FROM ANY THREAD.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate     = float(rate)        # SLOTS PER SECOND
+        self.capacity = float(capacity)    # MAX BURST SIZE
+        self._next    = 0.0                # TIME OF THE NEXT FREE SLOT ( 0 = IDLE, THE BUCKET STARTS FULL )
+        self._lock    = threading.Lock()
+
+    def _reserve(self):
+        """Helper: takes the next slot and returns how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+
+            # AN IDLE TIMELINE DOES NOT SAVE MORE THAN capacity SLOTS
+            slot = max(self._next, now - (self.capacity - 1) / self.rate)
+
+            # EVERY CALLER QUEUES ONE INTERVAL BEHIND THE PREVIOUS RESERVATION
+            self._next = slot + 1 / self.rate
+            return max(0.0, slot - now)
+
+    def set_rate(self, rate):
+        """Changes the rate of the slots not handed out yet, reservations already made keep their time."""
+        with self._lock:
+            self.rate = float(rate)
+
+    def pause(self, seconds):
+        """
+        Holds back every sender for the given number of seconds.
+        THE TIMELINE RESTARTS AT THE END OF THE PAUSE, QUEUED SENDERS STAY ONE INTERVAL APART AFTER IT
+        """
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+    def acquire(self, stop=None):
+        """Blocks until a token is available, returns the time waited ( stop = threading.Event THAT ENDS THE WAIT EARLY )."""
+        wait = self._reserve()
+        if wait > 0:
+            if stop is not None:
+                stop.wait(wait)
+            else:
+                time.sleep(wait)
+        return wait
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket that follows Reddit's rate-limit headers.
+    X-Ratelimit-Remaining : REQUESTS LEFT IN THE CURRENT WINDOW
+    X-Ratelimit-Reset     : SECONDS UNTIL THE WINDOW RESETS
+    Retry-After           : SECONDS TO WAIT AFTER A 429 / 503
+    """
+
+    def __init__(self, rate: float, max_rate: float = None, low_watermark: int = 5, jitter: float = 0.25):
+        super().__init__(rate)
+        self.base_rate     = float(rate)
+        self.max_rate      = float(max_rate or rate)
+        self.low_watermark = low_watermark
+        self.jitter        = jitter          # FRACTION OF THE WAIT ADDED AT RANDOM
+
+    def jittered(self, seconds):
+        """Spreads retries of concurrent senders so they do not hit the server together."""
+        return seconds * (1 + random.uniform(0, self.jitter))
+
+    def update(self, headers):
+        """Adjusts the rate from the rate-limit headers of a response."""
+        try:
+            remaining = float(headers.get("X-Ratelimit-Remaining"))
+            reset     = float(headers.get("X-Ratelimit-Reset"))
+        except (TypeError, ValueError):
+            return
+
+        # BUDGET ALMOST SPENT, WAIT FOR THE WINDOW TO RESET
+        if remaining <= self.low_watermark:
+            self.pause(self.jittered(reset))
+            self.set_rate(self.base_rate)
+            return
+
+        # SPREAD THE REMAINING BUDGET OVER THE WINDOW
+        self.set_rate(min(self.max_rate, remaining / max(reset, 1)))
+
+    def retry_after(self, headers, attempt, backoff_base):
+        """Returns the pause before a retry, Retry-After when sent, else exponential backoff."""
+        try:
+            seconds = float(headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            seconds = backoff_base * (2 ** attempt)
+        seconds = self.jittered(seconds)
+        self.pause(seconds)
+        return seconds
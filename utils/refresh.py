@@ -0,0 +1,53 @@
+from utils.extract import fetch_info
+from utils.schema import read_frame, enforce
+
+# LOGGER
+from utils.logger import get_logger
+logger = get_logger(__name__)
+
+
+def fullname(row):
+    """Helper: reddit fullname of an output row, posts are t3_, comments t1_."""
+    prefix = "t3_" if row["kind"] == "t3" else "t1_"
+    return prefix + row["reddit_id"]
+
+def refresh_csv(file_path, request_log=None):
+    
+    """
+    UPDATE score AND num_comments OF AN OUTPUT CSV IN PLACE FROM /api/info
+    OTHER VALUES ARE WRITTEN BACK WITH THE SHARED DTYPES
+    """
+    
+    try:
+        df = read_frame(file_path)
+    except Exception as e:
+        msg = f"Error reading CSV file: {file_path} - {e}"
+        logger.error(msg)
+        return False, msg
+    
+    fullnames = [fullname(row) for row in df[["kind", "reddit_id"]].to_dict('records')]
+    
+    # CURRENT VALUES BY reddit_id
+    score        = {}
+    num_comments = {}
+    for data in fetch_info(fullnames, request_log):
+        score[data['id']] = data.get('score', 0)
+        if 'num_comments' in data:
+            num_comments[data['id']] = data['num_comments']
+    
+    # ROWS MISSING FROM THE RESPONSE ( DELETED / UNAVAILABLE ) KEEP THEIR OLD VALUES
+    df['score']        = df['reddit_id'].map(score).fillna(df['score'])
+    df['num_comments'] = df['reddit_id'].map(num_comments).fillna(df['num_comments'])
+    enforce(df)
+    
+    try:
+        df.to_csv(file_path, index=False)
+    except Exception as e:
+        msg = f"Error writing CSV file: {file_path} - {e}"
+        logger.error(msg)
+        return False, msg
+    
+    logger.info(f"refreshed {len(score)}/{len(df)} rows : {file_path}")
+    return True, { "num_rows": len(df), 
+                   "num_refreshed": len(score), 
+                   "num_missing": len(df) - len(score) }
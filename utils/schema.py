@@ -0,0 +1,106 @@
+import pandas as pd
+
+
+# OUTPUT CSV COLUMNS ( POST FIELDS FOLLOWED BY COMMENT-ONLY FIELDS )
+# FIXED SO PAGES OF POSTS AND COMMENTS CAN BE APPENDED TO THE SAME FILE
+OUTPUT_COLUMNS = ['csv_id', 'kind', 'kind_desc', 'reddit_id', 'title', 'author', 'timestamp_utc',
+                  'text', 'score', 'num_comments', 'post_id', 'parent_id', 'depth']
+
+# COLUMN DTYPES OF EVERY POST / COMMENT FRAME
+# category        = FEW DISTINCT VALUES REPEATED ON EVERY ROW
+# Int16 / Int32   = SMALL NULLABLE INTEGERS ( COMMENTS HAVE NO num_comments, POSTS NO depth )
+# string[pyarrow] = FREE TEXT AND IDS IN ONE ARROW BUFFER INSTEAD OF ONE PYTHON OBJECT PER VALUE
+#                   ( IDS ARE BASE 36, "12345" MUST STAY A STRING )
+DTYPES = {
+    "subreddit":     "category",
+    "csv_id":        "Int32",
+    "kind":          "category",
+    "kind_desc":     "category",
+    "reddit_id":     "string[pyarrow]",
+    "title":         "string[pyarrow]",
+    "author":        "category",
+    "timestamp_utc": "float64",
+    "text":          "string[pyarrow]",
+    "score":         "Int32",
+    "num_comments":  "Int32",
+    "post_id":       "string[pyarrow]",
+    "parent_id":     "string[pyarrow]",
+    "depth":         "Int16",
+    "word_count":    "Int32",
+}
+
+# COLUMNS NO LONGER STORED, DROPPED FROM OLDER FILES
+# datetime = pd.to_datetime(df["timestamp_utc"], unit="s") WHEN NEEDED
+DERIVED = ["datetime"]
+
+# pd.read_csv DTYPES: TEXT COLUMNS ARE NEVER GUESSED, NUMBERS ARE PARSED THEN CAST BY enforce
+READ_DTYPES = {column: dtype for column, dtype in DTYPES.items() if dtype in ("category", "string[pyarrow]")}
+
+# FREE TEXT IS READ AS IT IS: AN EMPTY CLEANED text ( ONLY STOP WORDS ) STAYS "" AND "NA" / "null" STAY WORDS,
+# SO A CSV ROUND TRIP ( CHUNKED / SHARD CLEANING ) GIVES THE SAME VALUES AS THE IN-MEMORY FRAME
+# EVERY OTHER COLUMN IS MISSING ONLY WHEN EMPTY ( to_csv WRITES NA AS "" )
+KEEP_TEXT = ["text"]
+
+
+def enforce(df):
+
+    """
+    CAST THE KNOWN COLUMNS OF df TO DTYPES ( IN PLACE ) AND DROP DERIVED COLUMNS, RETURNS df
+    UNKNOWN COLUMNS ARE LEFT AS THEY ARE
+    """
+
+    derived = [column for column in DERIVED if column in df.columns]
+    if derived:
+        df.drop(columns=derived, inplace=True)
+
+    for column, dtype in DTYPES.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        if dtype in ("category", "string[pyarrow]"):
+            df[column] = df[column].astype(dtype)
+        else:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(dtype)
+    return df
+
+def frame(rows, columns=OUTPUT_COLUMNS):
+    """Typed DataFrame from extracted rows ( list of dicts, or dict of column lists )."""
+    return enforce(pd.DataFrame(rows, columns=columns))
+
+def read_options(file_path, **kwargs):
+    """Helper: pd.read_csv ARGUMENTS OF read_frame / iter_frames ( SHARED DTYPES, NA ONLY OUTSIDE KEEP_TEXT )."""
+    columns = pd.read_csv(file_path, nrows=0, **kwargs).columns
+    na_values = {column: [""] for column in columns if column not in KEEP_TEXT}
+    return dict(kwargs, dtype=READ_DTYPES, keep_default_na=False, na_values=na_values)
+
+def read_frame(file_path, **kwargs):
+    """Reads a CSV written by the extractor / cleaner with the shared dtypes."""
+    return enforce(pd.read_csv(file_path, **read_options(file_path, **kwargs)))
+
+def iter_frames(file_path, chunk_size, **kwargs):
+    """Same as read_frame, chunk_size rows at a time."""
+    for chunk in pd.read_csv(file_path, chunksize=chunk_size, **read_options(file_path, **kwargs)):
+        yield enforce(chunk)
+
+def memory_report(before, after):
+
+    """
+    DEEP MEMORY OF THE SAME ROWS BEFORE / AFTER enforce
+    RETURNS { rows, before_mb, after_mb, saved_pct, columns: { column: { dtype_before, dtype_after, before_mb, after_mb } } }
+    """
+
+    mb = 1024 * 1024
+    mem_before = before.memory_usage(deep=True, index=False)
+    mem_after  = after.memory_usage(deep=True, index=False)
+
+    columns = {}
+    for column in before.columns:
+        columns[column] = { "dtype_before": str(before[column].dtype),
+                            "dtype_after": str(after[column].dtype) if column in after.columns else None,
+                            "before_mb": round(mem_before[column] / mb, 3),
+                            "after_mb": round(mem_after[column] / mb, 3) if column in after.columns else 0.0 }
+
+    return { "rows": len(before),
+             "before_mb": round(mem_before.sum() / mb, 2),
+             "after_mb": round(mem_after.sum() / mb, 2),
+             "saved_pct": round(float((1 - mem_after.sum() / mem_before.sum()) * 100), 2) if len(before) else 0.0,
+             "columns": columns }
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+
+from utils.file import join_csv, write_json
+
+# LOGGER
+from utils.logger import get_logger
+logger = get_logger(__name__)
+
+
+def file_hash(file_path, block_size=1 << 20):
+    """Helper: sha256 of a file's content, read in 1 MB blocks. A folder hashes its files' names and content."""
+    digest = hashlib.sha256()
+    paths  = [file_path]
+    if os.path.isdir(file_path):
+        paths = sorted(os.path.join(root, name) for root, _, names in os.walk(file_path) for name in names)
+    for path in paths:
+        if path != file_path:
+            digest.update(os.path.relpath(path, file_path).encode('utf-8'))
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(block_size), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def settings_hash(settings):
+    """Helper: stable hash of the cleaning settings that change the output."""
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=sorted).encode('utf-8')).hexdigest()
+
+
+class ShardCache:
+    """
+    Cleaned copy ( shard ) of every input file plus a manifest of what produced it.
+    manifest = { input path: { "hash", "size", "mtime_ns", "settings", "shard", "stats", "columns" } }
+    A SHARD IS REUSED WHILE ITS INPUT CONTENT AND THE CLEANING SETTINGS ARE UNCHANGED.
+    """
+
+    def __init__(self, folder: str, settings: dict):
+        os.makedirs(folder, exist_ok=True)
+        self.folder        = folder
+        self.manifest_path = os.path.join(folder, "manifest.json")
+        self.settings      = settings_hash(settings)
+        self.manifest      = {}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r') as file:
+                    self.manifest = json.load(file)
+            except json.JSONDecodeError as e:
+                logger.error(f"Unreadable shard manifest, cleaning everything again: {self.manifest_path} - {e}")
+
+    def shard_path(self, file_path):
+        return os.path.join(self.folder, os.path.basename(file_path))
+
+    def _content_hash(self, file_path, entry):
+        """Helper: content hash, reused from the manifest while a file's size and mtime are unchanged."""
+        stat = os.stat(file_path)
+        if entry and os.path.isfile(file_path) and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return entry["hash"]
+        return file_hash(file_path)
+
+    def lookup(self, file_path):
+        """Manifest entry of an up to date shard, None when the file has to be cleaned."""
+        entry = self.manifest.get(file_path)
+        if (entry is None
+            or entry["settings"] != self.settings
+            or not os.path.exists(entry["shard"])
+            or self._content_hash(file_path, entry) != entry["hash"]):
+            return None
+        return entry
+
+    def last(self, file_path):
+        """Manifest entry of the last shard written for file_path, up to date or not, None when there is none."""
+        entry = self.manifest.get(file_path)
+        if entry is None or entry["settings"] != self.settings or not os.path.exists(entry["shard"]):
+            return None
+        return entry
+
+    def store(self, file_path, stats, columns):
+        """Records the shard just written for file_path."""
+        stat = os.stat(file_path)
+        self.manifest[file_path] = { "hash": self._content_hash(file_path, None),
+                                     "size": stat.st_size,
+                                     "mtime_ns": stat.st_mtime_ns,
+                                     "settings": self.settings,
+                                     "shard": self.shard_path(file_path),
+                                     "stats": stats,
+                                     "columns": columns }
+
+    def prune(self, file_names):
+        """Forgets input files that are gone, and their shards."""
+        for file_path in list(self.manifest):
+            if file_path not in file_names:
+                shard = self.manifest.pop(file_path)["shard"]
+                if os.path.exists(shard):
+                    os.remove(shard)
+
+    def save(self):
+        return write_json(self.manifest_path, self.manifest)
+
+    def assemble(self, file_names, output_csv, row_filter=None):
+        """Joins the shards of file_names into output_csv, in file order ( row_filter: see join_csv )."""
+        return join_csv([self.manifest[file_path]["shard"] for file_path in file_names], output_csv, row_filter)
@@ -0,0 +1,46 @@
+import json
+import os
+import time
+
+from utils.file import write_json
+
+# LOGGER
+from utils.logger import get_logger
+logger = get_logger(__name__)
+
+
+class ExtractState:
+    """
+    Per-subreddit record of the posts already extracted.
+    { reddit_id: { "num_comments": int, "fetched_at": unix time } }
+    Usage: state = ExtractState(folder, SUBREDDIT); posts = state.changed(posts)
+    """
+
+    def __init__(self, folder: str, subreddit: str):
+        os.makedirs(folder, exist_ok=True)
+        self.path  = os.path.join(folder, f"state_{subreddit}.json")
+        self.posts = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as file:
+                    self.posts = json.load(file)
+            except json.JSONDecodeError as e:
+                logger.error(f"Unreadable state file, starting fresh: {self.path} - {e}")
+
+    def needs_fetch(self, post):
+        """New post, or a post whose comment count grew since the last fetch."""
+        seen = self.posts.get(post["reddit_id"])
+        return seen is None or post.get("num_comments", 0) > seen["num_comments"]
+
+    def changed(self, posts):
+        """Posts whose comment tree has to be fetched."""
+        return [post for post in posts if self.needs_fetch(post)]
+
+    def mark(self, posts):
+        """Records the comment count of fetched posts."""
+        now = time.time()
+        for post in posts:
+            self.posts[post["reddit_id"]] = {"num_comments": post.get("num_comments", 0), "fetched_at": now}
+
+    def save(self):
+        return write_json(self.path, self.posts)
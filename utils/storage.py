@@ -0,0 +1,141 @@
+import os
+import shutil
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from utils.schema import DTYPES, enforce, iter_frames
+
+# LOGGER
+from utils.logger import get_logger
+logger = get_logger(__name__)
+
+
+# ARROW TYPES OF THE SHARED DTYPES ( utils/schema.py ), CATEGORIES ARE STORED AS STRINGS
+# ( CSV LOSES THEM: csv_id OF COMMENT ROWS IS EMPTY, SO THE COLUMN COMES BACK AS 61205.0 )
+ARROW_TYPES = { "category":        pa.string(),
+                "string[pyarrow]": pa.string(),
+                "float64":         pa.float64(),
+                "Int16":           pa.int16(),
+                "Int32":           pa.int32(),
+                "Int64":           pa.int64() }
+SCHEMA = pa.schema([(column, ARROW_TYPES[dtype]) for column, dtype in DTYPES.items()])
+
+# DIRECTORY LAYOUT: root/subreddit=NAME/kind=t3/*.parquet
+PARTITION_COLUMNS = ["subreddit", "kind"]
+PARTITIONING      = ds.partitioning(pa.schema([("subreddit", pa.string()), ("kind", pa.string())]), flavor="hive")
+
+# INTEGER COLUMNS STAY INTEGERS WHEN THEY HOLD NULLS ( num_comments OF COMMENT ROWS ),
+# TEXT STAYS IN ARROW MEMORY INSTEAD OF ONE PYTHON OBJECT PER VALUE
+TYPES_MAPPER = {pa.int16(): pd.Int16Dtype(), pa.int32(): pd.Int32Dtype(), pa.int64(): pd.Int64Dtype(),
+                pa.string(): pd.StringDtype("pyarrow")}.get
+
+
+def normalize(df, subreddit=None, csv_id=None):
+
+    """
+    TYPED COPY OF AN EXTRACTED / CLEANED FRAME, READY TO STORE
+    COMMENT ROWS GET kind 't1' AND THE csv_id OF THEIR SUBREDDIT
+    """
+
+    df = df.copy()
+    if subreddit is not None:
+        df["subreddit"] = subreddit
+    if csv_id is not None:
+        df["csv_id"] = df["csv_id"].fillna(csv_id) if "csv_id" in df else csv_id
+    if "kind" in df and "kind_desc" in df:
+        kind = df["kind"].astype(object)
+        kind[kind.isna() & (df["kind_desc"] == "comment")] = "t1"
+        df["kind"] = kind
+    return enforce(df)
+
+def to_table(df):
+    """Helper: arrow table with the typed columns of SCHEMA, other columns keep their inferred type."""
+    fields = [SCHEMA.field(name) if name in SCHEMA.names else None for name in df.columns]
+    table  = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(fields):
+        if field is not None and table.schema.field(i).type != field.type:
+            table = table.set_column(i, field, table.column(i).cast(field.type))
+    return table
+
+def partition_path(root, subreddit):
+    return os.path.join(root, f"subreddit={subreddit}")
+
+def clear(root, subreddit=None):
+    """Removes one subreddit partition, or the whole dataset when subreddit is None."""
+    path = root if subreddit is None else partition_path(root, subreddit)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+
+def write_dataset(df, root):
+    """Adds the rows of df to the dataset at root, one file per ( subreddit, kind ) partition."""
+    pq.write_to_dataset( to_table(df),
+                         root,
+                         partition_cols         = PARTITION_COLUMNS,
+                         basename_template      = f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                         existing_data_behavior = "overwrite_or_ignore" )
+
+def publish_csv(csv_path, root, subreddit=None, csv_id=None, chunk_size=100000):
+
+    """
+    CONVERT A CSV OUTPUT INTO THE PARQUET DATASET AT root, CHUNK BY CHUNK
+    subreddit SET  = REPLACES THAT SUBREDDIT'S PARTITION
+    subreddit None = REPLACES THE WHOLE DATASET, ROWS CARRY THEIR OWN subreddit COLUMN
+    """
+
+    try:
+        clear(root, subreddit)
+        num_rows = 0
+        for chunk in iter_frames(csv_path, chunk_size):
+            write_dataset(normalize(chunk, subreddit, csv_id), root)
+            num_rows += len(chunk)
+        return True, num_rows
+    except Exception as e:
+        msg = f"Error publishing {csv_path} to parquet dataset {root} - {e}"
+        logger.error(msg)
+        return False, str(e)
+
+def list_partitions(root):
+    """Subreddit partition folders of a dataset."""
+    if not os.path.isdir(root):
+        return []
+    return [os.path.join(root, name) for name in sorted(os.listdir(root)) if name.startswith("subreddit=")]
+
+def dataset(root):
+    return ds.dataset(root, format="parquet", partitioning=PARTITIONING)
+
+def _ordered(df):
+    """Helper: columns in SCHEMA order, unknown columns last."""
+    known = [name for name in SCHEMA.names if name in df.columns]
+    return df[known + [name for name in df.columns if name not in SCHEMA.names]]
+
+def read_dataset(root, columns=None, filters=None):
+
+    """
+    LOAD A DATASET ( OR PART OF IT ) WITH THE SHARED DTYPES
+    columns = ONLY THESE COLUMNS ARE READ, e.g. ["text", "word_count"]
+    filters = PUSHED DOWN TO THE FILES / PARTITIONS, e.g. [("kind", "==", "t3"), ("subreddit", "in", ["Dyslexia"])]
+    """
+
+    table = pq.read_table(root, columns=columns, filters=filters, partitioning=PARTITIONING)
+    return _ordered(enforce(table.to_pandas(types_mapper=TYPES_MAPPER)))
+
+def iter_partition(path, chunk_size=None):
+
+    """
+    ROWS OF ONE SUBREDDIT PARTITION ( path = root/subreddit=NAME ), WHOLE OR IN CHUNKS OF AT MOST chunk_size ROWS
+    """
+
+    root, name = os.path.split(os.path.normpath(path))
+    part = dataset(root)
+    where = ds.field("subreddit") == name.split("=", 1)[1]
+
+    if not chunk_size:
+        yield _ordered(enforce(part.to_table(filter=where).to_pandas(types_mapper=TYPES_MAPPER)))
+        return
+    for batch in part.to_batches(filter=where, batch_size=chunk_size):
+        if batch.num_rows:
+            yield _ordered(enforce(batch.to_pandas(types_mapper=TYPES_MAPPER)))
@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import time
+from collections import Counter
+
+import pandas as pd
+
+# LOGGER
+from utils.logger import get_logger
+logger = get_logger(__name__)
+
+# PERIOD OF THE TERM COUNTS ( DATE RANGE QUERIES ARE AS FINE AS THIS )
+PERIOD_FORMATS = {"month": "%Y-%m", "day": "%Y-%m-%d", "year": "%Y"}
+
+# kind OF THE EXTRACTED CSVs IS EMPTY ON COMMENT ROWS, kind_desc TELLS THEM APART
+KIND_OF_DESC = {"post": "t3", "comment": "t1"}
+
+
+def row_kinds(df):
+    """Helper: t3 / t1 of every row, from kind or else kind_desc."""
+    kind = df["kind"].astype(object) if "kind" in df else pd.Series(None, index=df.index, dtype=object)
+    if "kind_desc" in df:
+        kind = kind.where(kind.notna(), df["kind_desc"].astype(object).map(KIND_OF_DESC))
+    return kind.fillna("")
+
+def token_counts(texts):
+    """Tokens of cleaned texts ( words joined by one space, see utils/text.py ) without splitting them."""
+    texts = texts.astype(object).fillna("").astype(str)
+    return (texts.str.count(" ") + 1).where(texts != "", 0).astype("int64")
+
+
+class TermIndex:
+    """
+    Term counts and per-row token counts of the cleaned corpus, built by clean_data.py.
+    terms = ( source, subreddit, kind, period ) -> term -> count
+    rows  = reddit_id, source, subreddit, kind, period, word_count ( BEFORE CLEANING ), tokens ( AFTER )
+    EVERY INPUT FILE ( source ) IS INDEXED AS A WHOLE: A SOURCE CLEANED AGAIN REPLACES ITS ENTRIES,
+    UNCHANGED SOURCES KEEP THEIRS.
+    Usage: index = TermIndex(path); index.top_terms(30, subreddit="Dyslexia", kind="t1", start="2025-01")
+    """
+
+    def __init__(self, path: str, settings: dict = None, period: str = "month"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path     = path
+        self.period   = PERIOD_FORMATS[period]
+        self.settings = json.dumps(dict(settings or {}, period=period), sort_keys=True, default=sorted)
+        self._open    = set()      # SOURCES CLEARED IN THIS RUN, THEIR NEXT ROWS ARE ADDED
+
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""CREATE TABLE IF NOT EXISTS sources (
+                                      source     TEXT PRIMARY KEY,
+                                      subreddit  TEXT,
+                                      settings   TEXT,
+                                      rows       INTEGER,
+                                      duplicates INTEGER,
+                                      updated_at REAL );
+                                    CREATE TABLE IF NOT EXISTS terms (
+                                      source    TEXT,
+                                      subreddit TEXT,
+                                      kind      TEXT,
+                                      period    TEXT,
+                                      term      TEXT,
+                                      count     INTEGER,
+                                      PRIMARY KEY (source, kind, period, term) ) WITHOUT ROWID;
+                                    CREATE INDEX IF NOT EXISTS idx_terms_subreddit ON terms (subreddit, kind, period);
+                                    CREATE TABLE IF NOT EXISTS rows (
+                                      reddit_id  TEXT,
+                                      source     TEXT,
+                                      subreddit  TEXT,
+                                      kind       TEXT,
+                                      period     TEXT,
+                                      word_count INTEGER,
+                                      tokens     INTEGER );
+                                    CREATE INDEX IF NOT EXISTS idx_rows_source ON rows (source);
+                                    CREATE INDEX IF NOT EXISTS idx_rows_subreddit ON rows (subreddit, kind, period);""")
+        self._conn.commit()
+
+    def is_current(self, source, duplicates=0):
+        """True when source is indexed with the same settings and the same rows dropped as duplicates."""
+        row = self._conn.execute("SELECT settings, duplicates FROM sources WHERE source = ?", (source,)).fetchone()
+        return row is not None and row[0] == self.settings and row[1] == duplicates
+
+    def add(self, source, subreddit, df):
+        """
+        Adds cleaned rows of source ( reddit_id, kind / kind_desc, timestamp_utc, text, word_count ).
+        THE FIRST CALL FOR A SOURCE IN THIS RUN DROPS WHAT WAS INDEXED FOR IT BEFORE
+        """
+        if source not in self._open:
+            self._clear(source)
+            self._open.add(source)
+            self._conn.execute("INSERT INTO sources (source, subreddit, settings, rows, duplicates, updated_at) VALUES (?, ?, ?, 0, 0, ?)",
+                               (source, subreddit, self.settings, time.time()))
+        if df.empty:
+            return
+
+        kinds   = row_kinds(df)
+        periods = pd.to_datetime(df["timestamp_utc"], unit="s").dt.strftime(self.period).astype(object).fillna("")
+        texts   = df["text"].astype(object).fillna("").astype(str)
+        tokens  = token_counts(texts)
+
+        words = df["word_count"] if "word_count" in df else pd.Series(0, index=df.index)
+        self._conn.executemany("INSERT INTO rows (reddit_id, source, subreddit, kind, period, word_count, tokens) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               zip(df["reddit_id"].astype(object), [source] * len(df), [subreddit] * len(df), kinds, periods,
+                                   words.fillna(0).astype("int64").tolist(), tokens.tolist()))
+
+        # ONE COUNTER PER ( kind, period ), EVERY TEXT IS SPLIT ONCE
+        counters = {}
+        for kind, period, text in zip(kinds, periods, texts):
+            counter = counters.get((kind, period))
+            if counter is None:
+                counter = counters[(kind, period)] = Counter()
+            counter.update(text.split())
+        self._conn.executemany("""INSERT INTO terms (source, subreddit, kind, period, term, count) VALUES (?, ?, ?, ?, ?, ?)
+                                  ON CONFLICT (source, kind, period, term) DO UPDATE SET count = count + excluded.count""",
+                               ((source, subreddit, kind, period, term, count)
+                                for (kind, period), counter in counters.items() for term, count in counter.items()))
+        self._conn.execute("UPDATE sources SET rows = rows + ? WHERE source = ?", (len(df), source))
+
+    def add_file(self, source, subreddit, csv_path, keep=None, chunk_size=100000):
+        """Indexes a cleaned CSV ( shard / part file ), keep = BOOLEAN MASK OF ITS ROWS TO INDEX ( None = ALL )."""
+        columns = {"reddit_id", "kind", "kind_desc", "timestamp_utc", "text", "word_count"}
+        offset  = 0
+        self.add(source, subreddit, pd.DataFrame(columns=sorted(columns)))
+        for chunk in pd.read_csv(csv_path, usecols=lambda column: column in columns, dtype={"reddit_id": str, "text": str},
+                                 chunksize=chunk_size):
+            if keep is not None:
+                chunk_keep = keep[offset:offset + len(chunk)]
+                offset    += len(chunk)
+                chunk      = chunk[chunk_keep]
+            self.add(source, subreddit, chunk)
+
+    def set_duplicates(self, source, duplicates):
+        self._conn.execute("UPDATE sources SET duplicates = ? WHERE source = ?", (duplicates, source))
+
+    def _clear(self, source):
+        for table in ("terms", "rows", "sources"):
+            self._conn.execute(f"DELETE FROM {table} WHERE source = ?", (source,))
+
+    def prune(self, sources):
+        """Drops the entries of sources that are no longer cleaned."""
+        known = [row[0] for row in self._conn.execute("SELECT source FROM sources")]
+        for source in known:
+            if source not in sources:
+                self._clear(source)
+
+    def save(self):
+        try:
+            self._conn.commit()
+            self._open.clear()
+            return True, f"term index written to {self.path}"
+        except sqlite3.Error as e:
+            msg = f"Error writing term index: {self.path} - {e}"
+            logger.error(msg)
+            return False, str(e)
+
+    def close(self):
+        self._conn.close()
+
+    @staticmethod
+    def _where(subreddit=None, kind=None, start=None, end=None):
+        """Helper: WHERE clause of the filters, start / end = PERIODS ( e.g. '2025-01' ), BOTH INCLUDED."""
+        where, params = [], []
+        for column, op, value in (("subreddit", "=", subreddit), ("kind", "=", kind), ("period", ">=", start), ("period", "<=", end)):
+            if value is None:
+                continue
+            if column == "subreddit" and isinstance(value, (list, tuple, set)):
+                where.append(f"subreddit IN ({','.join('?' * len(value))})")
+                params.extend(value)
+                continue
+            where.append(f"{column} {op} ?")
+            params.append(value)
+        return (" WHERE " + " AND ".join(where)) if where else "", params
+
+    def top_terms(self, n=30, subreddit=None, kind=None, start=None, end=None):
+        """[ ( term, count ), ... ] MOST COMMON FIRST, THE SAME AS Counter(words).most_common(n) OVER THE FILTERED ROWS"""
+        where, params = self._where(subreddit, kind, start, end)
+        sql = f"SELECT term, SUM(count) AS total FROM terms{where} GROUP BY term ORDER BY total DESC, term"
+        if n:
+            sql += f" LIMIT {int(n)}"
+        return self._conn.execute(sql, params).fetchall()
+
+    def frequencies(self, subreddit=None, kind=None, start=None, end=None):
+        """{ term: count } ( e.g. WordCloud.generate_from_frequencies )"""
+        return dict(self.top_terms(None, subreddit, kind, start, end))
+
+    def word_counts(self, subreddit=None, kind=None, start=None, end=None):
+        """word_count / tokens OF EVERY INDEXED ROW, AS A DataFrame ( WORD COUNT DISTRIBUTIONS )"""
+        where, params = self._where(subreddit, kind, start, end)
+        return pd.read_sql_query(f"SELECT subreddit, kind, period, word_count, tokens FROM rows{where}", self._conn, params=params)
+
+    def summary(self):
+        """ROWS, TOKENS AND DISTINCT TERMS PER SUBREDDIT"""
+        return pd.read_sql_query("""SELECT r.subreddit, r.rows, r.words, r.tokens, t.terms
+                                    FROM ( SELECT subreddit, COUNT(*) AS rows, SUM(word_count) AS words, SUM(tokens) AS tokens
+                                           FROM rows GROUP BY subreddit ) r
+                                    LEFT JOIN ( SELECT subreddit, COUNT(DISTINCT term) AS terms FROM terms GROUP BY subreddit ) t
+                                      ON t.subreddit = r.subreddit
+                                    ORDER BY r.subreddit""", self._conn)
@@ -0,0 +1,108 @@
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import version, PackageNotFoundError
+import json
+import os
+import re
+
+import pandas as pd
+
+# PRECOMPILED PATTERN
+# LINKS AND PUNCTUATION IN ONE PASS: A LINK STARTS WITH A WORD CHARACTER, SO THE
+# PUNCTUATION BRANCH NEVER CUTS INTO ONE AND THE RESULT EQUALS REMOVING LINKS FIRST
+LINK_PUNCT_RE = re.compile(r'https?://\S+|www\.\S+|[^\w\s]')
+
+# STOPWORDS OF THE CURRENT WORKER PROCESS ( SET BY _init_worker )
+_worker_stopwords = frozenset()
+
+
+def load_stopwords(cache_path="data/state/stopwords.json"):
+
+    """
+    gensim STOPWORDS AS A frozenset, KEPT IN cache_path FOR THE INSTALLED gensim VERSION
+    IMPORTING gensim ( ABOUT A SECOND ) ONLY HAPPENS WHEN THE CACHE IS MISSING OR FROM ANOTHER VERSION
+    """
+
+    try:
+        gensim_version = version("gensim")
+    except PackageNotFoundError:
+        gensim_version = None
+
+    if gensim_version and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r') as file:
+                cached = json.load(file)
+            if cached.get("gensim") == gensim_version:
+                return frozenset(cached["stopwords"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    from gensim.parsing.preprocessing import STOPWORDS # STOP WORD LIST
+    try:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        with open(cache_path, 'w') as file:
+            json.dump({"gensim": gensim_version, "stopwords": sorted(STOPWORDS)}, file)
+    except OSError:
+        pass
+    return frozenset(STOPWORDS)
+
+def text_process(text, stopwords):
+    """Row by row reference implementation, kept to check and benchmark the batch engine against."""
+    if not isinstance(text, str):
+        text = "" if pd.isna(text) else str(text)   # MISSING TEXT ( None, NaN, pd.NA ) HAS NO WORDS
+    text = text.lower()                 # LOWERCASE TEXT
+    text = re.sub(r'https?://\S+|www\.\S+', '', text) # REMOVE LINKS
+    text = re.sub(r'[^\w\s]', '', text) # REMOVE PUNCTUATION
+
+    # REMOVE STOPWORDS
+    words = text.split()
+    text = [w for w in words if w not in stopwords] # REMOVE STOPWORDS
+    return " ".join( text )
+
+def text_process_batch(texts, stopwords):
+    """
+    LOWER CASE, REMOVE LINKS, PUNCTUATION AND STOPWORDS FOR A WHOLE LIST OF TEXTS
+    SAME OUTPUT AS text_process, WITHOUT THE PER-ROW PATTERN LOOKUPS AND ATTRIBUTE ACCESS
+    MISSING VALUES ( None, NaN, pd.NA OF A string[pyarrow] COLUMN ) GIVE "", NOT THE WORD "nan" / "na"
+    """
+
+    strip     = LINK_PUNCT_RE.sub
+    stopwords = frozenset(stopwords)
+
+    out = []
+    append = out.append
+    for text in texts:
+        if not isinstance(text, str):
+            text = "" if pd.isna(text) else str(text)
+        words = strip('', text.lower()).split()
+        append(" ".join([w for w in words if w not in stopwords]))
+    return out
+
+def _init_worker(stopwords):
+    """Helper: ships the stopword set once per worker instead of once per chunk."""
+    global _worker_stopwords
+    _worker_stopwords = frozenset(stopwords)
+
+def _process_chunk(texts):
+    return text_process_batch(texts, _worker_stopwords)
+
+def text_process_series(series, stopwords, workers=None, chunk_size=20000, parallel_min_rows=100000):
+
+    """
+    RUN text_process_batch OVER A WHOLE COLUMN
+    COLUMNS OF AT LEAST parallel_min_rows ROWS ARE SPLIT INTO CHUNKS AND SPREAD
+    OVER A PROCESS POOL ( workers = None -> ONE PER CPU ), CHUNKS ARE JOINED BACK IN ORDER
+    """
+
+    texts   = series.tolist()
+    workers = workers or os.cpu_count() or 1
+
+    if workers < 2 or len(texts) < parallel_min_rows:
+        return pd.Series(text_process_batch(texts, stopwords), index=series.index, dtype=object)
+
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(frozenset(stopwords),)) as pool:
+        out = []
+        for processed in pool.map(_process_chunk, chunks):
+            out.extend(processed)
+
+    return pd.Series(out, index=series.index, dtype=object)